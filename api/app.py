@@ -27,27 +27,51 @@ Supported Conversions:
 """
 
 import os
+import json
+import time
 import uuid
+import heapq
+import hashlib
+import functools
 import asyncio
 import tempfile
 import shutil
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from enum import Enum
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from collections import OrderedDict
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Query, Header
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Query, Header, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import aiofiles
+import zipfile
 
 # Import isolated API routers
 from word_to_pdf_api import router as word_to_pdf_router
 from pdf_to_word_api import router as pdf_to_word_router
 from excel_to_pdf_api import router as excel_to_pdf_router
 from pdf_to_excel_api import router as pdf_to_excel_router
+from pdf_api import router as pdf_router
+from image_api import router as image_router
+import word_to_pdf_api
+import excel_to_pdf_api
+import pdf_to_word_api
+import pdf_to_excel_api
+import pdf_api
+import image_api
+from workspace import Workspace
+from downloads import file_download, content_etag, precompress, is_compressible
+from zipstream import ZipStream
+import pdf_render
+import pdf_text
+import image_convert
+import workbook_pdf
+from workbook_pdf import sheets_to_pdf, profile_arg, pdf_export_target
 
 
 # ============== Configuration ==============
@@ -55,8 +79,12 @@ class Config:
     UPLOAD_DIR = Path(tempfile.gettempdir()) / "convertx_uploads"
     OUTPUT_DIR = Path(tempfile.gettempdir()) / "convertx_outputs"
     MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
-    FILE_RETENTION_HOURS = 24
+    FILE_RETENTION_HOURS = int(os.environ.get("FILE_RETENTION_HOURS", 24))
+    CLEANUP_INTERVAL_SECONDS = int(os.environ.get("CLEANUP_INTERVAL_SECONDS", 15 * 60))
     MAX_CONCURRENT_CONVERSIONS = 10
+    MAX_BATCH_FILES = 500
+    MAX_PREVIEW_PAGES = 20
+    PREVIEW_CACHE_ENTRIES = int(os.environ.get("PREVIEW_CACHE_ENTRIES", 256))
     ALLOWED_ORIGINS = ["*"]  # Configure for production
     
     @classmethod
@@ -65,6 +93,24 @@ class Config:
         cls.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
+
+# Upload/output roots laid out as <root>/<hour bucket>/<job_id>
+workspace = Workspace(Config.UPLOAD_DIR, Config.OUTPUT_DIR)
+
+
+def retention_workspaces() -> List[Workspace]:
+    """Every workspace swept by the cleanup scheduler, including the isolated routers'"""
+    return [
+        workspace,
+        word_to_pdf_api.workspace,
+        pdf_to_word_api.workspace,
+        excel_to_pdf_api.workspace,
+        pdf_to_excel_api.workspace,
+        pdf_api.workspace,
+        image_api.workspace,
+    ]
+
+
 # ============== Models ==============
 class ConversionStatus(str, Enum):
     PENDING = "pending"
@@ -123,6 +169,22 @@ class ConversionResponse(BaseModel):
     error: Optional[str] = None
     file_size: Optional[int] = None
     conversion_time_ms: Optional[int] = None
+    batch_id: Optional[str] = None
+    outputs: Optional[Dict[str, str]] = None
+    routes: Optional[Dict[str, List[str]]] = None
+    hops: Optional[List[Dict[str, Any]]] = None
+
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    total: int
+    counts: Dict[str, int]
+    jobs: List[ConversionResponse]
+
+
+class BulkStatusResponse(BaseModel):
+    jobs: List[ConversionResponse]
+    missing: List[str] = Field(default_factory=list)
 
 
 class ConversionJob(BaseModel):
@@ -136,19 +198,55 @@ class ConversionJob(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
     error: Optional[str] = None
+    batch_id: Optional[str] = None
+    # Multi-target jobs: every requested target and its result
+    targets: List[str] = Field(default_factory=list)
+    outputs: Dict[str, Path] = Field(default_factory=dict)
+    # Planned format chain per target, and timing of every converter that ran
+    routes: Dict[str, List[str]] = Field(default_factory=dict)
+    hops: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class UploadCreateRequest(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0, description="Total upload size in bytes")
+
+
+class UploadSession(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    path: Path
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @property
+    def offset(self) -> int:
+        """Bytes received so far - the file on disk is the source of truth"""
+        return self.path.stat().st_size if self.path.exists() else 0
 
 
 # ============== Job Storage (In-Memory for demo, use Redis in production) ==============
 class JobStorage:
-    def __init__(self):
+    def __init__(self, ttl: timedelta = timedelta(hours=Config.FILE_RETENTION_HOURS)):
         self._jobs: Dict[str, ConversionJob] = {}
+        self.ttl = ttl
+    
+    def _is_expired(self, job: ConversionJob, now: datetime) -> bool:
+        # Jobs still pending/processing are never expired from under their worker
+        if job.status not in (ConversionStatus.COMPLETED, ConversionStatus.FAILED):
+            return False
+        return (job.completed_at or job.created_at) + self.ttl < now
     
     async def create(self, job: ConversionJob) -> ConversionJob:
         self._jobs[job.job_id] = job
         return job
     
     async def get(self, job_id: str) -> Optional[ConversionJob]:
-        return self._jobs.get(job_id)
+        job = self._jobs.get(job_id)
+        if job and self._is_expired(job, datetime.utcnow()):
+            # Expired records are invisible even before the scheduler evicts them
+            return None
+        return job
     
     async def update(self, job_id: str, **kwargs) -> Optional[ConversionJob]:
         if job_id in self._jobs:
@@ -163,26 +261,143 @@ class JobStorage:
             del self._jobs[job_id]
             return True
         return False
+    
+    async def list_batch(self, batch_id: str) -> List[ConversionJob]:
+        now = datetime.utcnow()
+        return [
+            job for job in self._jobs.values()
+            if job.batch_id == batch_id and not self._is_expired(job, now)
+        ]
+    
+    async def evict_expired(self) -> List[ConversionJob]:
+        """Drop job records past their TTL and return them so their files can be removed"""
+        now = datetime.utcnow()
+        expired = [job for job in self._jobs.values() if self._is_expired(job, now)]
+        for job in expired:
+            del self._jobs[job.job_id]
+        return expired
 
 
 job_storage = JobStorage()
 
 
+# ============== Resumable Upload Storage ==============
+class UploadStorage:
+    """
+    Resumable upload sessions. Chunks are appended straight into the job's
+    upload workspace, so finalizing an upload needs no copy.
+    """
+
+    def __init__(self, ttl: timedelta = timedelta(hours=Config.FILE_RETENTION_HOURS)):
+        self._sessions: Dict[str, UploadSession] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.ttl = ttl
+
+    async def create(self, session: UploadSession) -> UploadSession:
+        self._sessions[session.upload_id] = session
+        self._locks[session.upload_id] = asyncio.Lock()
+        return session
+
+    async def get(self, upload_id: str) -> Optional[UploadSession]:
+        session = self._sessions.get(upload_id)
+        if session and session.created_at + self.ttl < datetime.utcnow():
+            return None
+        return session
+
+    def lock(self, upload_id: str) -> Optional[asyncio.Lock]:
+        """Serializes PATCH and finalize requests for one upload (None once it is gone)"""
+        return self._locks.get(upload_id)
+
+    async def delete(self, upload_id: str) -> bool:
+        self._locks.pop(upload_id, None)
+        return self._sessions.pop(upload_id, None) is not None
+
+    async def evict_expired(self) -> List[str]:
+        cutoff = datetime.utcnow() - self.ttl
+        expired = [uid for uid, s in self._sessions.items() if s.created_at < cutoff]
+        for upload_id in expired:
+            await self.delete(upload_id)
+        return expired
+
+
+upload_storage = UploadStorage()
+
+
+# ============== Preview Cache ==============
+class PreviewCache:
+    """
+    Recent sync preview results by content hash, route and options, so a
+    document being looked at again previews instantly. Entries point at
+    job outputs and lapse when retention removes them.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Path]" = OrderedDict()
+
+    @staticmethod
+    def key(content: bytes, route: List["ConversionFormat"], options: Dict[str, Any]) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        return digest + ":" + "/".join(fmt.value for fmt in route) + ":" + json.dumps(options, sort_keys=True)
+
+    def get(self, key: str) -> Optional[Path]:
+        path = self._entries.get(key)
+        if path is None:
+            return None
+        if not path.exists():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return path
+
+    def put(self, key: str, path: Path):
+        self._entries[key] = path
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+preview_cache = PreviewCache(Config.PREVIEW_CACHE_ENTRIES)
+
+
 # ============== Conversion Semaphore ==============
 conversion_semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_CONVERSIONS)
 
 
 # ============== Converter Registry ==============
 class ConverterRegistry:
-    """Registry for all supported conversions"""
+    """
+    Registry for all supported conversions.
+    
+    Registered converters form a graph of formats. Pairs without a direct
+    converter are planned as the cheapest chain of converters, using each
+    edge's cost estimate (roughly relative seconds for a typical file).
+    """
     
     _converters: Dict[tuple, callable] = {}
+    _costs: Dict[tuple, float] = {}
+    # Edges whose output may be a bundle (e.g. a ZIP of pages) can only end a chain
+    _terminal: set = set()
+    # Edges that produce a bundle only when an option is set (e.g. all_sheets)
+    _bundle_options: Dict[tuple, str] = {}
+    _routes: Optional[Dict[ConversionFormat, Dict[ConversionFormat, Tuple[float, List[ConversionFormat]]]]] = None
     
     @classmethod
-    def register(cls, source: ConversionFormat, target: ConversionFormat):
-        """Decorator to register a converter function"""
+    def register(cls, source: ConversionFormat, target: ConversionFormat,
+                 cost: float = 1.0, intermediate: bool = True,
+                 bundle_option: Optional[str] = None):
+        """
+        Decorator to register a converter function. An edge with a
+        bundle_option stays usable mid-route, except when that option is set.
+        """
         def decorator(func):
             cls._converters[(source, target)] = func
+            cls._costs[(source, target)] = cost
+            if not intermediate:
+                cls._terminal.add((source, target))
+            if bundle_option:
+                cls._bundle_options[(source, target)] = bundle_option
+            cls._routes = None
             return func
         return decorator
     
@@ -191,10 +406,73 @@ class ConverterRegistry:
         return cls._converters.get((source, target))
     
     @classmethod
-    def get_supported_conversions(cls) -> List[Dict[str, str]]:
+    def _plan_from(cls, source: ConversionFormat) -> Dict[ConversionFormat, Tuple[float, List[ConversionFormat]]]:
+        """Dijkstra over the converter graph: cheapest (cost, route) to every reachable format"""
+        best = {source: (0.0, [source])}
+        queue = [(0.0, 0, source)]
+        counter = 1
+        
+        while queue:
+            cost, _, fmt = heapq.heappop(queue)
+            if cost > best[fmt][0]:
+                continue
+            # Bundle outputs are valid results but never fed to another converter
+            if fmt != source and (best[fmt][1][-2], fmt) in cls._terminal:
+                continue
+            for (src, tgt), edge_cost in cls._costs.items():
+                if src != fmt:
+                    continue
+                new_cost = cost + edge_cost
+                if tgt not in best or new_cost < best[tgt][0]:
+                    best[tgt] = (new_cost, best[fmt][1] + [tgt])
+                    heapq.heappush(queue, (new_cost, counter, tgt))
+                    counter += 1
+        
+        del best[source]
+        return best
+    
+    @classmethod
+    def _all_routes(cls):
+        if cls._routes is None:
+            sources = {src for src, _ in cls._converters}
+            cls._routes = {src: cls._plan_from(src) for src in sources}
+        return cls._routes
+    
+    @classmethod
+    def find_route(cls, source: ConversionFormat, target: ConversionFormat) -> Optional[List[ConversionFormat]]:
+        """Cheapest chain of formats from source to target (None if unreachable)"""
+        planned = cls._all_routes().get(source, {}).get(target)
+        return planned[1] if planned else None
+    
+    @classmethod
+    def check_route(cls, route: List[ConversionFormat], options: Dict):
+        """Raise ValueError if the options make a hop before the last produce a bundle"""
+        for source, target in zip(route[:-2], route[1:-1]):
+            option = cls._bundle_options.get((source, target))
+            if option and options.get(option):
+                raise ValueError(
+                    f"{option} produces a ZIP bundle, which cannot be converted further "
+                    f"({source.value} → {target.value} is not the last step of "
+                    f"{' → '.join(fmt.value for fmt in route)})"
+                )
+    
+    @classmethod
+    def route_cost(cls, route: List[ConversionFormat]) -> float:
+        return sum(cls._costs[(src, tgt)] for src, tgt in zip(route, route[1:]))
+    
+    @classmethod
+    def get_supported_conversions(cls) -> List[Dict[str, Any]]:
+        """Every reachable pair, with the planned route and its estimated cost"""
         return [
-            {"source": src.value, "target": tgt.value}
-            for src, tgt in cls._converters.keys()
+            {
+                "source": src.value,
+                "target": tgt.value,
+                "direct": len(route) == 2,
+                "route": [fmt.value for fmt in route],
+                "cost": cost
+            }
+            for src, targets in cls._all_routes().items()
+            for tgt, (cost, route) in targets.items()
         ]
 
 
@@ -202,6 +480,25 @@ class ConverterRegistry:
 import subprocess
 
 
+# Metrics a converter reports for the hop it is running (see convert_along)
+hop_metrics: ContextVar[Optional[Dict[str, Any]]] = ContextVar("hop_metrics", default=None)
+# Whether the running hop produces the route's final result
+hop_is_final: ContextVar[bool] = ContextVar("hop_is_final", default=True)
+
+
+def record_metrics(**metrics):
+    """Attach converter-specific metrics (e.g. encode_ms) to the current hop"""
+    current = hop_metrics.get()
+    if current is not None:
+        current.update(metrics)
+
+
+def preview_range(options: Dict) -> Optional[str]:
+    """Page range "1-N" for a preview=N conversion (None for a full one)"""
+    preview = options.get("preview")
+    return f"1-{preview}" if preview else None
+
+
 async def run_command(cmd: List[str], timeout: int = 120) -> tuple:
     """Run a command asynchronously"""
     process = await asyncio.create_subprocess_exec(
@@ -221,8 +518,13 @@ async def run_command(cmd: List[str], timeout: int = 120) -> tuple:
 
 
 # -------- Document Converters (LibreOffice-based) --------
-async def libreoffice_convert(input_path: Path, output_format: str, output_dir: Path) -> Path:
-    """Convert using LibreOffice in headless mode with optimized settings"""
+async def libreoffice_convert(input_path: Path, output_format: str, output_dir: Path,
+                              profile: Optional[Path] = None, page_range: Optional[str] = None) -> Path:
+    """
+    Convert using LibreOffice in headless mode with optimized settings.
+    Concurrent conversions need their own profile directory each. A page
+    range limits PDF export to those pages (used for previews).
+    """
 
     cmd = [
         "soffice",
@@ -230,10 +532,12 @@ async def libreoffice_convert(input_path: Path, output_format: str, output_dir:
         "--nofirststartwizard",
         "--norestore",
         "--nologo",
-        "--convert-to", output_format,
+        "--convert-to", pdf_export_target(input_path, page_range) if output_format == "pdf" else output_format,
         "--outdir", str(output_dir),
         str(input_path)
     ]
+    if profile is not None:
+        cmd.insert(1, profile_arg(profile))
 
     # Set environment for better font rendering
     env = os.environ.copy()
@@ -280,50 +584,63 @@ async def libreoffice_convert(input_path: Path, output_format: str, output_dir:
     raise RuntimeError(f"Conversion completed but output file not found. Files in output dir: {all_files}")
 
 
-@ConverterRegistry.register(ConversionFormat.DOCX, ConversionFormat.PDF)
+@ConverterRegistry.register(ConversionFormat.DOCX, ConversionFormat.PDF, cost=5)
 async def docx_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert DOCX to PDF using LibreOffice - auto-detects best export settings"""
-    return await libreoffice_convert(input_path, "pdf", output_dir)
+    return await libreoffice_convert(input_path, "pdf", output_dir, page_range=preview_range(options))
 
 
-@ConverterRegistry.register(ConversionFormat.DOC, ConversionFormat.PDF)
+@ConverterRegistry.register(ConversionFormat.DOC, ConversionFormat.PDF, cost=5)
 async def doc_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert DOC to PDF using LibreOffice - auto-detects best export settings"""
     return await libreoffice_convert(input_path, "pdf", output_dir)
 
 
-@ConverterRegistry.register(ConversionFormat.XLSX, ConversionFormat.PDF)
+@ConverterRegistry.register(ConversionFormat.XLSX, ConversionFormat.PDF, cost=5)
 async def xlsx_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert XLSX to PDF using LibreOffice - auto-detects best export settings"""
+    if options.get("preview"):
+        # Only the first pages are exported; splitting would not save anything
+        return await libreoffice_convert(input_path, "pdf", output_dir, page_range=preview_range(options))
+    
+    if options.get("split_sheets"):
+        # One LibreOffice instance per sheet, merged with a bookmark per sheet
+        output_path = await sheets_to_pdf(
+            input_path, output_dir,
+            lambda part, part_dir, profile: libreoffice_convert(part, "pdf", part_dir, profile)
+        )
+        if output_path:
+            return output_path
+    
     # LibreOffice auto-detects the correct filter based on input file type
     return await libreoffice_convert(input_path, "pdf", output_dir)
 
 
-@ConverterRegistry.register(ConversionFormat.XLS, ConversionFormat.PDF)
+@ConverterRegistry.register(ConversionFormat.XLS, ConversionFormat.PDF, cost=5)
 async def xls_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert XLS to PDF using LibreOffice - auto-detects best export settings"""
     return await libreoffice_convert(input_path, "pdf", output_dir)
 
 
-@ConverterRegistry.register(ConversionFormat.PPTX, ConversionFormat.PDF)
+@ConverterRegistry.register(ConversionFormat.PPTX, ConversionFormat.PDF, cost=6)
 async def pptx_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert PPTX to PDF using LibreOffice"""
     return await libreoffice_convert(input_path, "pdf", output_dir)
 
 
-@ConverterRegistry.register(ConversionFormat.ODT, ConversionFormat.PDF)
+@ConverterRegistry.register(ConversionFormat.ODT, ConversionFormat.PDF, cost=5)
 async def odt_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert ODT to PDF using LibreOffice"""
     return await libreoffice_convert(input_path, "pdf", output_dir)
 
 
-@ConverterRegistry.register(ConversionFormat.RTF, ConversionFormat.PDF)
+@ConverterRegistry.register(ConversionFormat.RTF, ConversionFormat.PDF, cost=5)
 async def rtf_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert RTF to PDF using LibreOffice"""
     return await libreoffice_convert(input_path, "pdf", output_dir)
 
 
-@ConverterRegistry.register(ConversionFormat.HTML, ConversionFormat.PDF)
+@ConverterRegistry.register(ConversionFormat.HTML, ConversionFormat.PDF, cost=4)
 async def html_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert HTML to PDF using wkhtmltopdf or LibreOffice"""
     # Try wkhtmltopdf first (better quality)
@@ -360,7 +677,7 @@ async def html_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path
 
 
 # -------- PDF to Document Converters --------
-@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.DOCX)
+@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.DOCX, cost=8)
 async def pdf_to_docx(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert PDF to DOCX using custom high-quality converter with PyMuPDF"""
     output_path = output_dir / f"{input_path.stem}.docx"
@@ -370,21 +687,22 @@ async def pdf_to_docx(input_path: Path, output_dir: Path, options: Dict) -> Path
     api_dir = str(Path(__file__).parent.absolute())
 
     script = f'''
-import sys
+import sys, json
 sys.path.insert(0, "{api_dir}")
 
 try:
     from pdf_to_word import PDFToWordConverter
 
-    converter = PDFToWordConverter("{input_path}")
+    converter = PDFToWordConverter("{input_path}", max_pages={options.get("preview")!r})
     converter.convert("{output_path}")
     print("SUCCESS")
+    print("METRICS " + json.dumps({{"strategies": converter.strategies}}))
 except ImportError as e:
     # Fallback to pdf2docx if custom converter not available
     print(f"FALLBACK: {{e}}")
     from pdf2docx import Converter
     cv = Converter("{input_path}")
-    cv.convert("{output_path}")
+    cv.convert("{output_path}", end={options.get("preview")!r})
     cv.close()
     print("SUCCESS")
 except Exception as e:
@@ -398,6 +716,9 @@ except Exception as e:
     returncode, stdout, stderr = await run_command(cmd, timeout=300)
 
     if "SUCCESS" in stdout and output_path.exists():
+        for line in stdout.splitlines():
+            if line.startswith("METRICS "):
+                record_metrics(**json.loads(line[len("METRICS "):]))
         return output_path
 
     # Include more detailed error info
@@ -405,61 +726,78 @@ except Exception as e:
     raise RuntimeError(f"PDF to DOCX conversion failed: {error_msg}")
 
 
-@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.TXT)
+@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.TXT, cost=1)
 async def pdf_to_txt(input_path: Path, output_dir: Path, options: Dict) -> Path:
-    """Convert PDF to TXT using pdftotext"""
+    """Convert PDF to TXT with the in-process PyMuPDF extractor (pages in parallel)"""
     output_path = output_dir / f"{input_path.stem}.txt"
     
-    layout = "-layout" if options.get("preserve_layout", False) else ""
-    cmd = ["pdftotext", str(input_path), str(output_path)]
-    if layout:
-        cmd.insert(1, layout)
+    async with aiofiles.open(output_path, 'w', encoding='utf-8') as f:
+        async for chunk in pdf_text.iter_text(
+            str(input_path),
+            pages=options.get("pages") or preview_range(options),
+            layout=options.get("preserve_layout", False)
+        ):
+            await f.write(chunk)
     
-    returncode, stdout, stderr = await run_command(cmd)
+    return output_path
+
+
+async def pdf_to_images(input_path: Path, output_dir: Path, options: Dict, image_format: str) -> Path:
+    """
+    Render PDF pages with the in-process PyMuPDF renderer (pages in parallel).
+    A single page is returned as an image; several pages are written straight
+    into a stored ZIP (images are already compressed) without staging them.
+    """
+    pages = options.get("pages")
+    count = await asyncio.to_thread(pdf_render.page_count, str(input_path))
+    if options.get("preview"):
+        # First N of the selected pages
+        pages = ",".join(str(i + 1) for i in pdf_render.parse_page_range(pages, count)[:options["preview"]])
+    render_args = dict(
+        pages=pages,
+        dpi=options.get("dpi", 150),
+        image_format=image_format,
+        quality=options.get("quality", 85),
+        max_pixels=options.get("max_pixels", pdf_render.DEFAULT_MAX_PIXELS)
+    )
     
-    if returncode == 0 and output_path.exists():
+    selected = pdf_render.parse_page_range(pages, count)
+    digits = len(str(count))
+    
+    if len(selected) == 1:
+        output_path = output_dir / f"{input_path.stem}.{image_format}"
+        async for index, data in pdf_render.render_pages(str(input_path), **render_args):
+            async with aiofiles.open(output_path, 'wb') as f:
+                await f.write(data)
         return output_path
     
-    raise RuntimeError(f"PDF to TXT conversion failed: {stderr}")
+    zip_path = output_dir / f"{input_path.stem}_pages.zip"
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as zf:
+        async for index, data in pdf_render.render_pages(str(input_path), **render_args):
+            name = f"{input_path.stem}-{index + 1:0{digits}d}.{image_format}"
+            await asyncio.to_thread(zf.writestr, name, data)
+    return zip_path
 
 
-@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.PNG)
+@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.PNG, cost=2, intermediate=False)
 async def pdf_to_png(input_path: Path, output_dir: Path, options: Dict) -> Path:
-    """Convert PDF to PNG using pdftoppm"""
-    dpi = options.get("dpi", 150)
-    
-    cmd = [
-        "pdftoppm",
-        "-png",
-        "-r", str(dpi),
-        str(input_path),
-        str(output_dir / input_path.stem)
-    ]
-    
-    returncode, stdout, stderr = await run_command(cmd)
-    
-    if returncode != 0:
-        raise RuntimeError(f"PDF to PNG conversion failed: {stderr}")
-    
-    # Find output files (might be multiple pages)
-    output_files = list(output_dir.glob(f"{input_path.stem}*.png"))
-    if not output_files:
-        raise RuntimeError("Conversion completed but no output files found")
-    
-    # If single page, return directly; otherwise zip them
-    if len(output_files) == 1:
-        return output_files[0]
-    else:
-        # Create a zip of all pages
-        import zipfile
-        zip_path = output_dir / f"{input_path.stem}_pages.zip"
-        with zipfile.ZipFile(zip_path, 'w') as zf:
-            for f in sorted(output_files):
-                zf.write(f, f.name)
-        return zip_path
+    """Convert PDF pages to PNG"""
+    return await pdf_to_images(input_path, output_dir, options, "png")
+
+
+@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.JPG, cost=2, intermediate=False)
+async def pdf_to_jpg(input_path: Path, output_dir: Path, options: Dict) -> Path:
+    """Convert PDF pages to JPEG"""
+    return await pdf_to_images(input_path, output_dir, options, "jpg")
 
 
-@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.XLSX)
+@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.WEBP, cost=2, intermediate=False)
+async def pdf_to_webp(input_path: Path, output_dir: Path, options: Dict) -> Path:
+    """Convert PDF pages to WebP"""
+    return await pdf_to_images(input_path, output_dir, options, "webp")
+
+
+@ConverterRegistry.register(ConversionFormat.PDF, ConversionFormat.XLSX, cost=6)
 async def pdf_to_xlsx(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert PDF tables to Excel using Camelot"""
     output_path = output_dir / f"{input_path.stem}.xlsx"
@@ -470,6 +808,8 @@ async def pdf_to_xlsx(input_path: Path, output_dir: Path, options: Dict) -> Path
     # Get options
     separate_sheets = options.get("separate_sheets", True)
     flavor = options.get("flavor", "auto")  # lattice, stream, or auto
+    pages = options.get("pages")
+    preview = options.get("preview")
 
     script = f'''
 import sys
@@ -477,9 +817,17 @@ sys.path.insert(0, "{api_dir}")
 
 try:
     from pdf_to_excel import PDFToExcelConverter
+    from table_hints import extraction_hints
+
+    # Page range (first N pages for previews), or the hints remembered
+    # for this PDF's template by /pdf-to-excel/convert
+    hints = extraction_hints("{input_path}", pages={pages!r}, flavor="{flavor}", max_pages={preview!r})
 
     converter = PDFToExcelConverter("{input_path}")
-    converter.convert("{output_path}", separate_sheets={separate_sheets}, flavor="{flavor}")
+    converter.convert(
+        "{output_path}", separate_sheets={separate_sheets}, pages=hints["pages"],
+        flavor=hints["flavor"], table_areas=hints["table_areas"], columns=hints["columns"]
+    )
     print("SUCCESS")
 except ImportError as e:
     print(f"ERROR: {{e}}")
@@ -503,52 +851,58 @@ except Exception as e:
 
 # -------- Image Converters (Pillow/ImageMagick) --------
 async def pillow_convert(input_path: Path, output_path: Path, options: Dict) -> Path:
-    """Convert images using Pillow"""
+    """
+    Convert images using Pillow (see image_convert.py).
+    Runs on the shared image thread pool; oversized inputs run in a subprocess.
+    """
+    if await asyncio.to_thread(image_convert.fits_in_process, str(input_path)):
+        loop = asyncio.get_running_loop()
+        try:
+            metrics = await loop.run_in_executor(
+                image_convert.get_executor(),
+                functools.partial(
+                    image_convert.convert_image,
+                    str(input_path),
+                    str(output_path),
+                    width=options.get("width", 0),
+                    height=options.get("height", 0),
+                    quality=options.get("quality", 85),
+                    preset=options.get("preset", image_convert.DEFAULT_PRESET),
+                    effort=options.get("effort", image_convert.DEFAULT_EFFORT)
+                )
+            )
+        except Exception as e:
+            raise RuntimeError(f"Image conversion failed: {str(e)}")
+        record_metrics(**metrics)
+        return output_path
+    
+    api_dir = str(Path(__file__).parent.absolute())
+    
     script = f'''
-import sys
-sys.path.insert(0, '/home/claude/.local/lib/python3.11/site-packages')
-from PIL import Image
-
-img = Image.open("{input_path}")
-
-# Handle transparency for formats that don't support it
-target_format = "{output_path.suffix[1:].upper()}"
-if target_format in ["JPEG", "JPG"] and img.mode in ["RGBA", "P"]:
-    # Convert to RGB with white background
-    background = Image.new("RGB", img.size, (255, 255, 255))
-    if img.mode == "P":
-        img = img.convert("RGBA")
-    background.paste(img, mask=img.split()[3])
-    img = background
-
-# Resize if requested
-width = {options.get("width", 0)}
-height = {options.get("height", 0)}
-if width or height:
-    orig_w, orig_h = img.size
-    if width and height:
-        img = img.resize((width, height), Image.LANCZOS)
-    elif width:
-        ratio = width / orig_w
-        img = img.resize((width, int(orig_h * ratio)), Image.LANCZOS)
-    elif height:
-        ratio = height / orig_h
-        img = img.resize((int(orig_w * ratio), height), Image.LANCZOS)
-
-# Quality for lossy formats
-quality = {options.get("quality", 85)}
-if target_format in ["JPEG", "JPG", "WEBP"]:
-    img.save("{output_path}", quality=quality, optimize=True)
-else:
-    img.save("{output_path}", optimize=True)
-
+import sys, json
+sys.path.insert(0, "{api_dir}")
+from image_convert import convert_image
+
+metrics = convert_image(
+    "{input_path}",
+    "{output_path}",
+    width={options.get("width", 0)},
+    height={options.get("height", 0)},
+    quality={options.get("quality", 85)},
+    preset="{options.get("preset", image_convert.DEFAULT_PRESET)}",
+    effort="{options.get("effort", image_convert.DEFAULT_EFFORT)}"
+)
 print("SUCCESS")
+print("METRICS " + json.dumps(metrics))
 '''
     
     cmd = ["python3", "-c", script]
     returncode, stdout, stderr = await run_command(cmd)
     
     if "SUCCESS" in stdout and output_path.exists():
+        for line in stdout.splitlines():
+            if line.startswith("METRICS "):
+                record_metrics(**json.loads(line[len("METRICS "):]))
         return output_path
     
     raise RuntimeError(f"Image conversion failed: {stderr}")
@@ -609,76 +963,103 @@ async def gif_to_png(input_path: Path, output_dir: Path, options: Dict) -> Path:
 
 
 # -------- Spreadsheet Converters --------
-@ConverterRegistry.register(ConversionFormat.CSV, ConversionFormat.XLSX)
+@ConverterRegistry.register(ConversionFormat.CSV, ConversionFormat.XLSX, cost=2)
 async def csv_to_xlsx(input_path: Path, output_dir: Path, options: Dict) -> Path:
-    """Convert CSV to XLSX using openpyxl"""
+    """Convert CSV to XLSX, streaming rows into a write-only workbook (see spreadsheet_convert.py)"""
     output_path = output_dir / f"{input_path.stem}.xlsx"
+    api_dir = str(Path(__file__).parent.absolute())
     
-    delimiter = options.get("delimiter", ",")
+    # Sniffed from the file unless given
+    delimiter = options.get("delimiter")
+    encoding = options.get("encoding")
     
     script = f'''
-import sys
-sys.path.insert(0, '/home/claude/.local/lib/python3.11/site-packages')
-import csv
-from openpyxl import Workbook
-
-wb = Workbook()
-ws = wb.active
-
-with open("{input_path}", 'r', encoding='utf-8') as f:
-    reader = csv.reader(f, delimiter="{delimiter}")
-    for row in reader:
-        ws.append(row)
-
-wb.save("{output_path}")
+import sys, json
+sys.path.insert(0, "{api_dir}")
+from spreadsheet_convert import csv_to_xlsx
+
+stats = csv_to_xlsx(
+    "{input_path}",
+    "{output_path}",
+    delimiter={delimiter!r},
+    encoding={encoding!r},
+    infer_types={bool(options.get("infer_types", True))}
+)
 print("SUCCESS")
+print("METRICS " + json.dumps(stats))
 '''
     
     cmd = ["python3", "-c", script]
-    returncode, stdout, stderr = await run_command(cmd)
+    returncode, stdout, stderr = await run_command(cmd, timeout=600)
     
     if "SUCCESS" in stdout and output_path.exists():
+        for line in stdout.splitlines():
+            if line.startswith("METRICS "):
+                record_metrics(**json.loads(line[len("METRICS "):]))
         return output_path
     
     raise RuntimeError(f"CSV to XLSX conversion failed: {stderr}")
 
 
-@ConverterRegistry.register(ConversionFormat.XLSX, ConversionFormat.CSV)
-async def xlsx_to_csv(input_path: Path, output_dir: Path, options: Dict) -> Path:
-    """Convert XLSX to CSV using openpyxl"""
-    output_path = output_dir / f"{input_path.stem}.csv"
+async def spreadsheet_to_csv(input_path: Path, output_dir: Path, options: Dict) -> Path:
+    """
+    Export a workbook to CSV, streaming rows (see spreadsheet_convert.py).
+    With all_sheets, every sheet goes into {stem}_sheets.zip.
+    """
+    api_dir = str(Path(__file__).parent.absolute())
+    all_sheets = bool(options.get("all_sheets"))
+    
+    # Feeding a later hop: a CSV holds one sheet, so never drop the rest silently
+    single_sheet_only = not hop_is_final.get() and options.get("sheet") is None
     
-    sheet_index = options.get("sheet", 0)
+    if all_sheets:
+        output_path = output_dir / f"{input_path.stem}_sheets.zip"
+        call = f'all_sheets_to_zip("{input_path}", "{output_path}")'
+    else:
+        output_path = output_dir / f"{input_path.stem}.csv"
+        call = f'sheet_to_csv("{input_path}", "{output_path}", sheet={options.get("sheet", 0)!r})'
     
     script = f'''
-import sys
-sys.path.insert(0, '/home/claude/.local/lib/python3.11/site-packages')
-import csv
-from openpyxl import load_workbook
-
-wb = load_workbook("{input_path}", data_only=True)
-sheets = wb.sheetnames
-ws = wb[sheets[{sheet_index}]]
+import sys, json
+sys.path.insert(0, "{api_dir}")
+from spreadsheet_convert import sheet_to_csv, all_sheets_to_zip, sheet_names
 
-with open("{output_path}", 'w', newline='', encoding='utf-8') as f:
-    writer = csv.writer(f)
-    for row in ws.iter_rows(values_only=True):
-        writer.writerow(row)
+if {single_sheet_only}:
+    count = len(sheet_names("{input_path}"))
+    if count > 1:
+        sys.exit(f"Workbook has {{count}} sheets but is converted through CSV, which keeps one; pass sheet= to choose it")
 
+stats = {call}
 print("SUCCESS")
+print("METRICS " + json.dumps(stats))
 '''
     
     cmd = ["python3", "-c", script]
-    returncode, stdout, stderr = await run_command(cmd)
+    returncode, stdout, stderr = await run_command(cmd, timeout=600)
     
     if "SUCCESS" in stdout and output_path.exists():
+        for line in stdout.splitlines():
+            if line.startswith("METRICS "):
+                record_metrics(**json.loads(line[len("METRICS "):]))
         return output_path
     
-    raise RuntimeError(f"XLSX to CSV conversion failed: {stderr}")
+    raise RuntimeError(f"{input_path.suffix.lstrip('.').upper()} to CSV conversion failed: {stderr}")
+
+
+@ConverterRegistry.register(ConversionFormat.XLSX, ConversionFormat.CSV, cost=2, bundle_option="all_sheets")
+async def xlsx_to_csv(input_path: Path, output_dir: Path, options: Dict) -> Path:
+    """Convert XLSX to CSV using openpyxl in read-only mode"""
+    return await spreadsheet_to_csv(input_path, output_dir, options)
+
+
+@ConverterRegistry.register(ConversionFormat.XLS, ConversionFormat.CSV, cost=2, bundle_option="all_sheets")
+async def xls_to_csv(input_path: Path, output_dir: Path, options: Dict) -> Path:
+    """Convert legacy XLS to CSV using xlrd"""
+    return await spreadsheet_to_csv(input_path, output_dir, options)
 
 
 # -------- Markdown Converters --------
-@ConverterRegistry.register(ConversionFormat.MD, ConversionFormat.PDF)
+@ConverterRegistry.register(ConversionFormat.MD, ConversionFormat.PDF, cost=6)
 async def md_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert Markdown to PDF using pandoc"""
     output_path = output_dir / f"{input_path.stem}.pdf"
@@ -707,7 +1088,7 @@ async def md_to_pdf(input_path: Path, output_dir: Path, options: Dict) -> Path:
     raise RuntimeError(f"Markdown to PDF conversion failed: {stderr}")
 
 
-@ConverterRegistry.register(ConversionFormat.MD, ConversionFormat.HTML)
+@ConverterRegistry.register(ConversionFormat.MD, ConversionFormat.HTML, cost=1)
 async def md_to_html(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert Markdown to HTML using pandoc"""
     output_path = output_dir / f"{input_path.stem}.html"
@@ -725,7 +1106,7 @@ async def md_to_html(input_path: Path, output_dir: Path, options: Dict) -> Path:
     raise RuntimeError(f"Markdown to HTML conversion failed: {stderr}")
 
 
-@ConverterRegistry.register(ConversionFormat.MD, ConversionFormat.DOCX)
+@ConverterRegistry.register(ConversionFormat.MD, ConversionFormat.DOCX, cost=2)
 async def md_to_docx(input_path: Path, output_dir: Path, options: Dict) -> Path:
     """Convert Markdown to DOCX using pandoc"""
     output_path = output_dir / f"{input_path.stem}.docx"
@@ -741,31 +1122,93 @@ async def md_to_docx(input_path: Path, output_dir: Path, options: Dict) -> Path:
 
 
 # ============== Conversion Engine ==============
+async def convert_along(
+    route: List[ConversionFormat],
+    artifacts: Dict[ConversionFormat, Path],
+    output_dir: Path,
+    options: Dict,
+    hops: Optional[List[Dict[str, Any]]] = None
+) -> Path:
+    """
+    Run each hop of a route inside one workspace, so intermediates are never
+    re-uploaded. Hops whose result is already in artifacts (e.g. the PDF
+    produced for an earlier target) are skipped. Per-hop timings, output
+    size and any metrics the converter records are appended to hops when
+    given.
+    """
+    ConverterRegistry.check_route(route, options)
+    
+    for source, target in zip(route, route[1:]):
+        if target in artifacts:
+            continue
+        if artifacts[source].suffix.lower() == ".zip":
+            raise ValueError(
+                f"{artifacts[source].name} is a ZIP bundle and cannot be converted to {target.value}"
+            )
+        
+        converter = ConverterRegistry.get_converter(source, target)
+        # One directory per produced format so artifacts never collide
+        hop_dir = output_dir / target.value
+        hop_dir.mkdir(parents=True, exist_ok=True)
+        
+        metrics: Dict[str, Any] = {}
+        token = hop_metrics.set(metrics)
+        final_token = hop_is_final.set(target == route[-1])
+        try:
+            # Run conversion with semaphore to limit concurrent conversions
+            async with conversion_semaphore:
+                started = time.perf_counter()
+                artifacts[target] = await converter(artifacts[source], hop_dir, options)
+                elapsed_ms = int((time.perf_counter() - started) * 1000)
+        finally:
+            hop_metrics.reset(token)
+            hop_is_final.reset(final_token)
+        
+        if hops is not None:
+            hops.append({
+                "source": source.value,
+                "target": target.value,
+                "time_ms": elapsed_ms,
+                "bytes_out": artifacts[target].stat().st_size,
+                **metrics
+            })
+    
+    return artifacts[route[-1]]
+
+
 async def process_conversion(job: ConversionJob) -> ConversionJob:
-    """Process a conversion job"""
+    """Process a conversion job (single or multi-target)"""
     start_time = datetime.utcnow()
     
     try:
-        # Get the appropriate converter
-        converter = ConverterRegistry.get_converter(
-            ConversionFormat(job.source_format),
-            ConversionFormat(job.target_format)
-        )
+        source = ConversionFormat(job.source_format)
+        targets = [ConversionFormat(t) for t in (job.targets or [job.target_format])]
         
-        if not converter:
-            raise ValueError(f"No converter available for {job.source_format} → {job.target_format}")
+        routes = {}
+        for target in targets:
+            route = ConverterRegistry.find_route(source, target)
+            if not route:
+                raise ValueError(f"No converter available for {job.source_format} → {target.value}")
+            routes[target] = route
+            job.routes[target.value] = [fmt.value for fmt in route]
         
-        # Create output directory for this job
-        output_dir = Config.OUTPUT_DIR / job.job_id
-        output_dir.mkdir(parents=True, exist_ok=True)
+        # Output directory lives in the job's time bucket
+        output_dir = workspace.output_dir(job.job_id)
+        if output_dir is None:
+            _, output_dir = workspace.create(job.job_id)
         
-        # Run conversion with semaphore to limit concurrent conversions
-        async with conversion_semaphore:
-            output_path = await converter(job.source_path, output_dir, job.options)
+        artifacts: Dict[ConversionFormat, Path] = {source: job.source_path}
+        for target, route in routes.items():
+            output_path = await convert_along(route, artifacts, output_dir, job.options, job.hops)
+            
+            # Hash and precompress the result now so downloads never pay for it
+            await asyncio.to_thread(content_etag, output_path)
+            await asyncio.to_thread(precompress, output_path)
+            job.outputs[target.value] = output_path
         
         # Update job
         job.status = ConversionStatus.COMPLETED
-        job.output_path = output_path
+        job.output_path = job.outputs[targets[0].value]
         job.completed_at = datetime.utcnow()
         
     except Exception as e:
@@ -776,25 +1219,160 @@ async def process_conversion(job: ConversionJob) -> ConversionJob:
     return job
 
 
+async def run_job(job: ConversionJob) -> ConversionJob:
+    """Run a stored job to completion, keeping its record up to date"""
+    await job_storage.update(job.job_id, status=ConversionStatus.PROCESSING)
+    result = await process_conversion(job)
+    await job_storage.update(
+        job.job_id,
+        status=result.status,
+        output_path=result.output_path,
+        completed_at=result.completed_at,
+        error=result.error
+    )
+    return result
+
+
+def build_options(
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    quality: Optional[int] = None,
+    dpi: Optional[int] = None,
+    page_size: Optional[str] = None,
+    pages: Optional[str] = None,
+    preset: Optional[str] = None,
+    effort: Optional[str] = None,
+    sheet: Optional[str] = None,
+    all_sheets: bool = False,
+    split_sheets: bool = False,
+    preview: Optional[int] = None
+) -> Dict[str, Any]:
+    """Collect the common query parameters into a converter options dict"""
+    options = {}
+    if width:
+        options["width"] = width
+    if height:
+        options["height"] = height
+    if quality:
+        options["quality"] = quality
+    if dpi:
+        options["dpi"] = dpi
+    if page_size:
+        options["page_size"] = page_size
+    if pages:
+        options["pages"] = pages
+    if preset:
+        options["preset"] = preset
+    if effort:
+        options["effort"] = effort
+    if sheet:
+        options["sheet"] = sheet
+    if all_sheets:
+        options["all_sheets"] = True
+    if split_sheets:
+        options["split_sheets"] = True
+    if preview:
+        options["preview"] = preview
+    return options
+
+
+async def submit_conversion_job(
+    job_id: str,
+    source_format: ConversionFormat,
+    target_format: ConversionFormat,
+    input_path: Path,
+    options: Dict[str, Any],
+    background_tasks: BackgroundTasks
+) -> ConversionResponse:
+    """Record a job for an uploaded file and convert it in the background"""
+    job = ConversionJob(
+        job_id=job_id,
+        status=ConversionStatus.PENDING,
+        source_format=source_format.value,
+        target_format=target_format.value,
+        source_path=input_path,
+        options=options
+    )
+    
+    await job_storage.create(job)
+    
+    # Start conversion in background
+    background_tasks.add_task(run_job, job)
+    
+    return ConversionResponse(
+        job_id=job_id,
+        status=ConversionStatus.PENDING,
+        source_format=source_format.value,
+        target_format=target_format.value,
+        created_at=job.created_at,
+        download_url=f"/download/{job_id}"
+    )
+
+
+def job_response(job: ConversionJob) -> ConversionResponse:
+    """Public view of a job record"""
+    job_id = job.job_id
+    file_size = None
+    if job.output_path and job.output_path.exists():
+        file_size = job.output_path.stat().st_size
+    
+    conversion_time = None
+    if job.completed_at and job.created_at:
+        conversion_time = int((job.completed_at - job.created_at).total_seconds() * 1000)
+    
+    return ConversionResponse(
+        job_id=job.job_id,
+        status=job.status,
+        source_format=job.source_format,
+        target_format=job.target_format,
+        created_at=job.created_at,
+        completed_at=job.completed_at,
+        download_url=f"/download/{job_id}" if job.status == ConversionStatus.COMPLETED else None,
+        error=job.error,
+        file_size=file_size,
+        conversion_time_ms=conversion_time,
+        batch_id=job.batch_id,
+        outputs={
+            target: f"/download/{job_id}?target={target}" for target in job.outputs
+        } if job.targets and job.status == ConversionStatus.COMPLETED else None,
+        routes=job.routes or None,
+        hops=job.hops or None
+    )
+
+
 # ============== Background Cleanup ==============
+def _expire_workspaces(workspaces: List[Workspace], cutoff: float, job_ids: List[str]):
+    """Blocking filesystem sweep - always run in a worker thread"""
+    for ws in workspaces:
+        # Workspaces of evicted jobs go together with their records
+        for job_id in job_ids:
+            ws.remove(job_id)
+        # Whole time buckets past retention go with one rmtree each
+        ws.expire(cutoff)
+
+
 async def cleanup_old_files():
-    """Remove files older than retention period"""
-    cutoff = datetime.utcnow() - timedelta(hours=Config.FILE_RETENTION_HOURS)
-    
-    for directory in [Config.UPLOAD_DIR, Config.OUTPUT_DIR]:
-        if not directory.exists():
-            continue
-            
-        for item in directory.iterdir():
-            try:
-                mtime = datetime.fromtimestamp(item.stat().st_mtime)
-                if mtime < cutoff:
-                    if item.is_dir():
-                        shutil.rmtree(item)
-                    else:
-                        item.unlink()
-            except Exception:
-                pass
+    """Expire job records past the retention period along with their files"""
+    cutoff = time.time() - Config.FILE_RETENTION_HOURS * 3600
+    expired = [job.job_id for job in await job_storage.evict_expired()]
+    expired += await upload_storage.evict_expired()
+
+    await asyncio.to_thread(
+        _expire_workspaces,
+        retention_workspaces(),
+        cutoff,
+        expired
+    )
+
+
+async def cleanup_scheduler():
+    """Run cleanup_old_files periodically for the lifetime of the app"""
+    while True:
+        try:
+            await cleanup_old_files()
+        except Exception as e:
+            print(f"Cleanup failed: {e}")
+        await asyncio.sleep(Config.CLEANUP_INTERVAL_SECONDS)
 
 
 # ============== FastAPI Application ==============
@@ -802,9 +1380,17 @@ async def cleanup_old_files():
 async def lifespan(app: FastAPI):
     # Startup
     Config.ensure_dirs()
+    cleanup_task = asyncio.create_task(cleanup_scheduler())
     yield
     # Shutdown
-    pass
+    cleanup_task.cancel()
+    try:
+        await cleanup_task
+    except asyncio.CancelledError:
+        pass
+    pdf_render.shutdown_pool()
+    image_convert.shutdown_executor()
+    workbook_pdf.shutdown_pool()
 
 
 app = FastAPI(
@@ -830,6 +1416,8 @@ app.include_router(word_to_pdf_router)   # /word-to-pdf/convert
 app.include_router(pdf_to_word_router)   # /pdf-to-word/convert
 app.include_router(excel_to_pdf_router)  # /excel-to-pdf/convert
 app.include_router(pdf_to_excel_router)  # /pdf-to-excel/convert
+app.include_router(pdf_router)           # /pdf/render
+app.include_router(image_router)         # /image/renditions
 
 
 # ============== API Routes ==============
@@ -856,10 +1444,12 @@ async def root():
 
 @app.get("/conversions")
 async def list_conversions():
-    """List all supported conversions"""
+    """List every reachable conversion, including multi-hop chains with their planned route"""
+    conversions = ConverterRegistry.get_supported_conversions()
     return {
-        "supported_conversions": ConverterRegistry.get_supported_conversions(),
-        "total": len(ConverterRegistry.get_supported_conversions())
+        "supported_conversions": conversions,
+        "total": len(conversions),
+        "direct": sum(1 for c in conversions if c["direct"])
     }
 
 
@@ -887,6 +1477,13 @@ async def convert_file(
     quality: Optional[int] = Query(85, ge=1, le=100, description="Quality for lossy formats (1-100)"),
     dpi: Optional[int] = Query(150, description="DPI for PDF to image conversion"),
     page_size: Optional[str] = Query("A4", description="Page size for HTML to PDF"),
+    pages: Optional[str] = Query(None, description="Page range for PDF to image, text or XLSX, e.g. 1-3,7"),
+    preset: Optional[str] = Query(None, pattern="^(fast|balanced|quality)$", description="Image resize preset: fast, balanced or quality"),
+    effort: Optional[str] = Query(None, pattern="^(fast|balanced|small)$", description="Image encoder effort: fast, balanced or small"),
+    sheet: Optional[str] = Query(None, description="Spreadsheet sheet to export, by index or name (default: first)"),
+    all_sheets: bool = Query(False, description="Export every sheet into a ZIP of CSVs"),
+    split_sheets: bool = Query(False, description="Convert workbook sheets to PDF in parallel LibreOffice instances"),
+    preview: Optional[int] = Query(None, ge=1, le=Config.MAX_PREVIEW_PAGES, description="Convert only the first N pages for a quick preview"),
 ):
     """
     Convert a file from one format to another.
@@ -906,9 +1503,9 @@ async def convert_file(
             detail=f"File too large. Maximum size is {Config.MAX_FILE_SIZE / (1024*1024):.0f}MB"
         )
     
-    # Check if conversion is supported
-    converter = ConverterRegistry.get_converter(source_format, target_format)
-    if not converter:
+    # Check if conversion is supported (directly or through a chain)
+    route = ConverterRegistry.find_route(source_format, target_format)
+    if not route:
         raise HTTPException(
             status_code=400,
             detail=f"Conversion from {source_format.value} to {target_format.value} is not supported"
@@ -916,8 +1513,7 @@ async def convert_file(
     
     # Generate job ID and save file
     job_id = str(uuid.uuid4())
-    upload_dir = Config.UPLOAD_DIR / job_id
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    upload_dir, _ = workspace.create(job_id)
     
     # Preserve original filename with proper extension
     original_name = file.filename or f"input.{source_format.value}"
@@ -927,57 +1523,94 @@ async def convert_file(
         content = await file.read()
         await out_file.write(content)
     
-    # Build options
-    options = {}
-    if width:
-        options["width"] = width
-    if height:
-        options["height"] = height
-    if quality:
-        options["quality"] = quality
-    if dpi:
-        options["dpi"] = dpi
-    if page_size:
-        options["page_size"] = page_size
-    
-    # Create job
-    job = ConversionJob(
-        job_id=job_id,
-        status=ConversionStatus.PENDING,
-        source_format=source_format.value,
-        target_format=target_format.value,
-        source_path=input_path,
-        options=options
+    options = build_options(width, height, quality, dpi, page_size, pages, preset, effort, sheet, all_sheets, split_sheets, preview)
+    try:
+        ConverterRegistry.check_route(route, options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await submit_conversion_job(
+        job_id, source_format, target_format, input_path, options, background_tasks
     )
+
+
+@app.post("/convert/{source_format}/to-many", response_model=ConversionResponse)
+async def convert_file_multi(
+    source_format: ConversionFormat,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    targets: List[ConversionFormat] = Query(..., description="Target formats (repeat the parameter)"),
+    width: Optional[int] = Query(None, description="Image width (for image conversions)"),
+    height: Optional[int] = Query(None, description="Image height (for image conversions)"),
+    quality: Optional[int] = Query(85, ge=1, le=100, description="Quality for lossy formats (1-100)"),
+    dpi: Optional[int] = Query(150, description="DPI for PDF to image conversion"),
+    page_size: Optional[str] = Query("A4", description="Page size for HTML to PDF"),
+    pages: Optional[str] = Query(None, description="Page range for PDF to image, text or XLSX, e.g. 1-3,7"),
+    preset: Optional[str] = Query(None, pattern="^(fast|balanced|quality)$", description="Image resize preset: fast, balanced or quality"),
+    effort: Optional[str] = Query(None, pattern="^(fast|balanced|small)$", description="Image encoder effort: fast, balanced or small"),
+    sheet: Optional[str] = Query(None, description="Spreadsheet sheet to export, by index or name (default: first)"),
+    all_sheets: bool = Query(False, description="Export every sheet into a ZIP of CSVs"),
+    split_sheets: bool = Query(False, description="Convert workbook sheets to PDF in parallel LibreOffice instances"),
+    preview: Optional[int] = Query(None, ge=1, le=Config.MAX_PREVIEW_PAGES, description="Convert only the first N pages for a quick preview"),
+):
+    """
+    Convert one upload to several formats under a single job.
     
-    await job_storage.create(job)
+    Intermediate results are shared: e.g. DOCX → PDF, PNG, TXT converts the
+    DOCX to PDF once and derives PNG and TXT from that PDF. Each output is
+    downloaded with /download/{job_id}?target={format}.
+    """
+    targets = list(dict.fromkeys(targets))
     
-    # Start conversion in background
-    async def run_conversion():
-        await job_storage.update(job_id, status=ConversionStatus.PROCESSING)
-        result = await process_conversion(job)
-        await job_storage.update(
-            job_id,
-            status=result.status,
-            output_path=result.output_path,
-            completed_at=result.completed_at,
-            error=result.error
+    file.file.seek(0, 2)
+    file_size = file.file.tell()
+    file.file.seek(0)
+    
+    if file_size > Config.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {Config.MAX_FILE_SIZE / (1024*1024):.0f}MB"
         )
     
-    background_tasks.add_task(run_conversion)
+    unsupported = [t.value for t in targets if not ConverterRegistry.find_route(source_format, t)]
+    if unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Conversion from {source_format.value} to {', '.join(unsupported)} is not supported"
+        )
     
-    return ConversionResponse(
+    options = build_options(width, height, quality, dpi, page_size, pages, preset, effort, sheet, all_sheets, split_sheets, preview)
+    try:
+        for target in targets:
+            ConverterRegistry.check_route(ConverterRegistry.find_route(source_format, target), options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    job_id = str(uuid.uuid4())
+    upload_dir, _ = workspace.create(job_id)
+    input_path = upload_dir / (file.filename or f"input.{source_format.value}")
+    
+    async with aiofiles.open(input_path, 'wb') as out_file:
+        content = await file.read()
+        await out_file.write(content)
+    
+    job = ConversionJob(
         job_id=job_id,
         status=ConversionStatus.PENDING,
         source_format=source_format.value,
-        target_format=target_format.value,
-        created_at=job.created_at,
-        download_url=f"/download/{job_id}"
+        target_format=",".join(t.value for t in targets),
+        targets=[t.value for t in targets],
+        source_path=input_path,
+        options=options
     )
+    await job_storage.create(job)
+    background_tasks.add_task(run_job, job)
+    
+    return job_response(job)
 
 
 @app.post("/convert/sync/{source_format}/to/{target_format}")
 async def convert_file_sync(
+    request: Request,
     source_format: ConversionFormat,
     target_format: ConversionFormat,
     file: UploadFile = File(...),
@@ -986,6 +1619,13 @@ async def convert_file_sync(
     quality: Optional[int] = Query(85, ge=1, le=100),
     dpi: Optional[int] = Query(150),
     page_size: Optional[str] = Query("A4"),
+    pages: Optional[str] = Query(None, description="Page range for PDF to image, text or XLSX, e.g. 1-3,7"),
+    preset: Optional[str] = Query(None, pattern="^(fast|balanced|quality)$", description="Image resize preset: fast, balanced or quality"),
+    effort: Optional[str] = Query(None, pattern="^(fast|balanced|small)$", description="Image encoder effort: fast, balanced or small"),
+    sheet: Optional[str] = Query(None, description="Spreadsheet sheet to export, by index or name (default: first)"),
+    all_sheets: bool = Query(False, description="Export every sheet into a ZIP of CSVs"),
+    split_sheets: bool = Query(False, description="Convert workbook sheets to PDF in parallel LibreOffice instances"),
+    preview: Optional[int] = Query(None, ge=1, le=Config.MAX_PREVIEW_PAGES, description="Convert only the first N pages for a quick preview"),
 ):
     """
     Convert a file synchronously and return the result immediately.
@@ -1004,9 +1644,9 @@ async def convert_file_sync(
             detail="File too large for sync conversion. Use the async endpoint or files up to 10MB."
         )
     
-    # Check if conversion is supported
-    converter = ConverterRegistry.get_converter(source_format, target_format)
-    if not converter:
+    # Check if conversion is supported (directly or through a chain)
+    route = ConverterRegistry.find_route(source_format, target_format)
+    if not route:
         raise HTTPException(
             status_code=400,
             detail=f"Conversion from {source_format.value} to {target_format.value} is not supported"
@@ -1014,10 +1654,7 @@ async def convert_file_sync(
     
     # Generate job ID and save file
     job_id = str(uuid.uuid4())
-    upload_dir = Config.UPLOAD_DIR / job_id
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    output_dir = Config.OUTPUT_DIR / job_id
-    output_dir.mkdir(parents=True, exist_ok=True)
+    upload_dir, output_dir = workspace.create(job_id)
     
     original_name = file.filename or f"input.{source_format.value}"
     input_path = upload_dir / original_name
@@ -1026,29 +1663,29 @@ async def convert_file_sync(
         content = await file.read()
         await out_file.write(content)
     
-    # Build options
-    options = {}
-    if width:
-        options["width"] = width
-    if height:
-        options["height"] = height
-    if quality:
-        options["quality"] = quality
-    if dpi:
-        options["dpi"] = dpi
-    if page_size:
-        options["page_size"] = page_size
+    options = build_options(width, height, quality, dpi, page_size, pages, preset, effort, sheet, all_sheets, split_sheets, preview)
+    try:
+        ConverterRegistry.check_route(route, options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Previews of a document already previewed come straight from the cache
+    cache_key = None
+    if preview:
+        cache_key = await asyncio.to_thread(PreviewCache.key, content, route, options)
+        cached = preview_cache.get(cache_key)
+        if cached:
+            return await file_download(request, cached, headers={"X-Preview-Pages": str(preview)})
     
     try:
         # Run conversion synchronously
-        async with conversion_semaphore:
-            output_path = await converter(input_path, output_dir, options)
+        output_path = await convert_along(route, {source_format: input_path}, output_dir, options)
         
-        return FileResponse(
-            output_path,
-            filename=output_path.name,
-            media_type="application/octet-stream"
-        )
+        await asyncio.to_thread(precompress, output_path)
+        if cache_key:
+            preview_cache.put(cache_key, output_path)
+            return await file_download(request, output_path, headers={"X-Preview-Pages": str(preview)})
+        return await file_download(request, output_path)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
@@ -1058,6 +1695,379 @@ async def convert_file_sync(
         pass
 
 
+# -------- Resumable Uploads --------
+@app.post("/uploads", status_code=201)
+async def create_upload(body: UploadCreateRequest):
+    """
+    Start a resumable upload.
+    
+    Send the file with PATCH /uploads/{upload_id} in chunks (each with an
+    Upload-Offset header), query progress with HEAD /uploads/{upload_id}
+    after a dropped connection, then start the conversion with
+    POST /uploads/{upload_id}/convert/{target_format}.
+    """
+    if body.size > Config.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {Config.MAX_FILE_SIZE / (1024*1024):.0f}MB"
+        )
+    
+    # The upload ID doubles as the job ID, so the file lands in the job's workspace
+    upload_id = str(uuid.uuid4())
+    upload_dir, _ = workspace.create(upload_id)
+    filename = Path(body.filename).name or "upload"
+    path = upload_dir / filename
+    path.touch()
+    
+    session = await upload_storage.create(UploadSession(
+        upload_id=upload_id,
+        filename=filename,
+        size=body.size,
+        path=path
+    ))
+    
+    return {
+        "upload_id": upload_id,
+        "offset": 0,
+        "size": session.size,
+        "upload_url": f"/uploads/{upload_id}"
+    }
+
+
+async def _get_upload(upload_id: str) -> UploadSession:
+    session = await upload_storage.get(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+@asynccontextmanager
+async def _locked_upload(upload_id: str):
+    """Hold an upload's lock; 404 if it expired or was finalized meanwhile"""
+    lock = upload_storage.lock(upload_id)
+    if lock is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    async with lock:
+        yield await _get_upload(upload_id)
+
+
+@app.head("/uploads/{upload_id}")
+async def get_upload_offset(upload_id: str):
+    """Report how many bytes of an upload the server has"""
+    session = await _get_upload(upload_id)
+    return Response(headers={
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.size),
+        "Cache-Control": "no-store"
+    })
+
+
+@app.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Upload progress as JSON"""
+    session = await _get_upload(upload_id)
+    return {
+        "upload_id": upload_id,
+        "filename": session.filename,
+        "offset": session.offset,
+        "size": session.size,
+        "complete": session.offset == session.size
+    }
+
+
+@app.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., description="Byte offset this chunk starts at")
+):
+    """
+    Append a chunk to an upload. The body is streamed to disk as it arrives,
+    so bytes received before a dropped connection are kept.
+    """
+    async with _locked_upload(upload_id) as session:
+        offset = session.offset
+        if upload_offset != offset:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload-Offset mismatch: server has {offset} bytes"
+            )
+        
+        async with aiofiles.open(session.path, 'ab') as out_file:
+            async for chunk in request.stream():
+                if offset + len(chunk) > session.size:
+                    raise HTTPException(status_code=413, detail="Chunk exceeds declared upload size")
+                await out_file.write(chunk)
+                offset += len(chunk)
+    
+    return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+
+
+@app.post("/uploads/{upload_id}/convert/{target_format}", response_model=ConversionResponse)
+async def finalize_upload(
+    upload_id: str,
+    target_format: ConversionFormat,
+    background_tasks: BackgroundTasks,
+    source_format: Optional[ConversionFormat] = Query(None, description="Defaults to the uploaded file's extension"),
+    width: Optional[int] = Query(None, description="Image width (for image conversions)"),
+    height: Optional[int] = Query(None, description="Image height (for image conversions)"),
+    quality: Optional[int] = Query(85, ge=1, le=100, description="Quality for lossy formats (1-100)"),
+    dpi: Optional[int] = Query(150, description="DPI for PDF to image conversion"),
+    page_size: Optional[str] = Query("A4", description="Page size for HTML to PDF"),
+    pages: Optional[str] = Query(None, description="Page range for PDF to image, text or XLSX, e.g. 1-3,7"),
+    preset: Optional[str] = Query(None, pattern="^(fast|balanced|quality)$", description="Image resize preset: fast, balanced or quality"),
+    effort: Optional[str] = Query(None, pattern="^(fast|balanced|small)$", description="Image encoder effort: fast, balanced or small"),
+    sheet: Optional[str] = Query(None, description="Spreadsheet sheet to export, by index or name (default: first)"),
+    all_sheets: bool = Query(False, description="Export every sheet into a ZIP of CSVs"),
+    split_sheets: bool = Query(False, description="Convert workbook sheets to PDF in parallel LibreOffice instances"),
+    preview: Optional[int] = Query(None, ge=1, le=Config.MAX_PREVIEW_PAGES, description="Convert only the first N pages for a quick preview"),
+):
+    """
+    Turn a completed upload into a conversion job (job ID = upload ID).
+    With preview=N the upload is kept, so a preview job can be followed by
+    the full conversion of the same upload.
+    """
+    # Under the upload's lock, so a PATCH still in flight cannot append
+    # after the size check or while the job takes the file over
+    async with _locked_upload(upload_id) as session:
+        if session.offset != session.size:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: {session.offset} of {session.size} bytes received"
+            )
+    
+        if source_format is None:
+            try:
+                source_format = ConversionFormat(session.path.suffix.lstrip(".").lower())
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Cannot infer source_format from filename")
+    
+        route = ConverterRegistry.find_route(source_format, target_format)
+        if not route:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Conversion from {source_format.value} to {target_format.value} is not supported"
+            )
+    
+        options = build_options(width, height, quality, dpi, page_size, pages, preset, effort, sheet, all_sheets, split_sheets, preview)
+        try:
+            ConverterRegistry.check_route(route, options)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+        if preview:
+            # The upload stays open so the full conversion can follow without
+            # re-uploading; the same preview requested again returns its job
+            job_id = f"{upload_id}-preview{preview}-{target_format.value}"
+            existing = await job_storage.get(job_id)
+            if existing and existing.status != ConversionStatus.FAILED:
+                return job_response(existing)
+            return await submit_conversion_job(
+                job_id, source_format, target_format, session.path, options, background_tasks
+            )
+    
+        await upload_storage.delete(upload_id)
+        return await submit_conversion_job(
+            upload_id, source_format, target_format, session.path, options, background_tasks
+        )
+
+
+# -------- Batch Conversion --------
+def _unique_name(name: str, taken: set) -> str:
+    """Archive name that does not clash with earlier entries"""
+    stem, suffix = Path(name).stem, Path(name).suffix
+    candidate, n = name, 1
+    while candidate in taken:
+        candidate = f"{stem}-{n}{suffix}"
+        n += 1
+    taken.add(candidate)
+    return candidate
+
+
+def _extract_batch_archive(archive, max_files: int, max_total: int) -> List[Tuple[str, Path]]:
+    """
+    Unpack a ZIP of inputs straight into fresh job workspaces.
+    Blocking - run in a worker thread. Returns (job_id, input_path) pairs.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        members = [m for m in zf.infolist() if not m.is_dir() and not Path(m.filename).name.startswith(".")]
+        if len(members) > max_files:
+            raise ValueError(f"Archive has {len(members)} files; the batch limit is {max_files}")
+        # Declared sizes guard against decompression bombs before anything is written
+        if sum(m.file_size for m in members) > max_total:
+            raise ValueError("Archive contents exceed the maximum batch size")
+        
+        extracted = []
+        for member in members:
+            job_id = str(uuid.uuid4())
+            upload_dir, _ = workspace.create(job_id)
+            input_path = upload_dir / Path(member.filename).name
+            with zf.open(member) as src, open(input_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            extracted.append((job_id, input_path))
+        return extracted
+
+
+async def _stream_batch_zip(batch_id: str, jobs: List[ConversionJob], tasks: List[asyncio.Task]):
+    """Yield a ZIP of results in completion order, ending with manifest.json"""
+    stream = ZipStream()
+    taken = {"manifest.json"}
+    outputs: Dict[str, str] = {}
+    
+    for next_done in asyncio.as_completed(tasks):
+        job = await next_done
+        if job.status != ConversionStatus.COMPLETED:
+            continue
+        
+        arcname = _unique_name(job.output_path.name, taken)
+        compression = zipfile.ZIP_DEFLATED if is_compressible(job.output_path) else zipfile.ZIP_STORED
+        yield stream.open_entry(arcname, size=job.output_path.stat().st_size, compression=compression)
+        async with aiofiles.open(job.output_path, 'rb') as f:
+            while chunk := await f.read(1024 * 1024):
+                yield stream.write(chunk)
+        yield stream.close_entry()
+        outputs[job.job_id] = arcname
+    
+    manifest = {
+        "batch_id": batch_id,
+        "files": [
+            {
+                "job_id": job.job_id,
+                "source": job.source_path.name,
+                "status": job.status.value,
+                "output": outputs.get(job.job_id),
+                "error": job.error,
+            }
+            for job in jobs
+        ]
+    }
+    yield stream.write_entry("manifest.json", json.dumps(manifest, indent=2).encode(), compression=zipfile.ZIP_DEFLATED)
+    yield stream.close()
+
+
+@app.post("/batch/{target_format}")
+async def convert_batch(
+    target_format: ConversionFormat,
+    files: List[UploadFile] = File(..., description="Files to convert, or a single .zip archive of them"),
+    source_format: Optional[ConversionFormat] = Query(None, description="Defaults to each file's extension"),
+    width: Optional[int] = Query(None, description="Image width (for image conversions)"),
+    height: Optional[int] = Query(None, description="Image height (for image conversions)"),
+    quality: Optional[int] = Query(85, ge=1, le=100, description="Quality for lossy formats (1-100)"),
+    dpi: Optional[int] = Query(150, description="DPI for PDF to image conversion"),
+    page_size: Optional[str] = Query("A4", description="Page size for HTML to PDF"),
+    pages: Optional[str] = Query(None, description="Page range for PDF to image, text or XLSX, e.g. 1-3,7"),
+    preset: Optional[str] = Query(None, pattern="^(fast|balanced|quality)$", description="Image resize preset: fast, balanced or quality"),
+    effort: Optional[str] = Query(None, pattern="^(fast|balanced|small)$", description="Image encoder effort: fast, balanced or small"),
+    sheet: Optional[str] = Query(None, description="Spreadsheet sheet to export, by index or name (default: first)"),
+    all_sheets: bool = Query(False, description="Export every sheet into a ZIP of CSVs"),
+    split_sheets: bool = Query(False, description="Convert workbook sheets to PDF in parallel LibreOffice instances"),
+    preview: Optional[int] = Query(None, ge=1, le=Config.MAX_PREVIEW_PAGES, description="Convert only the first N pages for a quick preview"),
+):
+    """
+    Convert many files in one request.
+    
+    Files are converted in parallel (within MAX_CONCURRENT_CONVERSIONS) and
+    the response is a ZIP streamed as each conversion finishes, ending with
+    manifest.json listing every file's status and error. Each file is also
+    a normal job: the X-Batch-Id header identifies the batch for
+    GET /batch/{batch_id}, and results stay downloadable per job.
+    """
+    batch_id = str(uuid.uuid4())
+    options = build_options(width, height, quality, dpi, page_size, pages, preset, effort, sheet, all_sheets, split_sheets, preview)
+    
+    # Save inputs into per-file job workspaces
+    inputs: List[Tuple[str, Path]] = []
+    if len(files) == 1 and (files[0].filename or "").lower().endswith(".zip") and source_format is None:
+        try:
+            inputs = await asyncio.to_thread(
+                _extract_batch_archive, files[0].file, Config.MAX_BATCH_FILES, Config.MAX_FILE_SIZE
+            )
+        except (ValueError, zipfile.BadZipFile) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid batch archive: {e}")
+    else:
+        if len(files) > Config.MAX_BATCH_FILES:
+            raise HTTPException(status_code=400, detail=f"Too many files. The batch limit is {Config.MAX_BATCH_FILES}")
+        
+        total_size = 0
+        for file in files:
+            file.file.seek(0, 2)
+            total_size += file.file.tell()
+            file.file.seek(0)
+        if total_size > Config.MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch too large. Maximum total size is {Config.MAX_FILE_SIZE / (1024*1024):.0f}MB"
+            )
+        
+        for index, file in enumerate(files):
+            job_id = str(uuid.uuid4())
+            upload_dir, _ = workspace.create(job_id)
+            input_path = upload_dir / Path(file.filename or f"input-{index}").name
+            async with aiofiles.open(input_path, 'wb') as out_file:
+                content = await file.read()
+                await out_file.write(content)
+            inputs.append((job_id, input_path))
+    
+    if not inputs:
+        raise HTTPException(status_code=400, detail="No files to convert")
+    
+    # One job per file; unsupported ones fail up front and only appear in the manifest
+    jobs: List[ConversionJob] = []
+    tasks: List[asyncio.Task] = []
+    for job_id, input_path in inputs:
+        job = ConversionJob(
+            job_id=job_id,
+            status=ConversionStatus.PENDING,
+            source_format=(source_format.value if source_format else input_path.suffix.lstrip(".").lower()),
+            target_format=target_format.value,
+            source_path=input_path,
+            options=dict(options),
+            batch_id=batch_id
+        )
+        try:
+            supported = ConverterRegistry.find_route(ConversionFormat(job.source_format), target_format)
+        except ValueError:
+            supported = None
+        if not supported:
+            job.status = ConversionStatus.FAILED
+            job.error = f"Conversion from {job.source_format or 'unknown'} to {target_format.value} is not supported"
+            job.completed_at = datetime.utcnow()
+        
+        await job_storage.create(job)
+        jobs.append(job)
+        if supported:
+            # Tasks outlive a dropped client; results stay available per job
+            tasks.append(asyncio.create_task(run_job(job)))
+    
+    return StreamingResponse(
+        _stream_batch_zip(batch_id, jobs, tasks),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="batch-{batch_id}.zip"',
+            "X-Batch-Id": batch_id
+        }
+    )
+
+
+@app.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(batch_id: str):
+    """Status of every job in a batch"""
+    jobs = await job_storage.list_batch(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    counts: Dict[str, int] = {}
+    for job in jobs:
+        counts[job.status.value] = counts.get(job.status.value, 0) + 1
+    
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        total=len(jobs),
+        counts=counts,
+        jobs=[job_response(job) for job in sorted(jobs, key=lambda j: j.created_at)]
+    )
+
+
 @app.get("/status/{job_id}", response_model=ConversionResponse)
 async def get_job_status(job_id: str):
     """Get the status of a conversion job"""
@@ -1066,31 +2076,33 @@ async def get_job_status(job_id: str):
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    file_size = None
-    if job.output_path and job.output_path.exists():
-        file_size = job.output_path.stat().st_size
-    
-    conversion_time = None
-    if job.completed_at and job.created_at:
-        conversion_time = int((job.completed_at - job.created_at).total_seconds() * 1000)
-    
-    return ConversionResponse(
-        job_id=job.job_id,
-        status=job.status,
-        source_format=job.source_format,
-        target_format=job.target_format,
-        created_at=job.created_at,
-        completed_at=job.completed_at,
-        download_url=f"/download/{job_id}" if job.status == ConversionStatus.COMPLETED else None,
-        error=job.error,
-        file_size=file_size,
-        conversion_time_ms=conversion_time
-    )
+    return job_response(job)
+
+
+@app.get("/status", response_model=BulkStatusResponse)
+async def get_bulk_status(job_ids: List[str] = Query(..., description="Job IDs to look up (repeat the parameter)")):
+    """Get the status of many conversion jobs in one request"""
+    jobs, missing = [], []
+    for job_id in job_ids:
+        job = await job_storage.get(job_id)
+        if job:
+            jobs.append(job_response(job))
+        else:
+            missing.append(job_id)
+    return BulkStatusResponse(jobs=jobs, missing=missing)
 
 
 @app.get("/download/{job_id}")
-async def download_result(job_id: str):
-    """Download the converted file"""
+async def download_result(
+    job_id: str,
+    request: Request,
+    target: Optional[ConversionFormat] = Query(None, description="Which output of a multi-target job")
+):
+    """
+    Download the converted file.
+    
+    Supports Range/If-Range for resuming and If-None-Match for revalidation.
+    """
     job = await job_storage.get(job_id)
     
     if not job:
@@ -1102,14 +2114,16 @@ async def download_result(job_id: str):
             detail=f"Job is not complete. Current status: {job.status.value}"
         )
     
-    if not job.output_path or not job.output_path.exists():
+    output_path = job.output_path
+    if target is not None:
+        output_path = job.outputs.get(target.value)
+        if output_path is None:
+            raise HTTPException(status_code=404, detail=f"Job has no {target.value} output")
+    
+    if not output_path or not output_path.exists():
         raise HTTPException(status_code=404, detail="Output file not found")
     
-    return FileResponse(
-        job.output_path,
-        filename=job.output_path.name,
-        media_type="application/octet-stream"
-    )
+    return await file_download(request, output_path)
 
 
 @app.post("/cleanup")
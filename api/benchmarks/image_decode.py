@@ -0,0 +1,82 @@
+"""
+Benchmark: JPEG downscaling, full decode + LANCZOS vs. image_convert presets
+
+Usage:
+    python benchmarks/image_decode.py                   # synthetic 24 MP JPEG
+    python benchmarks/image_decode.py photo.jpg --width 400 --runs 5
+
+The "legacy" row is the original pillow_convert path: decode every pixel,
+then a single LANCZOS resize.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from image_convert import PRESETS, convert_image  # noqa: E402
+
+
+def make_sample(path: str, size=(6000, 4000)):
+    """Synthetic photo-sized JPEG with enough detail to be realistic to decode"""
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for x in range(0, size[0], 40):
+        draw.line([(x, 0), (size[0] - x, size[1])], fill=(x % 255, 80, 160), width=3)
+    img.save(path, quality=90)
+
+
+def legacy_convert(input_path: str, output_path: str, width: int, quality: int):
+    img = Image.open(input_path)
+    orig_w, orig_h = img.size
+    img = img.resize((width, int(orig_h * width / orig_w)), Image.LANCZOS)
+    img.save(output_path, quality=quality, optimize=True)
+
+
+def measure(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image", nargs="?", help="JPEG to benchmark (default: synthetic 24 MP image)")
+    parser.add_argument("--width", type=int, default=400)
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.image
+        if not source:
+            source = os.path.join(tmp, "sample.jpg")
+            make_sample(source)
+
+        with Image.open(source) as img:
+            print(f"Source: {source} ({img.size[0]}x{img.size[1]}), target width {args.width}, median of {args.runs}")
+
+        output = os.path.join(tmp, "out.jpg")
+        baseline = measure(lambda: legacy_convert(source, output, args.width, args.quality), args.runs)
+        print(f"{'legacy':>10}: {baseline:8.1f} ms")
+
+        for preset in PRESETS:
+            elapsed = measure(
+                lambda: convert_image(source, output, width=args.width, quality=args.quality, preset=preset),
+                args.runs
+            )
+            print(f"{preset:>10}: {elapsed:8.1f} ms  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
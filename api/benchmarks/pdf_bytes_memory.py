@@ -0,0 +1,127 @@
+"""
+Benchmark: PDF byte paths, temp files vs. in-memory streams
+
+Usage:
+    python benchmarks/pdf_bytes_memory.py                  # synthetic 40-page PDF
+    python benchmarks/pdf_bytes_memory.py report.pdf --runs 3
+
+Peak memory is measured with tracemalloc, so it counts Python-side
+allocations (payload copies, buffers) but not MuPDF's own heap. The
+"legacy" rows are the original byte paths: write the PDF to a temp file,
+convert into another temp file and read the result back.
+"""
+
+import argparse
+import gc
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fitz  # noqa: E402
+
+
+def make_sample(path: str, pages: int = 40):
+    """Text pages with a bordered table every fourth page"""
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        if n % 4 == 3:
+            for r in range(12):
+                for c in range(5):
+                    rect = fitz.Rect(60 + c * 95, 80 + r * 24, 155 + c * 95, 104 + r * 24)
+                    page.draw_rect(rect)
+                    page.insert_text((rect.x0 + 4, rect.y1 - 7), f"r{r}c{c}", fontsize=9)
+        else:
+            page.insert_textbox(fitz.Rect(72, 72, 540, 720), ("Lorem ipsum dolor sit amet. " * 12 + "\n\n") * 8, fontsize=11)
+    doc.save(path)
+
+
+def legacy_word(pdf_bytes: bytes) -> bytes:
+    from pdf2docx import Converter
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+        f.write(pdf_bytes)
+        temp_pdf = f.name
+    temp_docx = temp_pdf.replace('.pdf', '.docx')
+    try:
+        cv = Converter(temp_pdf)
+        cv.convert(temp_docx, start=0, end=None)
+        cv.close()
+        with open(temp_docx, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(temp_pdf)
+        os.remove(temp_docx)
+
+
+def legacy_excel(pdf_bytes: bytes) -> bytes:
+    from pdf_to_excel import PDFToExcelConverter
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+        f.write(pdf_bytes)
+        temp_pdf = f.name
+    temp_xlsx = temp_pdf.replace('.pdf', '.xlsx')
+    try:
+        PDFToExcelConverter(temp_pdf).convert(temp_xlsx)
+        with open(temp_xlsx, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(temp_pdf)
+        os.remove(temp_xlsx)
+
+
+def measure(fn, runs: int):
+    """(median ms, max tracemalloc peak MB)"""
+    timings, peaks = [], []
+    for _ in range(runs):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(timings) * 1000, max(peaks) / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", help="PDF to benchmark (default: synthetic 40-page PDF)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.pdf
+        if not source:
+            source = os.path.join(tmp, "sample.pdf")
+            make_sample(source)
+        pdf_bytes = Path(source).read_bytes()
+        print(f"Source: {source} ({len(pdf_bytes) / 1024:.0f} KB), {args.runs} runs")
+
+        from pdf_to_word import convert_pdf_bytes_to_word_bytes
+        cases = [
+            ("word legacy", lambda: legacy_word(pdf_bytes)),
+            ("word exact", lambda: convert_pdf_bytes_to_word_bytes(pdf_bytes, mode="exact")),
+            ("word auto", lambda: convert_pdf_bytes_to_word_bytes(pdf_bytes, mode="auto")),
+        ]
+        try:
+            from pdf_to_excel import convert_pdf_bytes_to_excel_bytes
+            cases += [
+                ("excel legacy", lambda: legacy_excel(pdf_bytes)),
+                ("excel bytes", lambda: convert_pdf_bytes_to_excel_bytes(pdf_bytes)),
+            ]
+        except ImportError as e:
+            print(f"Skipping Excel ({e})")
+
+        for name, fn in cases:
+            elapsed, peak = measure(fn, args.runs)
+            print(f"{name:>13}: {elapsed:8.1f} ms  peak {peak:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
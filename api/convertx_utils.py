@@ -17,13 +17,21 @@ Usage:
 """
 
 import os
+import gzip
 import time
+import shutil
 import requests
+import urllib3
 from pathlib import Path
 from typing import Optional, Dict, Any, Union, BinaryIO
 from dataclasses import dataclass
 from enum import Enum
 
+try:
+    import zstandard
+except ImportError:  # zstd downloads are optional - gzip is always accepted
+    zstandard = None
+
 
 class ConversionStatus(str, Enum):
     PENDING = "pending"
@@ -158,6 +166,124 @@ class ConvertX:
             download_url=data.get("download_url")
         )
     
+    def upload_resumable(
+        self,
+        file: Union[str, Path],
+        chunk_size: int = 8 * 1024 * 1024,
+        upload_id: Optional[str] = None,
+        retries: int = 3
+    ) -> str:
+        """
+        Upload a file in chunks that survive dropped connections.
+        
+        Args:
+            file: Path to the file to upload
+            chunk_size: Bytes sent per PATCH request
+            upload_id: Resume an upload started earlier (e.g. by another process)
+            retries: Consecutive failed chunks tolerated before giving up
+        
+        Returns:
+            The upload ID, to pass to convert_resumable()/finalize
+        """
+        file_path = Path(file)
+        size = file_path.stat().st_size
+        
+        if upload_id is None:
+            response = self._session.post(
+                f"{self.base_url}/uploads",
+                json={"filename": file_path.name, "size": size},
+                timeout=30
+            )
+            if response.status_code != 201:
+                raise ConvertXError(f"Failed to create upload: {response.text}")
+            upload_id = response.json()["upload_id"]
+        
+        url = f"{self.base_url}/uploads/{upload_id}"
+        failures = 0
+        offset = self._upload_offset(url)
+        
+        with open(file_path, "rb") as f:
+            while offset < size:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                try:
+                    response = self._session.patch(
+                        url,
+                        data=chunk,
+                        headers={
+                            "Upload-Offset": str(offset),
+                            "Content-Type": "application/offset+octet-stream"
+                        },
+                        timeout=self.timeout
+                    )
+                except requests.exceptions.RequestException:
+                    response = None
+                
+                if response is not None and response.status_code == 204:
+                    offset = int(response.headers["Upload-Offset"])
+                    failures = 0
+                    continue
+                
+                if response is not None and response.status_code not in (409, 500, 502, 503, 504):
+                    raise ConvertXError(f"Upload failed: {response.text}")
+                
+                failures += 1
+                if failures > retries:
+                    raise ConvertXError(f"Upload failed after {retries} retries at offset {offset}")
+                # Part of the chunk may have landed - ask the server where to continue
+                offset = self._upload_offset(url)
+        
+        return upload_id
+    
+    def _upload_offset(self, upload_url: str) -> int:
+        response = self._session.head(upload_url, timeout=30)
+        if response.status_code == 404:
+            raise ConvertXError("Upload not found or expired")
+        if response.status_code != 200:
+            raise ConvertXError(f"Failed to query upload offset: HTTP {response.status_code}")
+        return int(response.headers["Upload-Offset"])
+    
+    def convert_resumable(
+        self,
+        file: Union[str, Path],
+        target_format: str,
+        source_format: Optional[str] = None,
+        chunk_size: int = 8 * 1024 * 1024,
+        upload_id: Optional[str] = None,
+        **options
+    ) -> ConversionJob:
+        """
+        Upload a large file with resumable chunks, then start an async conversion.
+        
+        Example:
+            job = client.convert_resumable("big.pdf", "docx")
+            client.wait_for_completion(job.job_id)
+        """
+        upload_id = self.upload_resumable(file, chunk_size=chunk_size, upload_id=upload_id)
+        
+        params = {k: v for k, v in options.items() if v is not None}
+        if source_format:
+            params["source_format"] = source_format
+        
+        response = self._session.post(
+            f"{self.base_url}/uploads/{upload_id}/convert/{target_format}",
+            params=params,
+            timeout=self.timeout
+        )
+        
+        if response.status_code != 200:
+            raise ConversionError(f"Conversion failed: {response.text}")
+        
+        data = response.json()
+        return ConversionJob(
+            job_id=data["job_id"],
+            status=ConversionStatus(data["status"]),
+            source_format=data["source_format"],
+            target_format=data["target_format"],
+            created_at=data["created_at"],
+            download_url=data.get("download_url")
+        )
+    
     def convert_sync(
         self,
         file: Union[str, Path, BinaryIO],
@@ -309,33 +435,100 @@ class ConvertX:
     def download(
         self,
         job_id: str,
-        output_path: Union[str, Path]
+        output_path: Union[str, Path],
+        resume: bool = True,
+        retries: int = 3
     ) -> Path:
         """
         Download the converted file.
         
+        Data is written to "<output_path>.part" first. If the connection
+        drops, the next attempt (or a later call) resumes from the bytes
+        already on disk using a Range request guarded by If-Range, so a
+        result that changed on the server is re-downloaded from scratch.
+        Text-like results are transferred compressed; the encoded bytes are
+        stored as-is (so ranges stay valid) and decoded once at the end.
+        
         Args:
             job_id: The job ID of a completed conversion
             output_path: Where to save the file
+            resume: Resume a previous partial download if one exists
+            retries: Extra attempts after a dropped connection
         
         Returns:
             Path to the downloaded file
         """
         url = f"{self.base_url}/download/{job_id}"
-        response = self._session.get(url, timeout=self.timeout, stream=True)
+        output_path = Path(output_path)
+        part_path = output_path.with_name(output_path.name + ".part")
+        etag_path = output_path.with_name(output_path.name + ".part.etag")
         
-        if response.status_code == 400:
-            raise ConvertXError("Job is not complete yet")
+        if not resume:
+            part_path.unlink(missing_ok=True)
+            etag_path.unlink(missing_ok=True)
         
-        if response.status_code != 200:
-            raise ConvertXError(f"Download failed: {response.text}")
+        accept_encoding = "zstd, gzip" if zstandard else "gzip"
         
-        output_path = Path(output_path)
-        with open(output_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        for attempt in range(retries + 1):
+            headers = {"Accept-Encoding": accept_encoding}
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            if offset and etag_path.exists():
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = etag_path.read_text().split("\n")[0]
+            
+            try:
+                response = self._session.get(url, headers=headers, timeout=self.timeout, stream=True)
+                
+                if response.status_code == 400:
+                    raise ConvertXError("Job is not complete yet")
+                
+                if response.status_code == 416:
+                    # Stale partial file larger than the result - start over
+                    part_path.unlink(missing_ok=True)
+                    etag_path.unlink(missing_ok=True)
+                    continue
+                
+                if response.status_code not in (200, 206):
+                    raise ConvertXError(f"Download failed: {response.text}")
+                
+                etag = response.headers.get("ETag")
+                encoding = response.headers.get("Content-Encoding", "")
+                if etag:
+                    etag_path.write_text(f"{etag}\n{encoding}")
+                
+                # 206 continues the partial file, 200 means a full (possibly new) body
+                mode = "ab" if response.status_code == 206 else "wb"
+                with open(part_path, mode) as f:
+                    for chunk in response.raw.stream(65536, decode_content=False):
+                        f.write(chunk)
+            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError):
+                # Reading response.raw directly, a connection dropped mid-body
+                # surfaces as urllib3's ProtocolError/ReadTimeoutError, not a
+                # requests exception
+                if attempt == retries:
+                    raise
+                continue
+            
+            if etag_path.exists():
+                encoding = etag_path.read_text().partition("\n")[2]
+            self._finish_download(part_path, output_path, encoding)
+            etag_path.unlink(missing_ok=True)
+            return output_path
         
-        return output_path
+        raise ConvertXError(f"Download failed after {retries + 1} attempts")
+    
+    def _finish_download(self, part_path: Path, output_path: Path, encoding: str):
+        """Decode a completed .part file into output_path"""
+        if encoding == "gzip":
+            with gzip.open(part_path, "rb") as src, open(output_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 65536)
+            part_path.unlink()
+        elif encoding == "zstd":
+            with open(part_path, "rb") as src, open(output_path, "wb") as dst:
+                zstandard.ZstdDecompressor().copy_stream(src, dst)
+            part_path.unlink()
+        else:
+            part_path.replace(output_path)
     
     def get_supported_conversions(self) -> list:
         """Get list of supported format conversions"""
@@ -0,0 +1,208 @@
+"""
+Download responses for converted files
+
+Shared by the legacy routes and the isolated routers so every result is
+served the same way:
+- Correct media type per output format (instead of application/octet-stream)
+- Strong ETag derived from the content hash
+- If-None-Match -> 304 Not Modified
+- Byte ranges and If-Range (handled by Starlette's FileResponse from 0.39 on, which also
+  uses zero-copy `http.response.pathsend` when the ASGI server supports it)
+- Accept-Encoding negotiation for text-like outputs, served from gzip/zstd
+  sidecars written once by precompress() when the conversion finishes
+"""
+
+import asyncio
+import gzip
+import hashlib
+import shutil
+import mimetypes
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional - gzip is always available
+    zstandard = None
+
+
+MEDIA_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".doc": "application/msword",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".xls": "application/vnd.ms-excel",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".odt": "application/vnd.oasis.opendocument.text",
+    ".rtf": "application/rtf",
+    ".txt": "text/plain; charset=utf-8",
+    ".csv": "text/csv; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".md": "text/markdown; charset=utf-8",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".bmp": "image/bmp",
+    ".tiff": "image/tiff",
+    ".svg": "image/svg+xml",
+    ".zip": "application/zip",
+}
+
+# Converted files are immutable, so clients may cache but must revalidate
+CACHE_CONTROL = "private, no-cache"
+
+# Outputs worth compressing, and the smallest size worth the round trip
+COMPRESSIBLE_SUFFIXES = {".txt", ".csv", ".html", ".md", ".json", ".xml", ".svg"}
+MIN_COMPRESS_SIZE = 1024
+
+# Content-Encoding -> sidecar suffix, in server preference order
+ENCODINGS = {"zstd": ".zst", "gzip": ".gz"}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+ETAG_CACHE_SIZE = 4096
+
+# LRU of (path, size, mtime_ns) -> etag, so a file is only hashed once
+_etag_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def media_type_for(path: Path) -> str:
+    """Media type for a converted file, based on its extension"""
+    suffix = Path(path).suffix.lower()
+    return MEDIA_TYPES.get(suffix) or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+
+def content_etag(path: Path) -> str:
+    """Strong ETag from the SHA-256 of the file content (blocking, cached)"""
+    stat = Path(path).stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+
+    with _etag_lock:
+        cached = _etag_cache.get(key)
+        if cached:
+            _etag_cache.move_to_end(key)
+            return cached
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()[:32]}"'
+
+    with _etag_lock:
+        _etag_cache[key] = etag
+        while len(_etag_cache) > ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return etag
+
+
+def is_compressible(path: Path) -> bool:
+    return Path(path).suffix.lower() in COMPRESSIBLE_SUFFIXES
+
+
+def precompress(path: Path):
+    """
+    Write gzip (and zstd, if installed) sidecars next to a text-like output
+    so downloads never compress per request. Blocking - run in a thread.
+    Sidecars that do not save space are discarded.
+    """
+    path = Path(path)
+    if not is_compressible(path) or path.stat().st_size < MIN_COMPRESS_SIZE:
+        return
+
+    gz_path = path.with_name(path.name + ENCODINGS["gzip"])
+    with open(path, "rb") as src, gzip.GzipFile(gz_path, "wb", compresslevel=6, mtime=0) as dst:
+        shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+
+    written = [gz_path]
+    if zstandard is not None:
+        zst_path = path.with_name(path.name + ENCODINGS["zstd"])
+        with open(path, "rb") as src, open(zst_path, "wb") as dst:
+            zstandard.ZstdCompressor(level=10).copy_stream(src, dst)
+        written.append(zst_path)
+
+    size = path.stat().st_size
+    for sidecar in written:
+        if sidecar.stat().st_size >= size:
+            sidecar.unlink()
+
+
+def _accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}"""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(path: Path, accept_encoding: Optional[str]) -> Tuple[Path, Optional[str]]:
+    """Pick the best precompressed sidecar the client accepts, else the file itself"""
+    accepted = _accepted_encodings(accept_encoding)
+    best, best_q = None, 0.0
+    for encoding, suffix in ENCODINGS.items():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        sidecar = path.with_name(path.name + suffix)
+        if q > best_q and sidecar.exists():
+            best, best_q = (sidecar, encoding), q
+    return best if best else (path, None)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+async def file_download(
+    request: Request,
+    path: Path,
+    filename: Optional[str] = None,
+    media_type: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serve a converted file with validators, conditional GET and Range support.
+    """
+    path = Path(path)
+    response_headers = {"Cache-Control": CACHE_CONTROL, **(headers or {})}
+
+    body_path, encoding = path, None
+    if is_compressible(path):
+        body_path, encoding = negotiate_encoding(path, request.headers.get("accept-encoding"))
+        response_headers["Vary"] = "Accept-Encoding"
+
+    etag = await asyncio.to_thread(content_etag, body_path)
+    response_headers["ETag"] = etag
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=response_headers)
+
+    return FileResponse(
+        body_path,
+        filename=filename or path.name,
+        media_type=media_type or media_type_for(path),
+        headers=response_headers
+    )
@@ -10,32 +10,42 @@ import tempfile
 import shutil
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, File, UploadFile, HTTPException, Request, Query
 import aiofiles
 
+from workspace import Workspace
+from downloads import file_download
+from workbook_pdf import sheets_to_pdf, profile_arg, pdf_export_target
+
 
 # ============== Configuration ==============
 UPLOAD_DIR = Path(tempfile.gettempdir()) / "excel_to_pdf_uploads"
 OUTPUT_DIR = Path(tempfile.gettempdir()) / "excel_to_pdf_outputs"
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 TIMEOUT = 180  # 3 minutes
+MAX_PREVIEW_PAGES = 20
 
 # Create directories
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Job directories are bucketed by hour so retention can drop whole buckets
+workspace = Workspace(UPLOAD_DIR, OUTPUT_DIR)
+
 
 # ============== Router ==============
 router = APIRouter(prefix="/excel-to-pdf", tags=["Excel to PDF"])
 
 
 # ============== Conversion Function ==============
-async def convert_with_libreoffice(input_file: Path, output_dir: Path) -> Path:
+async def convert_with_libreoffice(input_file: Path, output_dir: Path, profile: Optional[Path] = None,
+                                   page_range: Optional[str] = None) -> Path:
     """
     Convert Excel spreadsheet to PDF using LibreOffice.
-    Simple, standalone implementation.
+    Simple, standalone implementation. Pass a profile directory to run
+    alongside other instances; a page range ("1-3") limits the export.
     """
 
     # Build command
@@ -45,10 +55,12 @@ async def convert_with_libreoffice(input_file: Path, output_dir: Path) -> Path:
         "--nofirststartwizard",
         "--norestore",
         "--nologo",
-        "--convert-to", "pdf",
+        "--convert-to", pdf_export_target(input_file, page_range),
         "--outdir", str(output_dir),
         str(input_file)
     ]
+    if profile is not None:
+        cmd.insert(1, profile_arg(profile))
 
     # Environment setup
     env = os.environ.copy()
@@ -111,17 +123,24 @@ async def info():
     return {
         "service": "Excel to PDF",
         "accepts": [".xlsx", ".xls"],
-        "returns": ".pdf"
+        "returns": ".pdf",
+        "split_sheets": "xlsx only"
     }
 
 
 @router.post("/convert")
-async def convert(file: UploadFile = File(...)):
+async def convert(
+    request: Request,
+    file: UploadFile = File(...),
+    split_sheets: bool = Query(False, description="Convert sheets in parallel LibreOffice instances"),
+    preview: Optional[int] = Query(None, ge=1, le=MAX_PREVIEW_PAGES, description="Convert only the first N pages")
+):
     """
     Convert Excel spreadsheet to PDF.
 
     Accepts: .xlsx, .xls files
-    Returns: PDF file
+    Returns: PDF file (with split_sheets, one bookmark per sheet; with
+    preview=N, only the first N pages)
     """
 
     # Get filename
@@ -154,11 +173,7 @@ async def convert(file: UploadFile = File(...)):
 
     # Create job directories
     job_id = str(uuid.uuid4())
-    job_upload_dir = UPLOAD_DIR / job_id
-    job_output_dir = OUTPUT_DIR / job_id
-
-    job_upload_dir.mkdir(parents=True, exist_ok=True)
-    job_output_dir.mkdir(parents=True, exist_ok=True)
+    job_upload_dir, job_output_dir = workspace.create(job_id)
 
     input_path = job_upload_dir / filename
 
@@ -170,15 +185,19 @@ async def convert(file: UploadFile = File(...)):
 
         print(f"[Excel→PDF] Processing: {filename} ({size} bytes)")
 
-        # Convert
-        output_path = await convert_with_libreoffice(input_path, job_output_dir)
+        # Convert, sheet by sheet for large workbooks when asked
+        # (a preview exports only the first pages, so splitting would not save anything)
+        output_path = None
+        if split_sheets and not preview:
+            output_path = await sheets_to_pdf(input_path, job_output_dir, convert_with_libreoffice)
+        if output_path is None:
+            output_path = await convert_with_libreoffice(
+                input_path, job_output_dir, page_range=f"1-{preview}" if preview else None
+            )
 
         # Return the PDF
-        return FileResponse(
-            path=str(output_path),
-            filename=output_path.name,
-            media_type="application/pdf"
-        )
+        headers = {"X-Preview-Pages": str(preview)} if preview else None
+        return await file_download(request, output_path, media_type="application/pdf", headers=headers)
 
     except Exception as e:
         print(f"[Excel→PDF] ERROR: {str(e)}")
@@ -0,0 +1,201 @@
+"""
+Image API - Isolated endpoints for image processing
+Responsive image sets are produced from a single decode (see image_convert.py)
+"""
+
+import json
+import uuid
+import asyncio
+import zipfile
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, File, Form, UploadFile, HTTPException, Query, Request
+import aiofiles
+
+from workspace import Workspace
+from downloads import file_download
+from image_convert import make_renditions, get_executor, PRESETS, DEFAULT_PRESET, EFFORTS, DEFAULT_EFFORT
+
+
+# ============== Configuration ==============
+class ImageConfig:
+    UPLOAD_DIR = Path(tempfile.gettempdir()) / "image_uploads"
+    OUTPUT_DIR = Path(tempfile.gettempdir()) / "image_outputs"
+    MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+    MAX_RENDITIONS = 32
+    MAX_WIDTH = 8192
+    INPUT_FORMATS = {"png", "jpg", "jpeg", "webp", "gif", "bmp", "tiff", "tif"}
+    OUTPUT_FORMATS = {"png", "jpg", "webp"}
+
+    @classmethod
+    def ensure_dirs(cls):
+        cls.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        cls.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+
+# Initialize directories
+ImageConfig.ensure_dirs()
+
+# Job directories are bucketed by hour so retention can drop whole buckets
+workspace = Workspace(ImageConfig.UPLOAD_DIR, ImageConfig.OUTPUT_DIR)
+
+
+# ============== Router ==============
+router = APIRouter(prefix="/image", tags=["Image"])
+
+
+# ============== Helpers ==============
+def parse_renditions(
+    renditions: Optional[str],
+    widths: Optional[str],
+    formats: str,
+    quality: int
+) -> List[Dict]:
+    """
+    Build the rendition list, either from an explicit JSON list
+    ([{"width": 640, "format": "webp", "quality": 75}, ...]) or as the cross
+    product of widths x formats at one quality.
+    """
+    try:
+        if renditions:
+            requested = [
+                {"width": int(r["width"]), "format": str(r["format"]).lower(), "quality": int(r.get("quality", quality))}
+                for r in json.loads(renditions)
+            ]
+        elif widths:
+            requested = [
+                {"width": int(w), "format": f.strip().lower(), "quality": quality}
+                for w in widths.split(",") if w.strip()
+                for f in formats.split(",") if f.strip()
+            ]
+        else:
+            raise HTTPException(status_code=400, detail="Provide widths (e.g. 320,640,1280) or a renditions list")
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rendition spec: {str(e)}")
+
+    if not requested or len(requested) > ImageConfig.MAX_RENDITIONS:
+        raise HTTPException(status_code=400, detail=f"Request between 1 and {ImageConfig.MAX_RENDITIONS} renditions")
+
+    for r in requested:
+        if r["format"] == "jpeg":
+            r["format"] = "jpg"
+        if r["format"] not in ImageConfig.OUTPUT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported output format '{r['format']}'")
+        if not 1 <= r["width"] <= ImageConfig.MAX_WIDTH or not 1 <= r["quality"] <= 100:
+            raise HTTPException(status_code=400, detail=f"Invalid width or quality in {r}")
+    return requested
+
+
+def write_renditions_zip(input_path: Path, zip_path: Path, requested: List[Dict], preset: str, effort: str) -> List[Dict]:
+    """Render every rendition from one decode into a stored ZIP with a manifest"""
+    stem = input_path.stem
+    manifest, taken = [], set()
+
+    # Name by quality too when one format is requested at several qualities
+    qualities: Dict[str, set] = {}
+    for r in requested:
+        qualities.setdefault(r["format"], set()).add(r["quality"])
+
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for rendition, data in make_renditions(str(input_path), requested, preset, effort):
+            key = (rendition["width"], rendition["format"], rendition["quality"])
+            if key in taken:
+                continue  # clamped to the same size as another rendition
+            taken.add(key)
+
+            suffix = f"-q{rendition['quality']}" if len(qualities[rendition["format"]]) > 1 else ""
+            name = f"{stem}-{rendition['width']}w{suffix}.{rendition['format']}"
+            zf.writestr(name, data)
+            manifest.append({"name": name, **rendition, "bytes": len(data)})
+
+        zf.writestr("manifest.json", json.dumps({"renditions": manifest}, indent=2))
+    return manifest
+
+
+# ============== API Endpoints ==============
+@router.get("/health")
+async def health_check():
+    """Health check for image service"""
+    return {
+        "service": "image",
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@router.post("/renditions")
+async def create_renditions(
+    request: Request,
+    file: UploadFile = File(...),
+    widths: Optional[str] = Query(None, description="Comma-separated widths, e.g. 320,640,1280"),
+    formats: str = Query("webp,jpg", description="Comma-separated output formats"),
+    quality: int = Query(80, ge=1, le=100),
+    preset: str = Query(DEFAULT_PRESET, pattern="^(fast|balanced|quality)$"),
+    effort: str = Query(DEFAULT_EFFORT, pattern="^(fast|balanced|small)$"),
+    renditions: Optional[str] = Form(None, description='JSON list, e.g. [{"width": 640, "format": "webp", "quality": 75}]'),
+):
+    """
+    Generate a responsive image set.
+
+    - Accepts: png, jpg, webp, gif, bmp, tiff
+    - Returns: ZIP of renditions plus manifest.json (name, width, height, format, quality, bytes, encode_ms)
+    - The source is decoded once; sizes cascade from largest to smallest
+    """
+    filename = file.filename or "image.png"
+    ext = filename.lower().split('.')[-1]
+
+    if ext not in ImageConfig.INPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid file type '{ext}'")
+
+    requested = parse_renditions(renditions, widths, formats, quality)
+
+    file.file.seek(0, 2)
+    file_size = file.file.tell()
+    file.file.seek(0)
+
+    if file_size > ImageConfig.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {ImageConfig.MAX_FILE_SIZE / (1024*1024):.0f}MB"
+        )
+
+    job_id = str(uuid.uuid4())
+    upload_dir, output_dir = workspace.create(job_id)
+
+    input_path = upload_dir / Path(filename).name
+    zip_path = output_dir / f"{input_path.stem}_renditions.zip"
+
+    try:
+        async with aiofiles.open(input_path, 'wb') as out_file:
+            content = await file.read()
+            await out_file.write(content)
+
+        print(f"[Image] {len(requested)} renditions of {filename} (job: {job_id})")
+
+        await asyncio.get_running_loop().run_in_executor(
+            get_executor(), write_renditions_zip, input_path, zip_path, requested, preset, effort
+        )
+        return await file_download(request, zip_path, headers={"X-Job-ID": job_id})
+
+    except Exception as e:
+        print(f"[Image] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Rendition failed: {str(e)}")
+
+
+@router.get("/info")
+async def get_info():
+    """Get information about this service"""
+    return {
+        "service": "Image Renditions",
+        "version": "1.0.0",
+        "description": "Builds responsive image sets from a single decode",
+        "accepted_formats": sorted(ImageConfig.INPUT_FORMATS),
+        "output_formats": sorted(ImageConfig.OUTPUT_FORMATS),
+        "presets": list(PRESETS),
+        "efforts": list(EFFORTS),
+        "max_renditions": ImageConfig.MAX_RENDITIONS,
+        "max_file_size_mb": ImageConfig.MAX_FILE_SIZE / (1024 * 1024)
+    }
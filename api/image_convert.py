@@ -0,0 +1,546 @@
+"""
+Image Conversion
+Pillow-based conversion between raster formats.
+
+Downscaling is done as cheaply as the requested quality allows:
+- JPEG sources are decoded in draft mode, so the DCT decoder itself scales
+  by 1/2, 1/4 or 1/8 and a 400 px thumbnail of a 24 MP photo never decodes
+  all 24 MP
+- Remaining large reductions use Image.reduce (box averaging over whole
+  pixel blocks) before the final resampling filter (reducing_gap)
+
+The API runs conversions on a shared thread pool (Pillow releases the GIL
+while decoding, resampling and encoding); inputs above a pixel threshold
+are left to a subprocess so their memory goes back to the OS afterwards.
+
+Presets trade speed for resampling quality:
+- fast:     draft decode close to the target, bilinear resampling
+- balanced: draft decode with headroom, Lanczos after a reducing gap
+- quality:  full decode, Lanczos on the full-resolution image
+
+Effort levels trade encode time for output size, per target format:
+- fast:     PNG zlib level 1, baseline JPEG, WebP method 0
+- balanced: PNG zlib level 6, optimized JPEG, WebP method 4
+- small:    PNG optimize (level 9), optimized progressive JPEG, WebP method 6
+
+Very large images are never decoded whole:
+- Dimensions are checked against a pixel limit from the header alone, so
+  decompression bombs are rejected before any pixel data is read. Pillow's
+  own, lower bomb limit is only lifted to it while a conversion runs, and
+  restored once no conversion needs it, so other image code in the process
+  keeps Pillow's default
+- Above the in-memory budget, uncompressed TIFF/BMP sources are read in
+  bands of rows straight from the file. Format conversion streams each band
+  into a PNG writer; resizing reduces each band by a whole factor first.
+  Compressed sources over the budget cannot be banded and are rejected.
+
+Author: ToolGlid
+"""
+
+import io
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+
+PRESETS: Dict[str, Dict] = {
+    "fast": {"draft_gap": 1.0, "resample": Image.BILINEAR, "reducing_gap": 2.0},
+    "balanced": {"draft_gap": 2.0, "resample": Image.LANCZOS, "reducing_gap": 3.0},
+    "quality": {"draft_gap": None, "resample": Image.LANCZOS, "reducing_gap": None},
+}
+DEFAULT_PRESET = "balanced"
+
+EFFORTS: Dict[str, Dict[str, Dict]] = {
+    "fast": {
+        "PNG": {"compress_level": 1},
+        "JPEG": {},
+        "WEBP": {"method": 0},
+    },
+    "balanced": {
+        "PNG": {"compress_level": 6},
+        "JPEG": {"optimize": True},
+        "WEBP": {"method": 4},
+    },
+    "small": {
+        "PNG": {"optimize": True},
+        "JPEG": {"optimize": True, "progressive": True},
+        "WEBP": {"method": 6},
+        "GIF": {"optimize": True},
+    },
+}
+DEFAULT_EFFORT = "balanced"
+
+# Output formats without an alpha channel
+OPAQUE_FORMATS = {"JPEG", "JPG", "BMP"}
+
+# Extension -> Pillow format name, where they differ
+PIL_FORMATS = {"JPG": "JPEG", "TIF": "TIFF"}
+
+# Pixel budgets
+MAX_IMAGE_PIXELS = int(os.environ.get("IMAGE_MAX_PIXELS", 600_000_000))      # reject above this
+MEMORY_PIXEL_BUDGET = int(os.environ.get("IMAGE_MEMORY_PIXELS", 128_000_000))  # decode whole below this
+BAND_PIXEL_BUDGET = int(os.environ.get("IMAGE_BAND_PIXELS", 8_000_000))        # pixels per band
+
+# In-process engine
+THREAD_WORKERS = int(os.environ.get("IMAGE_THREADS", min(8, os.cpu_count() or 1)))
+INPROCESS_MAX_PIXELS = int(os.environ.get("IMAGE_INPROCESS_MAX_PIXELS", 50_000_000))
+
+# Bits per pixel of the raw layouts that can be read in bands
+RAW_BITS = {
+    "1": 1, "L": 8, "P": 8, "LA": 16, "PA": 16, "I;16": 16, "I;16B": 16,
+    "RGB": 24, "BGR": 24, "RGBA": 32, "BGRA": 32, "RGBX": 32, "BGRX": 32, "CMYK": 32,
+}
+
+
+def target_size(size: Tuple[int, int], width: int = 0, height: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    Output size for a resize request. Both dimensions stretch to an exact
+    size; one dimension keeps the aspect ratio. None means no resize.
+    """
+    orig_w, orig_h = size
+    if width and height:
+        return width, height
+    if width:
+        return width, max(1, int(orig_h * width / orig_w))
+    if height:
+        return max(1, int(orig_w * height / orig_h)), height
+    return None
+
+
+def open_image(
+    input_path: str,
+    width: int = 0,
+    height: int = 0,
+    preset: str = DEFAULT_PRESET
+) -> Tuple[Image.Image, Optional[Tuple[int, int]]]:
+    """
+    Open an image lazily and return it with its output size. When resizing,
+    the decoder is asked to downscale first (draft() only applies to JPEG
+    and is a no-op for other formats).
+    """
+    img = Image.open(input_path)
+    size = target_size(img.size, width, height)
+    draft_gap = PRESETS[preset]["draft_gap"]
+    if size and draft_gap:
+        img.draft(img.mode, (int(size[0] * draft_gap), int(size[1] * draft_gap)))
+    return img, size
+
+
+def resize_image(img: Image.Image, size: Tuple[int, int], preset: str = DEFAULT_PRESET) -> Image.Image:
+    """Resize, reducing by whole-pixel blocks first when the preset allows it"""
+    if img.size == size:
+        return img
+    settings = PRESETS[preset]
+    return img.resize(size, settings["resample"], reducing_gap=settings["reducing_gap"])
+
+
+def flatten_alpha(img: Image.Image, target_format: str, background=(255, 255, 255)) -> Image.Image:
+    """Composite transparent images onto a solid background for formats without alpha"""
+    if target_format not in OPAQUE_FORMATS:
+        return img
+
+    if (img.mode == "P" and "transparency" in img.info) or img.mode in ("LA", "PA"):
+        img = img.convert("RGBA")
+    if img.mode == "RGBA":
+        flat = Image.new("RGB", img.size, background)
+        flat.paste(img, mask=img.split()[3])
+        return flat
+    if img.mode not in ("RGB", "L", "CMYK"):
+        return img.convert("RGB")
+    return img
+
+
+def save_image(img: Image.Image, output, target_format: str, quality: int = 85, effort: str = DEFAULT_EFFORT) -> int:
+    """
+    Encode to the target format (output is a path or a binary file object).
+    Returns the encode time in milliseconds.
+    """
+    pil_format = PIL_FORMATS.get(target_format, target_format)
+    params = dict(EFFORTS[effort].get(pil_format, {}))
+    if pil_format in ("JPEG", "WEBP"):
+        params["quality"] = quality
+
+    img.load()  # decode (if still lazy) outside the timed encode
+    started = time.perf_counter()
+    img.save(output, pil_format, **params)
+    return int((time.perf_counter() - started) * 1000)
+
+
+def check_options(preset: str, effort: str):
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown preset '{preset}'. Use one of: {', '.join(PRESETS)}")
+    if effort not in EFFORTS:
+        raise ValueError(f"Unknown effort '{effort}'. Use one of: {', '.join(EFFORTS)}")
+
+
+# ============== In-process engine ==============
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Shared, bounded pool for in-process image work, created on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix="image")
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def fits_in_process(input_path: str, max_pixels: int = INPROCESS_MAX_PIXELS) -> bool:
+    """
+    True if the image is small enough to convert on the shared pool. Unreadable
+    files return False so the isolated path reports the error.
+    """
+    try:
+        with Image.open(input_path) as img:
+            return img.width * img.height <= max_pixels
+    except Exception:
+        return False
+
+
+# ============== Large images ==============
+def check_image_size(img: Image.Image, max_pixels: int = MAX_IMAGE_PIXELS):
+    """Reject decompression bombs using the header dimensions only"""
+    pixels = img.width * img.height
+    if pixels > max_pixels:
+        raise Image.DecompressionBombError(
+            f"Image is {img.width}x{img.height} ({pixels:,} pixels), "
+            f"over the {max_pixels:,} pixel limit"
+        )
+
+
+_limits: List[int] = []
+_limits_lock = threading.Lock()
+_pillow_limit = Image.MAX_IMAGE_PIXELS
+
+
+@contextmanager
+def pixel_limit(max_pixels: int = MAX_IMAGE_PIXELS):
+    """
+    Let Pillow open images up to max_pixels while the block runs (its own
+    check raises at twice its default, ~179 MP); lower limits are left to
+    check_image_size. Nested and concurrent blocks share the largest limit,
+    and the default is back once all have left.
+    """
+    with _limits_lock:
+        _limits.append(max_pixels)
+        Image.MAX_IMAGE_PIXELS = max(_limits + [_pillow_limit])
+    try:
+        yield
+    finally:
+        with _limits_lock:
+            _limits.remove(max_pixels)
+            Image.MAX_IMAGE_PIXELS = max(_limits + [_pillow_limit])
+
+
+def can_read_bands(img: Image.Image) -> bool:
+    """True if every tile is uncompressed raw data we can read row ranges from"""
+    return bool(img.tile) and all(
+        tile[0] == "raw" and tile[3][0] in RAW_BITS and len(tile[3]) >= 2
+        for tile in img.tile
+    )
+
+
+def header_palette(img: Image.Image) -> Optional[List[int]]:
+    """RGB palette from the header (Image.getpalette() would decode every pixel)"""
+    if img.palette is None:
+        return None
+    rawmode, data = img.palette.getdata()
+    swatch = Image.new("P", (1, 1))
+    swatch.putpalette(data, rawmode)
+    return swatch.getpalette()
+
+
+def iter_bands(input_path: str, band_rows: int) -> Iterator[Tuple[int, Image.Image]]:
+    """
+    Yield (top row, band image) for consecutive bands of an uncompressed
+    image, reading only those rows from disk.
+    """
+    with Image.open(input_path) as img:
+        width, height, mode = img.width, img.height, img.mode
+        palette = header_palette(img) if mode in ("P", "PA") else None
+        tiles = list(img.tile)
+
+    with open(input_path, "rb") as f:
+        for top in range(0, height, band_rows):
+            bottom = min(top + band_rows, height)
+            band = Image.new(mode, (width, bottom - top))
+
+            for _, (x0, y0, x1, y1), offset, args in tiles:
+                rows_top, rows_bottom = max(y0, top), min(y1, bottom)
+                if rows_top >= rows_bottom:
+                    continue
+
+                rawmode, stride = args[0], args[1]
+                orientation = args[2] if len(args) > 2 else 1
+                stride = stride or ((x1 - x0) * RAW_BITS[rawmode] + 7) // 8
+
+                # Bottom-up layouts (BMP) store the last row first
+                first_row = rows_top - y0 if orientation > 0 else y1 - rows_bottom
+                f.seek(offset + first_row * stride)
+                data = f.read((rows_bottom - rows_top) * stride)
+
+                part = Image.frombytes(mode, (x1 - x0, rows_bottom - rows_top), data, "raw", rawmode, stride, orientation)
+                band.paste(part, (x0, rows_top - top))
+
+            if palette:
+                band.putpalette(palette)
+            yield top, band
+
+
+def band_rows_for(width: int, band_pixels: int = BAND_PIXEL_BUDGET, multiple: int = 1) -> int:
+    """Rows per band within the band budget, rounded down to a multiple"""
+    rows = max(1, band_pixels // max(1, width))
+    return max(multiple, rows - rows % multiple)
+
+
+class PNGStreamWriter:
+    """
+    Minimal PNG encoder that takes rows band by band, so the full image is
+    never held in memory. Rows are written unfiltered and deflated
+    incrementally into IDAT chunks.
+    """
+
+    # mode -> (PNG color type, bit depth, bytes per pixel)
+    COLOR_TYPES = {
+        "L": (0, 8, 1), "I;16": (0, 16, 2), "RGB": (2, 8, 3), "P": (3, 8, 1), "LA": (4, 8, 2), "RGBA": (6, 8, 4),
+    }
+    IDAT_SIZE = 256 * 1024
+
+    def __init__(self, fileobj, width: int, height: int, mode: str, palette: Optional[List[int]] = None,
+                 transparency=None, compress_level: int = 6):
+        self.f = fileobj
+        if mode == "I;16B":
+            mode = "I;16"
+        self.mode = mode if mode in self.COLOR_TYPES else ("L" if mode == "1" else "RGB")
+        color_type, bit_depth, pixel_bytes = self.COLOR_TYPES[self.mode]
+        self.row_bytes = width * pixel_bytes
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = []
+        self._pending_size = 0
+
+        self.f.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0))
+        if self.mode == "P":
+            self._chunk(b"PLTE", bytes(palette[:768]))
+            if isinstance(transparency, bytes):
+                self._chunk(b"tRNS", transparency)
+            elif isinstance(transparency, int):
+                self._chunk(b"tRNS", b"\xff" * transparency + b"\x00")
+
+    def _chunk(self, kind: bytes, data: bytes):
+        self.f.write(struct.pack(">I", len(data)) + kind + data)
+        self.f.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def _emit(self, data: bytes, final: bool = False):
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending_size >= self.IDAT_SIZE or (final and self._pending):
+            self._chunk(b"IDAT", b"".join(self._pending))
+            self._pending, self._pending_size = [], 0
+
+    def write_band(self, band: Image.Image):
+        if self.mode == "I;16":
+            # PNG stores 16-bit samples big-endian
+            raw = band.tobytes("raw", "I;16B")
+        else:
+            if band.mode != self.mode:
+                band = band.convert(self.mode)
+            raw = band.tobytes()
+        rows = b"".join(
+            b"\x00" + raw[i:i + self.row_bytes] for i in range(0, len(raw), self.row_bytes)
+        )
+        self._emit(self._compressor.compress(rows))
+
+    def close(self):
+        self._emit(self._compressor.flush(), final=True)
+        self._chunk(b"IEND", b"")
+
+
+def convert_in_bands(input_path: str, output_path: str, band_pixels: int = BAND_PIXEL_BUDGET, compress_level: int = 6):
+    """Convert an uncompressed TIFF/BMP to PNG without decoding it whole"""
+    with Image.open(input_path) as img:
+        width, height, mode = img.width, img.height, img.mode
+        palette = header_palette(img) if mode == "P" else None
+        transparency = img.info.get("transparency")
+
+    with open(output_path, "wb") as f:
+        writer = PNGStreamWriter(f, width, height, mode, palette, transparency, compress_level)
+        for _, band in iter_bands(input_path, band_rows_for(width, band_pixels)):
+            writer.write_band(band)
+        writer.close()
+
+
+def reduce_in_bands(input_path: str, factor: int, band_pixels: int = BAND_PIXEL_BUDGET) -> Image.Image:
+    """
+    Downscale an uncompressed image by a whole factor, band by band, so only
+    the reduced image and one band are ever in memory.
+    """
+    with Image.open(input_path) as img:
+        width, height, mode = img.width, img.height, img.mode
+
+    # Palette and bilevel bands are averaged in a continuous-tone mode
+    work_mode = {"P": "RGBA", "PA": "RGBA", "1": "L", "I;16": "I", "I;16B": "I"}.get(mode, mode)
+    reduced = Image.new(work_mode, (math.ceil(width / factor), math.ceil(height / factor)))
+
+    for top, band in iter_bands(input_path, band_rows_for(width, band_pixels, multiple=factor)):
+        if band.mode != work_mode:
+            band = band.convert(work_mode)
+        reduced.paste(band.reduce(factor), (0, top // factor))
+    return reduced
+
+
+def reduction_factor(size: Tuple[int, int], target: Tuple[int, int], memory_pixels: int, reducing_gap: float = 2.0) -> int:
+    """
+    Whole reduction factor for a banded downscale: keep reducing_gap headroom
+    over the target where the memory budget allows, but never reduce below it.
+    """
+    headroom = int(min(size[0] / (target[0] * reducing_gap), size[1] / (target[1] * reducing_gap)))
+    needed = math.ceil(math.sqrt(size[0] * size[1] / memory_pixels))
+    factor = max(1, headroom, needed)
+
+    if factor > min(size[0] // target[0], size[1] // target[1]):
+        raise MemoryError(
+            f"Image is {size[0]}x{size[1]}; resizing to {target[0]}x{target[1]} "
+            f"does not fit the {memory_pixels:,} pixel memory budget"
+        )
+    return factor
+
+
+def open_within_budget(
+    input_path: str,
+    size: Optional[Tuple[int, int]],
+    preset: str = DEFAULT_PRESET,
+    max_pixels: int = MAX_IMAGE_PIXELS,
+    memory_pixels: int = MEMORY_PIXEL_BUDGET
+) -> Image.Image:
+    """
+    Open an image for resizing to `size` without exceeding the memory budget:
+    small images open normally, large uncompressed ones are reduced in bands.
+    """
+    with Image.open(input_path) as probe:
+        check_image_size(probe, max_pixels)
+        too_big = probe.width * probe.height > memory_pixels
+        bandable = can_read_bands(probe)
+        source_size = probe.size
+
+    if not too_big:
+        img, _ = open_image(input_path, *(size or (0, 0)), preset=preset)
+        return img
+    if size and bandable:
+        return reduce_in_bands(input_path, reduction_factor(source_size, size, memory_pixels))
+
+    raise MemoryError(
+        f"Image is {source_size[0]}x{source_size[1]}, over the {memory_pixels:,} pixel memory budget"
+        + ("" if bandable else "; only uncompressed TIFF/BMP can be processed in bands")
+    )
+
+
+def convert_image(
+    input_path: str,
+    output_path: str,
+    width: int = 0,
+    height: int = 0,
+    quality: int = 85,
+    preset: str = DEFAULT_PRESET,
+    effort: str = DEFAULT_EFFORT,
+    max_pixels: int = MAX_IMAGE_PIXELS,
+    memory_pixels: int = MEMORY_PIXEL_BUDGET
+) -> Dict:
+    """
+    Convert an image, optionally resizing it; the format follows output_path.
+    Large uncompressed sources converted to PNG at full size are streamed in bands.
+    Returns metrics: bytes_out, encode_ms and the effort used.
+    """
+    check_options(preset, effort)
+    target_format = Path(output_path).suffix[1:].upper()
+
+    with pixel_limit(max_pixels):
+        with Image.open(input_path) as probe:
+            check_image_size(probe, max_pixels)
+            size = target_size(probe.size, width, height)
+            banded = (
+                probe.width * probe.height > memory_pixels
+                and size is None
+                and target_format == "PNG"
+                and can_read_bands(probe)
+            )
+
+        if banded:
+            # Decode and encode are interleaved, so the whole pass counts as encoding
+            started = time.perf_counter()
+            level = EFFORTS[effort]["PNG"].get("compress_level", 9)
+            convert_in_bands(input_path, output_path, compress_level=level)
+            encode_ms = int((time.perf_counter() - started) * 1000)
+        else:
+            with open_within_budget(input_path, size, preset, max_pixels, memory_pixels) as img:
+                result = resize_image(img, size, preset) if size else img
+                result = flatten_alpha(result, target_format)
+                encode_ms = save_image(result, output_path, target_format, quality, effort)
+
+    return {
+        "bytes_out": os.path.getsize(output_path),
+        "encode_ms": encode_ms,
+        "effort": effort,
+    }
+
+
+# ============== Renditions ==============
+def make_renditions(
+    input_path: str,
+    renditions: List[Dict],
+    preset: str = DEFAULT_PRESET,
+    effort: str = DEFAULT_EFFORT
+) -> Iterator[Tuple[Dict, bytes]]:
+    """
+    Produce several sizes/formats/qualities from a single decode.
+
+    renditions: dicts with "width", "format" (extension) and "quality".
+    Widths larger than the source are clamped (never upscaled). Sizes are
+    produced largest first, each downsampled from the previous one, so every
+    step works on the smallest image that still has enough detail.
+    Yields (rendition, encoded bytes) with the actual width/height and the
+    encode time filled in.
+    """
+    check_options(preset, effort)
+
+    with pixel_limit():
+        with Image.open(input_path) as probe:
+            source_size = probe.size
+
+        by_width: Dict[int, List[Dict]] = {}
+        for rendition in renditions:
+            width = min(int(rendition["width"]), source_size[0])
+            by_width.setdefault(width, []).append(rendition)
+
+        widths = sorted(by_width, reverse=True)
+        largest = target_size(source_size, widths[0])
+
+        # One decode, sized (draft or banded reduction) for the largest rendition
+        with open_within_budget(input_path, largest, preset) as img:
+            current = img
+            for width in widths:
+                size = target_size(source_size, width)
+                current = resize_image(current, size, preset)
+
+                for rendition in by_width[width]:
+                    target_format = rendition["format"].upper()
+                    buffer = io.BytesIO()
+                    encode_ms = save_image(flatten_alpha(current, target_format), buffer, target_format, rendition["quality"], effort)
+                    yield {**rendition, "width": size[0], "height": size[1], "encode_ms": encode_ms}, buffer.getvalue()
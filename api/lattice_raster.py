@@ -0,0 +1,172 @@
+"""
+Lattice Raster
+Cached page rasterization for Camelot's lattice flavor.
+
+Lattice finds ruling lines on a bitmap of each page, and the rasterization
+is the slowest step of an extraction: Camelot shells out to ghostscript or
+poppler for every page, every time. Re-running an extraction (auto mode,
+a retry, a preview followed by the full conversion, a table count) paid
+for it again.
+
+- Page images are cached on disk per (document hash, page, resolution,
+  backend), so a page is rasterized once however often it is extracted.
+- The default backend renders with PyMuPDF in-process, which is much faster
+  than starting ghostscript per page; Camelot's own backends ("ghostscript",
+  "poppler", and "pdfium" on Camelot 2) can be selected with
+  LATTICE_BACKEND and are cached the same way.
+- Works as a Camelot backend object on both Camelot 0.11 (one temporary
+  single-page PDF per page, convert only) and Camelot 2 (original PDF and a
+  page number, in-memory to_array).
+
+Author: ToolGlid
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+
+BACKEND = os.environ.get("LATTICE_BACKEND", "pymupdf")
+RESOLUTION = 300  # Camelot's lattice default; its own backends render at this DPI
+CACHE_DIR = Path(os.environ.get("LATTICE_CACHE_DIR", str(Path(tempfile.gettempdir()) / "lattice_page_cache")))
+CACHE_BYTES = int(os.environ.get("LATTICE_CACHE_MB", "512")) * 1024 * 1024
+
+
+# ============== Document hashes ==============
+_hashes: Dict[Tuple[str, int, int], str] = {}
+_hash_lock = threading.Lock()
+
+
+def document_hash(pdf_path: str) -> str:
+    """Content hash of a PDF, computed once per (path, size, mtime)"""
+    stat = os.stat(pdf_path)
+    key = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        if key in _hashes:
+            return _hashes[key]
+
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+
+    with _hash_lock:
+        _hashes[key] = value
+    return value
+
+
+# ============== Cache ==============
+def _prune(cache_dir: Path, budget: int):
+    """Drop the least recently used page images once the cache is over budget"""
+    entries = []
+    for path in cache_dir.glob("*.png"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_atime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= budget:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+class CachedRasterBackend:
+    """
+    Camelot image conversion backend with a shared on-disk page cache.
+    Pass an instance as read_pdf(..., flavor="lattice", backend=...).
+    """
+
+    def __init__(self, backend: str = BACKEND, resolution: int = RESOLUTION,
+                 cache_dir: Path = CACHE_DIR, cache_bytes: int = CACHE_BYTES):
+        self.backend = backend
+        self.resolution = resolution
+        self.cache_dir = Path(cache_dir)
+        self.cache_bytes = cache_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"CachedRasterBackend({self.backend!r}, {self.resolution} dpi)"
+
+    def installed(self) -> bool:
+        return True
+
+    def _render(self, pdf_path: str, png_path: str, page: int) -> Optional["fitz.Pixmap"]:
+        """Rasterize one page into png_path; PyMuPDF also returns the pixmap"""
+        if self.backend == "pymupdf":
+            with fitz.open(pdf_path) as doc:
+                # Grayscale: lattice thresholds a gray image anyway, and it encodes ~3x faster
+                pix = doc[page - 1].get_pixmap(dpi=self.resolution, colorspace=fitz.csGRAY, alpha=False)
+            pix.save(png_path, output="png")
+            return pix
+
+        from camelot.backends.image_conversion import BACKENDS
+
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown lattice backend '{self.backend}'. Use pymupdf or one of: {', '.join(BACKENDS)}")
+        # Camelot 0.11 hands over single-page PDFs and has no page argument
+        kwargs = {"page": page} if page != 1 else {}
+        BACKENDS[self.backend]().convert(pdf_path, png_path, **kwargs)
+        return None
+
+    def _cached(self, pdf_path: str, page: int) -> Tuple[Path, Optional["fitz.Pixmap"]]:
+        key = f"{document_hash(pdf_path)}-p{page}-{self.resolution}dpi-{self.backend}"
+        path = self.cache_dir / f"{key}.png"
+        if path.exists():
+            self.hits += 1
+            os.utime(path)
+            return path, None
+
+        self.misses += 1
+        # Rendered beside the cache so concurrent readers never see a partial image;
+        # the .png suffix is kept because some backends derive their output name from it
+        partial_dir = self.cache_dir / "partial"
+        partial_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=partial_dir, suffix=".png")
+        os.close(fd)
+        try:
+            pix = self._render(pdf_path, tmp, page)
+            if os.path.getsize(tmp) == 0:
+                raise RuntimeError(f"Lattice backend '{self.backend}' rendered nothing for page {page}")
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+        _prune(self.cache_dir, self.cache_bytes)
+        return path, pix
+
+    def cached_image(self, pdf_path: str, page: int = 1) -> Path:
+        """Path of the cached page image, rendering it on a miss"""
+        return self._cached(pdf_path, page)[0]
+
+    # Camelot backend interface
+    def convert(self, pdf_path: str, png_path: str, page: int = 1, **kwargs):
+        source = self.cached_image(pdf_path, page)
+        try:
+            os.link(source, png_path)
+        except OSError:
+            shutil.copyfile(source, png_path)
+
+    def to_array(self, pdf_path: str, page: int = 1, **kwargs):
+        """BGR page image, as cv2.imread would return it"""
+        import cv2
+        import numpy as np
+
+        path, pix = self._cached(pdf_path, page)
+        if pix is not None:
+            # Just rendered: skip decoding the PNG that was written
+            gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+            return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+        return cv2.imread(str(path))
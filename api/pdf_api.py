@@ -0,0 +1,344 @@
+"""
+PDF API - Isolated endpoints for PDF page rendering
+Pages are rendered in-process with PyMuPDF (see pdf_render.py)
+"""
+
+import uuid
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+import aiofiles
+
+from workspace import Workspace
+import pdf_render
+import pdf_text
+from zipstream import ZipStream
+from downloads import etag_matches, MEDIA_TYPES
+
+
+# ============== Configuration ==============
+class PDFConfig:
+    UPLOAD_DIR = Path(tempfile.gettempdir()) / "pdf_uploads"
+    OUTPUT_DIR = Path(tempfile.gettempdir()) / "pdf_outputs"
+    MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+    MAX_DPI = 600
+    MAX_PAGE_WIDTH = 4096
+    DOCUMENT_NAME = "document.pdf"
+
+    @classmethod
+    def ensure_dirs(cls):
+        cls.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        cls.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+
+# Initialize directories
+PDFConfig.ensure_dirs()
+
+# Job directories are bucketed by hour so retention can drop whole buckets
+workspace = Workspace(PDFConfig.UPLOAD_DIR, PDFConfig.OUTPUT_DIR)
+
+
+# ============== Router ==============
+router = APIRouter(prefix="/pdf", tags=["PDF"])
+
+
+# ============== Helpers ==============
+async def save_pdf_upload(file: UploadFile, upload_dir: Path) -> Path:
+    """Validate and store an uploaded PDF"""
+    filename = file.filename or "document.pdf"
+    ext = filename.lower().split('.')[-1]
+
+    if ext != 'pdf':
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type '{ext}'. Only .pdf files are accepted."
+        )
+
+    file.file.seek(0, 2)
+    file_size = file.file.tell()
+    file.file.seek(0)
+
+    if file_size > PDFConfig.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {PDFConfig.MAX_FILE_SIZE / (1024*1024):.0f}MB"
+        )
+
+    input_path = upload_dir / Path(filename).name
+    async with aiofiles.open(input_path, 'wb') as out_file:
+        while chunk := await file.read(1024 * 1024):
+            await out_file.write(chunk)
+    return input_path
+
+
+def document_path(doc_hash: str) -> Path:
+    """Stored PDF for a content hash (documents live in the workspace under their hash)"""
+    upload_dir = workspace.upload_dir(doc_hash)
+    path = upload_dir / PDFConfig.DOCUMENT_NAME if upload_dir else None
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail="Document not found. Upload it to /pdf/documents first.")
+    return path
+
+
+def image_response(request: Request, data: bytes, etag: str, image_format: str, headers: Optional[dict] = None) -> Response:
+    """Renders are addressed by content hash, so they can be cached indefinitely"""
+    response_headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        **(headers or {})
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=response_headers)
+    return Response(data, media_type=MEDIA_TYPES[f".{image_format}"], headers=response_headers)
+
+
+def check_image_format(image_format: str):
+    if image_format not in pdf_render.IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported image format '{image_format}'")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ============== API Endpoints ==============
+@router.get("/health")
+async def health_check():
+    """Health check for PDF service"""
+    return {
+        "service": "pdf",
+        "status": "healthy",
+        "render_workers": pdf_render.RENDER_WORKERS,
+        "render_cache": pdf_render.render_cache.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@router.post("/render")
+async def render_pdf(
+    file: UploadFile = File(...),
+    pages: Optional[str] = Query(None, description="Page range, e.g. 1-3,7 (default: all)"),
+    format: str = Query("png", description="png, jpg or webp"),
+    dpi: int = Query(pdf_render.DEFAULT_DPI, ge=36, le=PDFConfig.MAX_DPI),
+    quality: int = Query(85, ge=1, le=100),
+):
+    """
+    Render PDF pages to images.
+
+    - Accepts: .pdf files
+    - Returns: a ZIP of page images, streamed while pages are still rendering
+    - Pages are rendered in parallel; each is capped at a pixel budget
+    """
+    image_format = format.lower()
+    if image_format not in pdf_render.IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported image format '{format}'")
+
+    job_id = str(uuid.uuid4())
+    upload_dir, _ = workspace.create(job_id)
+    input_path = await save_pdf_upload(file, upload_dir)
+
+    # Resolve the range up front so bad input is a 400, not a broken stream
+    try:
+        count = await asyncio.to_thread(pdf_render.page_count, str(input_path))
+        selected = pdf_render.parse_page_range(pages, count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not open PDF: {str(e)}")
+
+    print(f"[PDF→Image] Rendering {len(selected)} page(s) of {input_path.name} (job: {job_id})")
+
+    digits = len(str(count))
+    stem = input_path.stem
+
+    async def stream():
+        try:
+            archive = ZipStream()
+            async for index, data in pdf_render.render_pages(
+                str(input_path), pages, dpi, image_format, quality
+            ):
+                yield archive.write_entry(f"{stem}-{index + 1:0{digits}d}.{image_format}", data)
+            yield archive.close()
+        finally:
+            await asyncio.to_thread(workspace.remove, job_id)
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{stem}_pages.zip"',
+            "X-Job-ID": job_id,
+            "X-Page-Count": str(len(selected)),
+        }
+    )
+
+
+@router.post("/text")
+async def extract_text(
+    file: UploadFile = File(...),
+    pages: Optional[str] = Query(None, description="Page range, e.g. 1-3,7 (default: all)"),
+    layout: bool = Query(False, description="Keep columns and indentation"),
+):
+    """
+    Extract text from a PDF.
+
+    - Accepts: .pdf files
+    - Returns: UTF-8 text, streamed page by page (pages separated by form feeds)
+    - Pages are extracted in parallel; the first pages arrive while the rest are still running
+    """
+    job_id = str(uuid.uuid4())
+    upload_dir, _ = workspace.create(job_id)
+    input_path = await save_pdf_upload(file, upload_dir)
+
+    # Resolve the range up front so bad input is a 400, not a broken stream
+    try:
+        count = await asyncio.to_thread(pdf_render.page_count, str(input_path))
+        selected = pdf_render.parse_page_range(pages, count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not open PDF: {str(e)}")
+
+    print(f"[PDF→Text] Extracting {len(selected)} page(s) of {input_path.name} (job: {job_id})")
+
+    async def stream():
+        try:
+            async for chunk in pdf_text.iter_text(str(input_path), pages, layout):
+                yield chunk.encode("utf-8")
+        finally:
+            await asyncio.to_thread(workspace.remove, job_id)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "Content-Disposition": f'inline; filename="{input_path.stem}.txt"',
+            "X-Job-ID": job_id,
+            "X-Page-Count": str(len(selected)),
+        }
+    )
+
+
+@router.post("/documents", status_code=201)
+async def upload_document(file: UploadFile = File(...)):
+    """
+    Store a PDF for on-demand page rendering.
+
+    Documents are addressed by the SHA-256 of their content, so uploading the
+    same file twice is free and its cached renders are reused. Uploading it
+    again also restarts its retention period.
+    """
+    job_id = str(uuid.uuid4())
+    staging_dir, _ = workspace.create(job_id)
+    try:
+        staged = await save_pdf_upload(file, staging_dir)
+        doc_hash = await asyncio.to_thread(file_sha256, staged)
+
+        existing = workspace.upload_dir(doc_hash)
+        if existing is None or not (existing / PDFConfig.DOCUMENT_NAME).exists():
+            upload_dir, _ = workspace.create(doc_hash)
+            await asyncio.to_thread(staged.replace, upload_dir / PDFConfig.DOCUMENT_NAME)
+        elif await asyncio.to_thread(workspace.touch, doc_hash):
+            # Re-uploaded: keep it for another retention period under its new path
+            await pdf_render.forget_document(str(existing / PDFConfig.DOCUMENT_NAME))
+    finally:
+        await asyncio.to_thread(workspace.remove, job_id)
+
+    path = document_path(doc_hash)
+    try:
+        count = await pdf_render.document_page_count(str(path))
+    except Exception as e:
+        await pdf_render.forget_document(str(path))
+        await asyncio.to_thread(workspace.remove, doc_hash)
+        raise HTTPException(status_code=400, detail=f"Could not open PDF: {str(e)}")
+
+    return {"doc_hash": doc_hash, "page_count": count}
+
+
+@router.get("/{doc_hash}/pages/{n:int}.{image_format}")
+async def render_document_page(
+    request: Request,
+    doc_hash: str,
+    n: int,
+    image_format: str,
+    width: Optional[int] = Query(None, ge=16, le=PDFConfig.MAX_PAGE_WIDTH, description="Output width in pixels"),
+    quality: int = Query(85, ge=1, le=100),
+):
+    """Render a single page (1-based) of a stored document"""
+    image_format = image_format.lower()
+    check_image_format(image_format)
+    path = document_path(doc_hash)
+
+    count = await pdf_render.document_page_count(str(path))
+    if not 1 <= n <= count:
+        raise HTTPException(status_code=404, detail=f"Page {n} out of range (document has {count})")
+
+    etag = f'"{doc_hash[:32]}-{n}-{width or 0}-{quality}.{image_format}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return image_response(request, b"", etag, image_format)
+
+    data = await pdf_render.render_cached_page(doc_hash, str(path), n - 1, width, image_format, quality)
+    return image_response(request, data, etag, image_format)
+
+
+@router.get("/{doc_hash}/thumbnails.{image_format}")
+async def render_thumbnail_strip(
+    request: Request,
+    doc_hash: str,
+    image_format: str,
+    width: int = Query(160, ge=16, le=1024, description="Thumbnail width in pixels"),
+    pages: Optional[str] = Query(None, description="Page range, e.g. 1-20 (default: all)"),
+    quality: int = Query(80, ge=1, le=100),
+):
+    """
+    Render pages as one vertical strip of thumbnails.
+    The y offset of each page is returned in X-Thumbnail-Offsets.
+    """
+    image_format = image_format.lower()
+    check_image_format(image_format)
+    path = document_path(doc_hash)
+
+    count = await pdf_render.document_page_count(str(path))
+    try:
+        indices = pdf_render.parse_page_range(pages, count)
+        data, offsets = await pdf_render.render_cached_strip(doc_hash, str(path), indices, width, image_format, quality)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    etag = f'"{doc_hash[:32]}-strip-{hashlib.sha1(repr((indices, width, quality)).encode()).hexdigest()[:12]}.{image_format}"'
+    return image_response(request, data, etag, image_format, headers={
+        "X-Thumbnail-Pages": ",".join(str(i + 1) for i in indices),
+        "X-Thumbnail-Offsets": ",".join(map(str, offsets)),
+    })
+
+
+@router.get("/info")
+async def get_info():
+    """Get information about this service"""
+    return {
+        "service": "PDF Renderer",
+        "version": "1.0.0",
+        "description": "Renders PDF pages to PNG, JPEG or WebP and extracts text with PyMuPDF",
+        "features": [
+            "Parallel page rendering",
+            "Page ranges",
+            "Streamed ZIP output",
+            "Per-page pixel budget",
+            "Streaming page-parallel text extraction with layout mode",
+            "On-demand single pages and thumbnail strips with a render cache"
+        ],
+        "accepted_formats": ["pdf"],
+        "output_formats": sorted(set(pdf_render.IMAGE_FORMATS) - {"jpeg"}),
+        "max_file_size_mb": PDFConfig.MAX_FILE_SIZE / (1024 * 1024),
+        "max_dpi": PDFConfig.MAX_DPI
+    }
@@ -0,0 +1,405 @@
+"""
+PDF Page Renderer
+In-process PDF to image rendering with PyMuPDF.
+
+Features:
+- Renders pages in parallel across a process pool (PyMuPDF documents are
+  not thread-safe, so each worker process opens its own handle)
+- Page ranges ("1-3,7", "all")
+- PNG, JPEG and WebP output
+- Per-page pixel budget: the resolution is lowered for pages that would
+  exceed it, instead of rendering huge bitmaps
+- Pages are yielded in order as soon as they are ready, so callers can
+  stream them (e.g. into a stored ZIP) without staging files on disk
+- On-demand single pages and thumbnail strips for viewers, with an LRU
+  render cache. Viewer renders run on a few single-process shards; each
+  document always goes to the same shard, which keeps it open, so renders
+  of one document queue behind each other while different documents
+  render in parallel
+
+Author: ToolGlid
+"""
+
+import asyncio
+import io
+import math
+import multiprocessing
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+
+DEFAULT_DPI = 150
+DEFAULT_MAX_PIXELS = 40_000_000  # ~ A4 at 600 DPI
+PAGES_PER_TASK = 4
+RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+
+IMAGE_FORMATS = {"png": "png", "jpg": "jpeg", "jpeg": "jpeg", "webp": "webp"}
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Shared render pool, created on first use"""
+    global _pool
+    if _pool is None:
+        # spawn: the API process runs threads, which do not survive fork safely
+        _pool = ProcessPoolExecutor(
+            max_workers=RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the render workers (called on application shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    for shard, executor in enumerate(_viewer_shards):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            _viewer_shards[shard] = None
+
+
+def parse_page_range(spec: Optional[str], page_count: int) -> List[int]:
+    """
+    Parse a 1-based page range ("all", "3", "1-5", "1,3,8-10") into sorted
+    0-based page indices. Open ranges ("5-") run to the last page.
+    """
+    if not spec or spec.strip().lower() == "all":
+        return list(range(page_count))
+
+    pages = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, _, end = part.partition("-")
+            first = int(start) if start.strip() else 1
+            last = int(end) if end.strip() else page_count
+        else:
+            first = last = int(part)
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range: {part}")
+        pages.update(range(first - 1, min(last, page_count)))
+
+    if not pages:
+        raise ValueError(f"Page range {spec} selects no pages (document has {page_count})")
+    return sorted(pages)
+
+
+def limit_zoom(rect: "fitz.Rect", zoom: float, max_pixels: Optional[int]) -> float:
+    """Lower a zoom factor so the rendered bitmap stays within max_pixels"""
+    if max_pixels and rect.width * rect.height * zoom * zoom > max_pixels:
+        zoom = math.sqrt(max_pixels / (rect.width * rect.height))
+    return zoom
+
+
+def render_pixmap(
+    doc: "fitz.Document",
+    index: int,
+    dpi: int = DEFAULT_DPI,
+    max_pixels: Optional[int] = DEFAULT_MAX_PIXELS,
+    width: Optional[int] = None
+) -> "fitz.Pixmap":
+    """Rasterize one page (width, if given, overrides dpi)"""
+    page = doc[index]
+    zoom = width / page.rect.width if width else dpi / 72.0
+    zoom = limit_zoom(page.rect, zoom, max_pixels)
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+
+
+def encode_image(img, image_format: str, quality: int = 85) -> bytes:
+    """Encode a Pillow image or PyMuPDF pixmap"""
+    encoding = IMAGE_FORMATS[image_format]
+
+    if isinstance(img, fitz.Pixmap):
+        if encoding == "png":
+            return img.tobytes("png")
+        if encoding == "jpeg":
+            return img.tobytes("jpeg", jpg_quality=quality)
+        img = pixmap_to_image(img)
+
+    buffer = io.BytesIO()
+    img.save(buffer, encoding.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+def pixmap_to_image(pix: "fitz.Pixmap"):
+    from PIL import Image
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+def render_page(
+    doc: "fitz.Document",
+    index: int,
+    dpi: int = DEFAULT_DPI,
+    image_format: str = "png",
+    quality: int = 85,
+    max_pixels: Optional[int] = DEFAULT_MAX_PIXELS,
+    width: Optional[int] = None
+) -> bytes:
+    """Render one page to encoded image bytes (width, if given, overrides dpi)"""
+    pix = render_pixmap(doc, index, dpi, max_pixels, width)
+    return encode_image(pix, image_format, quality)
+
+
+def _render_pages_task(
+    pdf_path: str,
+    indices: List[int],
+    dpi: int,
+    image_format: str,
+    quality: int,
+    max_pixels: Optional[int]
+) -> List[Tuple[int, bytes]]:
+    """Worker-process entry point: render a few pages of one document"""
+    with fitz.open(pdf_path) as doc:
+        return [
+            (index, render_page(doc, index, dpi, image_format, quality, max_pixels))
+            for index in indices
+        ]
+
+
+def page_count(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+async def render_pages(
+    pdf_path: str,
+    pages: Optional[str] = None,
+    dpi: int = DEFAULT_DPI,
+    image_format: str = "png",
+    quality: int = 85,
+    max_pixels: Optional[int] = DEFAULT_MAX_PIXELS
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Render the selected pages in parallel and yield (page_index, image_bytes)
+    in page order. At most two tasks per worker are in flight, which bounds
+    memory for very long documents.
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+
+    loop = asyncio.get_running_loop()
+    count = await loop.run_in_executor(None, page_count, pdf_path)
+    indices = parse_page_range(pages, count)
+    chunks = [indices[i:i + PAGES_PER_TASK] for i in range(0, len(indices), PAGES_PER_TASK)]
+
+    pool = get_pool()
+    max_in_flight = RENDER_WORKERS * 2
+    pending: List[asyncio.Future] = []
+    next_chunk = 0
+
+    try:
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks) and len(pending) < max_in_flight:
+                pending.append(loop.run_in_executor(
+                    pool, _render_pages_task, pdf_path, chunks[next_chunk],
+                    dpi, image_format, quality, max_pixels
+                ))
+                next_chunk += 1
+
+            for rendered in await pending.pop(0):
+                yield rendered
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+# ============== On-demand rendering ==============
+# Viewers ask for one page at a time, usually in sequence, so single pages are
+# rendered in viewer shard processes: each document always goes to the same
+# shard, which keeps recently used documents open (PyMuPDF is not thread-safe,
+# hence processes). Encoded renders are kept in a byte-bounded LRU and page
+# counts in a small LRU of their own.
+
+RENDER_CACHE_BYTES = int(os.environ.get("PDF_RENDER_CACHE_MB", 256)) * 1024 * 1024
+MAX_OPEN_DOCUMENTS = 16
+MAX_PAGE_COUNTS = 1024
+MAX_STRIP_PAGES = 100
+STRIP_GAP = 4
+VIEWER_SHARDS = int(os.environ.get("PDF_VIEWER_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+class RenderCache:
+    """LRU of encoded renders, bounded by total bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Tuple, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self.size -= old[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes}
+
+
+class DocumentCache:
+    """LRU of open documents. Each viewer shard process has its own."""
+
+    def __init__(self, max_open: int):
+        self.max_open = max_open
+        self._documents: "OrderedDict[str, fitz.Document]" = OrderedDict()
+
+    def get(self, pdf_path: str) -> "fitz.Document":
+        doc = self._documents.get(pdf_path)
+        if doc is not None:
+            self._documents.move_to_end(pdf_path)
+            return doc
+
+        doc = fitz.open(pdf_path)
+        self._documents[pdf_path] = doc
+        while len(self._documents) > self.max_open:
+            _, evicted = self._documents.popitem(last=False)
+            evicted.close()
+        return doc
+
+    def discard(self, pdf_path: str):
+        doc = self._documents.pop(pdf_path, None)
+        if doc is not None:
+            doc.close()
+
+
+render_cache = RenderCache(RENDER_CACHE_BYTES)
+_documents = DocumentCache(MAX_OPEN_DOCUMENTS)  # used inside the shard processes
+_viewer_shards: List[Optional[ProcessPoolExecutor]] = [None] * VIEWER_SHARDS
+_page_counts: "OrderedDict[str, int]" = OrderedDict()
+
+
+def _shard_for(pdf_path: str) -> int:
+    return zlib.crc32(pdf_path.encode()) % VIEWER_SHARDS
+
+
+async def _on_shard(pdf_path: str, fn, *args):
+    """Run fn in the shard process that owns pdf_path's open document"""
+    shard = _shard_for(pdf_path)
+    executor = _viewer_shards[shard]
+    if executor is None:
+        executor = _viewer_shards[shard] = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, pdf_path, *args)
+    except BrokenProcessPool:
+        # A crashed worker takes its open documents with it; start afresh next time
+        if _viewer_shards[shard] is executor:
+            _viewer_shards[shard] = None
+        raise
+
+
+def _discard_document(pdf_path: str):
+    _documents.discard(pdf_path)
+
+
+def _document_page_count(pdf_path: str) -> int:
+    return _documents.get(pdf_path).page_count
+
+
+def _render_single(pdf_path: str, index: int, width: Optional[int], image_format: str, quality: int) -> bytes:
+    return render_page(_documents.get(pdf_path), index, DEFAULT_DPI, image_format, quality, DEFAULT_MAX_PIXELS, width)
+
+
+def _render_strip(pdf_path: str, indices: List[int], width: int, image_format: str, quality: int) -> Tuple[bytes, List[int]]:
+    from PIL import Image
+
+    doc = _documents.get(pdf_path)
+    thumbnails = [pixmap_to_image(render_pixmap(doc, index, width=width)) for index in indices]
+
+    height = sum(t.height for t in thumbnails) + STRIP_GAP * (len(thumbnails) - 1)
+    strip = Image.new("RGB", (max(t.width for t in thumbnails), height), "white")
+    offsets, y = [], 0
+    for thumbnail in thumbnails:
+        strip.paste(thumbnail, (0, y))
+        offsets.append(y)
+        y += thumbnail.height + STRIP_GAP
+    return encode_image(strip, image_format, quality), offsets
+
+
+async def document_page_count(pdf_path: str) -> int:
+    """Page count through the open-document cache"""
+    count = _page_counts.get(pdf_path)
+    if count is None:
+        count = await _on_shard(pdf_path, _document_page_count)
+    _page_counts[pdf_path] = count
+    _page_counts.move_to_end(pdf_path)
+    while len(_page_counts) > MAX_PAGE_COUNTS:
+        _page_counts.popitem(last=False)
+    return count
+
+
+async def render_cached_page(
+    doc_hash: str,
+    pdf_path: str,
+    index: int,
+    width: Optional[int] = None,
+    image_format: str = "png",
+    quality: int = 85
+) -> bytes:
+    """Render a single page, served from the render cache when possible"""
+    key = (doc_hash, index, width, image_format, quality)
+    data = render_cache.get(key)
+    if data is None:
+        data = await _on_shard(pdf_path, _render_single, index, width, image_format, quality)
+        render_cache.put(key, data, len(data))
+    return data
+
+
+async def render_cached_strip(
+    doc_hash: str,
+    pdf_path: str,
+    indices: List[int],
+    width: int,
+    image_format: str = "png",
+    quality: int = 85
+) -> Tuple[bytes, List[int]]:
+    """
+    Render pages as one vertical thumbnail strip. Returns the encoded image
+    and the y offset of each page within it.
+    """
+    if len(indices) > MAX_STRIP_PAGES:
+        raise ValueError(f"A thumbnail strip holds at most {MAX_STRIP_PAGES} pages")
+
+    key = (doc_hash, ("strip", tuple(indices)), width, image_format, quality)
+    cached = render_cache.get(key)
+    if cached is None:
+        cached = await _on_shard(pdf_path, _render_strip, indices, width, image_format, quality)
+        render_cache.put(key, cached, len(cached[0]))
+    return cached
+
+
+async def forget_document(pdf_path: str):
+    """Close a cached handle (e.g. after the file was removed or moved)"""
+    _page_counts.pop(pdf_path, None)
+    if _viewer_shards[_shard_for(pdf_path)] is not None:
+        await _on_shard(pdf_path, _discard_document)
@@ -0,0 +1,140 @@
+"""
+PDF Text Extractor
+In-process PDF to text with PyMuPDF.
+
+Features:
+- Extracts pages in parallel on the PyMuPDF worker pool (see pdf_render.py)
+- Page ranges ("1-3,7", "all")
+- Reading-order text, or a layout mode that keeps columns and indentation
+  by placing words on a character grid (like `pdftotext -layout`)
+- Pages are yielded in order as soon as they are ready; the first tasks are
+  a single page so the start of a long document is available almost at once
+
+Pages are separated by a form feed, as pdftotext does.
+
+Author: ToolGlid
+"""
+
+import asyncio
+import statistics
+from typing import AsyncIterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from pdf_render import get_pool, page_count, parse_page_range, RENDER_WORKERS
+
+
+PAGE_SEPARATOR = "\f"
+MAX_PAGES_PER_TASK = 16
+
+
+def layout_text(page: "fitz.Page") -> str:
+    """
+    Lay words out on a fixed character grid: rows follow word baselines and
+    columns follow x positions, so tables and multi-column pages keep
+    their shape in plain text.
+    """
+    words = page.get_text("words", sort=True)
+    if not words:
+        return ""
+
+    char_width = statistics.median((w[2] - w[0]) / max(1, len(w[4])) for w in words) or 1.0
+    line_height = statistics.median(w[3] - w[1] for w in words) or 1.0
+
+    # Group words whose vertical centres are within half a line
+    rows: List[Tuple[float, List]] = []
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        centre = (word[1] + word[3]) / 2
+        if rows and abs(centre - rows[-1][0]) < line_height / 2:
+            rows[-1][1].append(word)
+        else:
+            rows.append((centre, [word]))
+
+    lines, previous = [], None
+    for centre, row in rows:
+        # Keep paragraph gaps as blank lines
+        if previous is not None:
+            lines.extend([""] * max(0, round((centre - previous) / line_height) - 1))
+        previous = centre
+
+        line, previous_end = "", None
+        for x0, _, x1, _, text, *_ in sorted(row, key=lambda w: w[0]):
+            word_char_width = (x1 - x0) / max(1, len(text))
+            if previous_end is not None and x0 - previous_end < 2 * word_char_width:
+                line += " " + text  # same phrase: a plain space, whatever the font size
+            else:
+                line += " " * max(1 if line else 0, int(x0 / char_width) - len(line)) + text
+            previous_end = x1
+        lines.append(line.rstrip())
+
+    return "\n".join(lines) + "\n"
+
+
+def extract_page_text(doc: "fitz.Document", index: int, layout: bool = False) -> str:
+    """Text of one page"""
+    page = doc[index]
+    if layout:
+        return layout_text(page)
+    return page.get_text("text")
+
+
+def _extract_pages_task(pdf_path: str, indices: List[int], layout: bool) -> List[Tuple[int, str]]:
+    """Worker-process entry point: extract a few pages of one document"""
+    with fitz.open(pdf_path) as doc:
+        return [(index, extract_page_text(doc, index, layout)) for index in indices]
+
+
+def _task_sizes(total: int) -> List[int]:
+    """1, 2, 4, ... pages per task up to MAX_PAGES_PER_TASK: fast first bytes, low overhead later"""
+    sizes, size = [], 1
+    while total > 0:
+        sizes.append(min(size, total))
+        total -= size
+        size = min(size * 2, MAX_PAGES_PER_TASK)
+    return sizes
+
+
+async def extract_pages(
+    pdf_path: str,
+    pages: Optional[str] = None,
+    layout: bool = False
+) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Extract the selected pages in parallel and yield (page_index, text) in
+    page order. At most two tasks per worker are in flight.
+    """
+    loop = asyncio.get_running_loop()
+    count = await loop.run_in_executor(None, page_count, pdf_path)
+    indices = parse_page_range(pages, count)
+
+    chunks, start = [], 0
+    for size in _task_sizes(len(indices)):
+        chunks.append(indices[start:start + size])
+        start += size
+
+    pool = get_pool()
+    max_in_flight = RENDER_WORKERS * 2
+    pending: List[asyncio.Future] = []
+    next_chunk = 0
+
+    try:
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks) and len(pending) < max_in_flight:
+                pending.append(loop.run_in_executor(
+                    pool, _extract_pages_task, pdf_path, chunks[next_chunk], layout
+                ))
+                next_chunk += 1
+
+            for extracted in await pending.pop(0):
+                yield extracted
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def iter_text(pdf_path: str, pages: Optional[str] = None, layout: bool = False) -> AsyncIterator[str]:
+    """Document text as page-sized chunks, form feed between pages"""
+    first = True
+    async for _, text in extract_pages(pdf_path, pages, layout):
+        yield text if first else PAGE_SEPARATOR + text
+        first = False
@@ -6,6 +6,9 @@ Uses:
 - Camelot for accurate table detection and extraction
 - openpyxl for Excel file creation
 - Supports both lattice (bordered) and stream (borderless) tables
+- Lattice page images are rasterized once and cached (see lattice_raster.py);
+  each extraction is remembered per converter, so auto mode, table counts
+  and retries do not redo it
 
 Author: ToolGlid
 """
@@ -15,11 +18,42 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple, BinaryIO, Union
+from contextlib import contextmanager
 import io
 import tempfile
 import os
 
+from lattice_raster import CachedRasterBackend, BACKEND as LATTICE_BACKEND
+
+
+# Camelot only reads from a path; in-memory PDFs go to a RAM-backed
+# directory when there is one, so they never touch the disk
+MEMORY_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+
+@contextmanager
+def pdf_bytes_as_path(pdf_bytes: Union[bytes, memoryview]):
+    """Write an in-memory PDF once (no intermediate copy) and yield its path"""
+    fd, path = tempfile.mkstemp(suffix='.pdf', dir=MEMORY_TMP_DIR)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(memoryview(pdf_bytes))
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def _area_hints(table_areas: Optional[List[str]] = None,
+                columns: Optional[List[str]] = None) -> Dict:
+    """Camelot keyword arguments for the region hints that are set"""
+    hints = {}
+    if table_areas:
+        hints['table_areas'] = table_areas
+    if columns:
+        hints['columns'] = columns
+    return hints
+
 
 class PDFToExcelConverter:
     """
@@ -33,8 +67,10 @@ class PDFToExcelConverter:
     - Auto-adjusts column widths
     """
 
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, backend: str = LATTICE_BACKEND):
         self.pdf_path = pdf_path
+        self.raster = CachedRasterBackend(backend)
+        self._tables: Dict[Tuple, List] = {}
         self.workbook = Workbook()
         # Remove default sheet
         self.workbook.remove(self.workbook.active)
@@ -49,22 +85,35 @@ class PDFToExcelConverter:
             bottom=Side(style='thin')
         )
 
-    def _extract_tables_lattice(self, pages: str = 'all') -> List:
+    def _extract_tables_lattice(self, pages: str = 'all',
+                                table_areas: Optional[List[str]] = None) -> List:
         """Extract tables using lattice method (for bordered tables)"""
+        key = ('lattice', pages, tuple(table_areas or ()))
+        if key in self._tables:
+            return self._tables[key]
         try:
             tables = camelot.read_pdf(
                 self.pdf_path,
                 pages=pages,
                 flavor='lattice',
-                strip_text='\n'
+                strip_text='\n',
+                backend=self.raster,
+                resolution=self.raster.resolution,
+                **_area_hints(table_areas)
             )
+            self._tables[key] = tables
             return tables
         except Exception as e:
             print(f"Lattice extraction failed: {e}")
             return []
 
-    def _extract_tables_stream(self, pages: str = 'all') -> List:
+    def _extract_tables_stream(self, pages: str = 'all',
+                               table_areas: Optional[List[str]] = None,
+                               columns: Optional[List[str]] = None) -> List:
         """Extract tables using stream method (for borderless tables)"""
+        key = ('stream', pages, tuple(table_areas or ()), tuple(columns or ()))
+        if key in self._tables:
+            return self._tables[key]
         try:
             tables = camelot.read_pdf(
                 self.pdf_path,
@@ -72,23 +121,26 @@ class PDFToExcelConverter:
                 flavor='stream',
                 strip_text='\n',
                 edge_tol=50,
-                row_tol=10
+                row_tol=10,
+                **_area_hints(table_areas, columns)
             )
+            self._tables[key] = tables
             return tables
         except Exception as e:
             print(f"Stream extraction failed: {e}")
             return []
 
-    def _auto_detect_tables(self, pages: str = 'all') -> List:
+    def _auto_detect_tables(self, pages: str = 'all',
+                            table_areas: Optional[List[str]] = None) -> List:
         """
         Auto-detect tables trying lattice first, then stream.
         Returns the method that finds more/better tables.
         """
         # Try lattice first (works best for bordered tables)
-        lattice_tables = self._extract_tables_lattice(pages)
+        lattice_tables = self._extract_tables_lattice(pages, table_areas)
 
         # Try stream (works for borderless tables)
-        stream_tables = self._extract_tables_stream(pages)
+        stream_tables = self._extract_tables_stream(pages, table_areas)
 
         # Calculate quality scores
         lattice_score = sum(t.accuracy for t in lattice_tables) if lattice_tables else 0
@@ -110,14 +162,17 @@ class PDFToExcelConverter:
         Add a Camelot table to an Excel sheet.
         Returns the next available row.
         """
-        df = table.df
+        # One array for the whole table; df.values makes a fresh copy on every access
+        values = table.df.to_numpy()
+        widths = [0] * values.shape[1]
 
         # Write data
-        for row_idx, row in enumerate(df.values):
+        for row_idx, row in enumerate(values):
             excel_row = start_row + row_idx
             for col_idx, value in enumerate(row):
                 cell = sheet.cell(row=excel_row, column=col_idx + 1)
                 cell.value = str(value).strip() if value else ""
+                widths[col_idx] = max(widths[col_idx], len(str(value)))
                 cell.border = self.border
                 cell.alignment = Alignment(wrap_text=True, vertical='top')
 
@@ -127,54 +182,31 @@ class PDFToExcelConverter:
                     cell.fill = self.header_fill
 
         # Auto-adjust column widths
-        for col_idx in range(len(df.columns)):
+        for col_idx, max_length in enumerate(widths):
             column_letter = get_column_letter(col_idx + 1)
-            max_length = 0
-            for row in df.values:
-                try:
-                    cell_value = str(row[col_idx]) if col_idx < len(row) else ""
-                    max_length = max(max_length, len(cell_value))
-                except:
-                    pass
             adjusted_width = min(max_length + 2, 50)  # Cap at 50
             sheet.column_dimensions[column_letter].width = max(adjusted_width, 10)
 
-        return start_row + len(df) + 2  # Return next row with spacing
-
-    def convert(self, output_path: str = None, separate_sheets: bool = True,
-                pages: str = 'all', flavor: str = 'auto') -> str:
-        """
-        Convert PDF tables to Excel.
-
-        Args:
-            output_path: Output .xlsx path. If None, uses input name with .xlsx extension.
-            separate_sheets: If True, each table goes to a separate sheet.
-                           If False, all tables go to one sheet.
-            pages: Page numbers to extract ('all', '1', '1,2,3', '1-5')
-            flavor: 'lattice' for bordered tables, 'stream' for borderless,
-                   'auto' to try both
+        return start_row + len(values) + 2  # Return next row with spacing
 
-        Returns:
-            Path to the created Excel file.
-        """
-        if output_path is None:
-            output_path = str(Path(self.pdf_path).with_suffix('.xlsx'))
-
-        # Extract tables
+    def _extract_tables(self, pages: str = 'all', flavor: str = 'auto',
+                        table_areas: Optional[List[str]] = None,
+                        columns: Optional[List[str]] = None) -> List:
         if flavor == 'lattice':
-            tables = self._extract_tables_lattice(pages)
-        elif flavor == 'stream':
-            tables = self._extract_tables_stream(pages)
-        else:
-            tables = self._auto_detect_tables(pages)
-
+            return self._extract_tables_lattice(pages, table_areas)
+        elif flavor == 'stream' or columns:
+            # Column separators only mean something to stream
+            return self._extract_tables_stream(pages, table_areas, columns)
+        return self._auto_detect_tables(pages, table_areas)
+
+    def _build_workbook(self, tables: List, separate_sheets: bool = True):
+        """Fill the workbook with the extracted tables"""
         if not tables:
             # Create empty sheet with message
             sheet = self.workbook.create_sheet("No Tables Found")
             sheet.cell(row=1, column=1).value = "No tables were detected in this PDF."
             sheet.cell(row=2, column=1).value = "The PDF may not contain tabular data, or the tables may not be in a recognizable format."
-            self.workbook.save(output_path)
-            return output_path
+            return
 
         if separate_sheets:
             # Each table in its own sheet
@@ -199,59 +231,102 @@ class PDFToExcelConverter:
                 # Add table
                 current_row = self._add_table_to_sheet(table, sheet, current_row)
 
-        # Save workbook
-        self.workbook.save(output_path)
+    def convert(self, output_path: str = None, separate_sheets: bool = True,
+                pages: str = 'all', flavor: str = 'auto',
+                table_areas: Optional[List[str]] = None,
+                columns: Optional[List[str]] = None) -> str:
+        """
+        Convert PDF tables to Excel.
+
+        Args:
+            output_path: Output .xlsx path. If None, uses input name with .xlsx extension.
+            separate_sheets: If True, each table goes to a separate sheet.
+                           If False, all tables go to one sheet.
+            pages: Page numbers to extract ('all', '1', '1,2,3', '1-5')
+            flavor: 'lattice' for bordered tables, 'stream' for borderless,
+                   'auto' to try both
+            table_areas: Only look for tables inside these regions,
+                   each "x1,y1,x2,y2" in PDF points (top-left, bottom-right)
+            columns: Column separators "x1,x2,..." for each table area
+                   (forces stream when flavor is 'auto')
+
+        Returns:
+            Path to the created Excel file.
+        """
+        if output_path is None:
+            output_path = str(Path(self.pdf_path).with_suffix('.xlsx'))
+
+        self.convert_to_stream(output_path, separate_sheets, pages, flavor, table_areas, columns)
         return output_path
 
+    def convert_to_stream(self, output: Union[str, BinaryIO], separate_sheets: bool = True,
+                          pages: str = 'all', flavor: str = 'auto',
+                          table_areas: Optional[List[str]] = None,
+                          columns: Optional[List[str]] = None) -> Union[str, BinaryIO]:
+        """
+        Convert PDF tables to Excel, saving into a path or any writable
+        binary stream (BytesIO, a spooled temp file, a response body).
+        """
+        tables = self._extract_tables(pages, flavor, table_areas, columns)
+        return self.save_tables(tables, output, separate_sheets)
+
+    def save_tables(self, tables: List, output: Union[str, BinaryIO],
+                    separate_sheets: bool = True) -> Union[str, BinaryIO]:
+        """Write already extracted tables to a workbook at output (path or stream)"""
+        self._build_workbook(tables, separate_sheets)
+        self.workbook.save(output)
+        return output
+
+    def iter_page_tables(self, page_numbers: List[int], flavor: str = 'auto',
+                         table_areas: Optional[List[str]] = None,
+                         columns: Optional[List[str]] = None) -> Iterator[Tuple[int, List]]:
+        """
+        Extract one page at a time, yielding (page number, tables) as soon as
+        each page is done. In auto mode lattice or stream is chosen per page.
+        """
+        for number in page_numbers:
+            tables = list(self._extract_tables(str(number), flavor, table_areas, columns))
+            # A page is not asked for again; keep the memo from growing with the document
+            self._tables = {key: value for key, value in self._tables.items() if key[1] != str(number)}
+            yield number, tables
+
     def convert_to_bytes(self, separate_sheets: bool = True,
-                         pages: str = 'all', flavor: str = 'auto') -> bytes:
+                         pages: str = 'all', flavor: str = 'auto',
+                         table_areas: Optional[List[str]] = None,
+                         columns: Optional[List[str]] = None) -> bytes:
         """
         Convert PDF tables to Excel and return as bytes.
 
         Returns:
             Excel file as bytes
         """
-        # Extract tables
-        if flavor == 'lattice':
-            tables = self._extract_tables_lattice(pages)
-        elif flavor == 'stream':
-            tables = self._extract_tables_stream(pages)
-        else:
-            tables = self._auto_detect_tables(pages)
-
-        if not tables:
-            sheet = self.workbook.create_sheet("No Tables Found")
-            sheet.cell(row=1, column=1).value = "No tables were detected in this PDF."
-        elif separate_sheets:
-            for idx, table in enumerate(tables):
-                sheet_name = f"Table {idx + 1} (Page {table.page})"[:31]
-                sheet = self.workbook.create_sheet(sheet_name)
-                self._add_table_to_sheet(table, sheet)
-        else:
-            sheet = self.workbook.create_sheet("All Tables")
-            current_row = 1
-            for idx, table in enumerate(tables):
-                header_cell = sheet.cell(row=current_row, column=1)
-                header_cell.value = f"Table {idx + 1} (Page {table.page})"
-                header_cell.font = Font(bold=True, size=14)
-                current_row += 1
-                current_row = self._add_table_to_sheet(table, sheet, current_row)
-
-        # Save to bytes
         output = io.BytesIO()
-        self.workbook.save(output)
-        output.seek(0)
-        return output.read()
+        self.convert_to_stream(output, separate_sheets, pages, flavor, table_areas, columns)
+        # getvalue() hands over the buffer without copying it
+        return output.getvalue()
 
-    def get_table_count(self, pages: str = 'all', flavor: str = 'auto') -> int:
+    def get_table_count(self, pages: str = 'all', flavor: str = 'auto',
+                        table_areas: Optional[List[str]] = None,
+                        columns: Optional[List[str]] = None) -> int:
         """Get the number of tables detected in the PDF."""
-        if flavor == 'lattice':
-            tables = self._extract_tables_lattice(pages)
-        elif flavor == 'stream':
-            tables = self._extract_tables_stream(pages)
-        else:
-            tables = self._auto_detect_tables(pages)
-        return len(tables)
+        return len(self._extract_tables(pages, flavor, table_areas, columns))
+
+
+def table_record(table) -> Dict:
+    """
+    JSON-ready summary of a Camelot table. bbox uses the table_areas
+    convention (x1, y1, x2, y2 = top-left, bottom-right in PDF points), so it
+    can be passed back as a hint.
+    """
+    x1, bottom, x2, top = getattr(table, '_bbox', (None,) * 4)
+    return {
+        'page': int(table.page),
+        'bbox': [round(v, 2) for v in (x1, top, x2, bottom)] if x1 is not None else None,
+        'accuracy': round(float(table.accuracy), 2),
+        'flavor': getattr(table, 'flavor', None),
+        'shape': list(table.shape),
+        'rows': [[str(value).strip() for value in row] for row in table.df.to_numpy().tolist()],
+    }
 
 
 def convert_pdf_to_excel(input_path: str, output_path: str = None,
@@ -271,28 +346,22 @@ def convert_pdf_to_excel(input_path: str, output_path: str = None,
     return converter.convert(output_path, separate_sheets=separate_sheets)
 
 
-def convert_pdf_bytes_to_excel_bytes(pdf_bytes: bytes,
+def convert_pdf_bytes_to_excel_bytes(pdf_bytes: Union[bytes, memoryview],
                                      separate_sheets: bool = True) -> bytes:
     """
     Convert PDF bytes to Excel bytes.
 
     Args:
-        pdf_bytes: PDF file as bytes
+        pdf_bytes: PDF file as bytes (or a memoryview)
         separate_sheets: Put each table in a separate sheet
 
     Returns:
         Excel file as bytes
     """
-    # Write to temp file (Camelot requires file path)
-    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
-        tmp.write(pdf_bytes)
-        tmp_path = tmp.name
-
-    try:
-        converter = PDFToExcelConverter(tmp_path)
+    # Camelot requires a file path; the workbook itself is built in memory
+    with pdf_bytes_as_path(pdf_bytes) as pdf_path:
+        converter = PDFToExcelConverter(pdf_path)
         return converter.convert_to_bytes(separate_sheets=separate_sheets)
-    finally:
-        os.unlink(tmp_path)
 
 
 # CLI interface
@@ -4,17 +4,23 @@ This API handles ONLY PDF to Excel (XLSX) conversions (table extraction)
 """
 
 import os
+import json
 import uuid
 import asyncio
 import tempfile
+from collections import deque
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, File, UploadFile, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 import aiofiles
 
+from workspace import Workspace
+from downloads import file_download
+from table_hints import TemplateStore, parse_table_areas, parse_columns
+
 
 # ============== Configuration ==============
 class PDFToExcelConfig:
@@ -22,6 +28,7 @@ class PDFToExcelConfig:
     OUTPUT_DIR = Path(tempfile.gettempdir()) / "pdf_to_excel_outputs"
     MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
     CONVERSION_TIMEOUT = 300  # 5 minutes for complex PDFs with many tables
+    MAX_PREVIEW_PAGES = 20
 
     @classmethod
     def ensure_dirs(cls):
@@ -32,6 +39,13 @@ class PDFToExcelConfig:
 # Initialize directories
 PDFToExcelConfig.ensure_dirs()
 
+# Job directories are bucketed by hour so retention can drop whole buckets
+workspace = Workspace(PDFToExcelConfig.UPLOAD_DIR, PDFToExcelConfig.OUTPUT_DIR)
+
+
+# Remembered page ranges / table areas per document template
+templates = TemplateStore()
+
 
 # ============== Router ==============
 router = APIRouter(prefix="/pdf-to-excel", tags=["PDF to Excel"])
@@ -40,24 +54,38 @@ router = APIRouter(prefix="/pdf-to-excel", tags=["PDF to Excel"])
 # ============== Converter ==============
 async def convert_pdf_to_excel(input_path: Path, output_path: Path,
                                separate_sheets: bool = True,
-                               flavor: str = "auto") -> Path:
+                               flavor: str = "auto",
+                               hints: Optional[Dict] = None) -> Dict:
     """
     Convert PDF tables to Excel using Camelot.
     Extracts tables from PDF and creates a structured Excel file.
+
+    hints holds the request's pages, table_areas, columns, remember,
+    use_template and max_pages (see table_hints.extraction_hints). Returns
+    the hints that were applied, including the document's template id.
     """
 
     # Get the directory where this script is located
     api_dir = str(Path(__file__).parent.absolute())
+    hints_json = json.dumps(hints or {})
 
     script = f'''
 import sys
+import json
 sys.path.insert(0, "{api_dir}")
 
 try:
     from pdf_to_excel import PDFToExcelConverter
+    from table_hints import extraction_hints
+
+    hints = extraction_hints("{input_path}", flavor="{flavor}", **json.loads({hints_json!r}))
+    print("HINTS " + json.dumps(hints))
 
     converter = PDFToExcelConverter("{input_path}")
-    converter.convert("{output_path}", separate_sheets={separate_sheets}, flavor="{flavor}")
+    converter.convert(
+        "{output_path}", separate_sheets={separate_sheets}, pages=hints["pages"],
+        flavor=hints["flavor"], table_areas=hints["table_areas"], columns=hints["columns"]
+    )
     print("SUCCESS")
 except ImportError as e:
     print(f"ERROR: {{e}}")
@@ -93,42 +121,126 @@ except Exception as e:
         print(f"[PDF→Excel] stderr: {stderr_str}")
 
     if "SUCCESS" in stdout_str and output_path.exists():
-        return output_path
+        for line in stdout_str.splitlines():
+            if line.startswith("HINTS "):
+                return json.loads(line[len("HINTS "):])
+        return {}
 
     error_msg = stderr_str if stderr_str else stdout_str
     raise RuntimeError(f"PDF to Excel conversion failed: {error_msg}")
 
 
-# ============== API Endpoints ==============
-@router.get("/health")
-async def health_check():
-    """Health check for PDF to Excel service"""
-    return {
-        "service": "pdf-to-excel",
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat()
-    }
+# Prefix of the machine-readable lines in the streaming script's output;
+# anything else it prints (Camelot warnings, tracebacks) is log
+RECORD_PREFIX = "NDJSON "
+# Per-line read limit; one record carries a whole table
+RECORD_LINE_LIMIT = 64 * 1024 * 1024
 
 
-@router.post("/convert")
-async def convert_pdf(
-    file: UploadFile = File(...),
-    separate_sheets: bool = Query(True, description="Put each table in a separate sheet"),
-    flavor: str = Query("auto", description="Table detection: 'auto', 'lattice' (bordered), or 'stream' (borderless)")
-):
+async def stream_pdf_tables(input_path: Path, output_path: Path,
+                            separate_sheets: bool = True,
+                            flavor: str = "auto",
+                            hints: Optional[Dict] = None,
+                            build_xlsx: bool = False) -> AsyncIterator[Dict]:
     """
-    Extract tables from PDF and convert to Excel (XLSX).
+    Extract tables page by page in a subprocess and yield one record per
+    event as soon as it is printed: hints, table (page, bbox, accuracy,
+    rows), page, then done or error. With build_xlsx the workbook is saved
+    to output_path before done. The subprocess is killed if the consumer
+    stops early (client disconnect) or the timeout is reached.
+    """
+    api_dir = str(Path(__file__).parent.absolute())
+    hints_json = json.dumps(hints or {})
 
-    - Accepts: .pdf files
-    - Returns: XLSX file directly
-    - Automatically detects bordered and borderless tables
-    - Each table can be placed in a separate sheet or combined
+    script = f'''
+import sys
+import json
+sys.path.insert(0, "{api_dir}")
 
-    Options:
-    - separate_sheets: If true, each table goes to its own sheet
-    - flavor: 'auto' (tries both), 'lattice' (for bordered tables), 'stream' (for borderless)
-    """
+def emit(record):
+    print("{RECORD_PREFIX}" + json.dumps(record), flush=True)
 
+try:
+    import fitz
+    from pdf_to_excel import PDFToExcelConverter, table_record
+    from pdf_render import parse_page_range
+    from table_hints import extraction_hints
+
+    hints = extraction_hints("{input_path}", flavor="{flavor}", **json.loads({hints_json!r}))
+    emit(dict(type="hints", **hints))
+
+    with fitz.open("{input_path}") as doc:
+        numbers = [i + 1 for i in parse_page_range(hints["pages"], doc.page_count)]
+
+    converter = PDFToExcelConverter("{input_path}")
+    tables = []
+    count = 0
+    for number, page_tables in converter.iter_page_tables(
+        numbers, hints["flavor"], hints["table_areas"], hints["columns"]
+    ):
+        for table in page_tables:
+            emit(dict(type="table", index=count, **table_record(table)))
+            count += 1
+        if {build_xlsx}:
+            tables.extend(page_tables)
+        emit(dict(type="page", page=number, tables=len(page_tables)))
+
+    if {build_xlsx}:
+        converter.save_tables(tables, "{output_path}", separate_sheets={separate_sheets})
+    emit(dict(type="done", pages=len(numbers), tables=count))
+except Exception as e:
+    import traceback
+    traceback.print_exc()
+    emit(dict(type="error", detail=str(e)))
+    sys.exit(1)
+'''
+
+    process = await asyncio.create_subprocess_exec(
+        "python3", "-c", script,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        limit=RECORD_LINE_LIMIT
+    )
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PDFToExcelConfig.CONVERSION_TIMEOUT
+    log = deque(maxlen=20)
+    finished = False
+
+    try:
+        while True:
+            try:
+                line = await asyncio.wait_for(process.stdout.readline(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                yield {"type": "error", "detail": "PDF to Excel extraction timed out"}
+                finished = True
+                break
+            if not line:
+                break
+            text = line.decode("utf-8", errors="replace").rstrip("\n")
+            if not text.startswith(RECORD_PREFIX):
+                log.append(text)
+                continue
+            record = json.loads(text[len(RECORD_PREFIX):])
+            finished = record["type"] in ("done", "error")
+            yield record
+
+        if not finished:
+            await process.wait()
+            tail = "\n".join(log)
+            yield {"type": "error", "detail": f"PDF to Excel extraction failed (exit {process.returncode}): {tail}"}
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        if log:
+            print("[PDF→Excel] stream log:\n" + "\n".join(log))
+
+
+# ============== Validation ==============
+def validate_request(file: UploadFile, flavor: str,
+                     table_areas: Optional[List[str]],
+                     columns: Optional[List[str]]) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+    """Check the upload and options; returns the parsed table areas and columns"""
     # Validate file extension
     filename = file.filename or "document.pdf"
     ext = filename.lower().split('.')[-1]
@@ -146,6 +258,15 @@ async def convert_pdf(
             detail="Invalid flavor. Use 'auto', 'lattice', or 'stream'."
         )
 
+    # Validate extraction hints
+    try:
+        table_areas = parse_table_areas(table_areas)
+        columns = parse_columns(columns, table_areas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if columns and flavor == "lattice":
+        raise HTTPException(status_code=400, detail="Column separators need the 'stream' or 'auto' flavor.")
+
     # Validate file size
     file.file.seek(0, 2)
     file_size = file.file.tell()
@@ -157,12 +278,56 @@ async def convert_pdf(
             detail=f"File too large. Maximum size is {PDFToExcelConfig.MAX_FILE_SIZE / (1024*1024):.0f}MB"
         )
 
+    return table_areas, columns
+
+
+# ============== API Endpoints ==============
+@router.get("/health")
+async def health_check():
+    """Health check for PDF to Excel service"""
+    return {
+        "service": "pdf-to-excel",
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@router.post("/convert")
+async def convert_pdf(
+    request: Request,
+    file: UploadFile = File(...),
+    separate_sheets: bool = Query(True, description="Put each table in a separate sheet"),
+    flavor: str = Query("auto", description="Table detection: 'auto', 'lattice' (bordered), or 'stream' (borderless)"),
+    pages: Optional[str] = Query(None, pattern=r"^(all|\d*-?\d*(,\d*-?\d*)*)$", description="Pages to scan, e.g. 1-3,7 (default: all)"),
+    table_areas: Optional[List[str]] = Query(None, description="Table region x1,y1,x2,y2 in PDF points (top-left, bottom-right; origin bottom-left). Repeat for several tables"),
+    columns: Optional[List[str]] = Query(None, description="Column separators x1,x2,... for each table area (stream)"),
+    remember: bool = Query(False, description="Remember these hints for PDFs with the same template"),
+    use_template: bool = Query(True, description="Apply remembered hints when none are given"),
+    preview: Optional[int] = Query(None, ge=1, le=PDFToExcelConfig.MAX_PREVIEW_PAGES, description="Only scan the first N selected pages")
+):
+    """
+    Extract tables from PDF and convert to Excel (XLSX).
+
+    - Accepts: .pdf files
+    - Returns: XLSX file directly
+    - Automatically detects bordered and borderless tables
+    - Each table can be placed in a separate sheet or combined
+
+    Options:
+    - separate_sheets: If true, each table goes to its own sheet
+    - flavor: 'auto' (tries both), 'lattice' (for bordered tables), 'stream' (for borderless)
+    - pages, table_areas, columns: only extract these regions; with
+      remember=true they are reused for later PDFs of the same template
+      (returned in the X-Table-Template header)
+    - preview: only the first N of the selected pages
+    """
+
+    filename = file.filename or "document.pdf"
+    table_areas, columns = validate_request(file, flavor, table_areas, columns)
+
     # Generate unique job ID
     job_id = str(uuid.uuid4())
-    upload_dir = PDFToExcelConfig.UPLOAD_DIR / job_id
-    output_dir = PDFToExcelConfig.OUTPUT_DIR / job_id
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    output_dir.mkdir(parents=True, exist_ok=True)
+    upload_dir, output_dir = workspace.create(job_id)
 
     # Save uploaded file
     input_path = upload_dir / filename
@@ -177,18 +342,34 @@ async def convert_pdf(
         print(f"[PDF→Excel] Converting: {filename} (job: {job_id}, flavor: {flavor})")
 
         # Convert
-        result_path = await convert_pdf_to_excel(
+        applied = await convert_pdf_to_excel(
             input_path, output_path,
             separate_sheets=separate_sheets,
-            flavor=flavor
+            flavor=flavor,
+            hints={
+                "pages": pages,
+                "table_areas": table_areas,
+                "columns": columns,
+                "remember": remember,
+                "use_template": use_template,
+                "max_pages": preview,
+            }
         )
 
-        print(f"[PDF→Excel] Success: {result_path.name}")
+        print(f"[PDF→Excel] Success: {output_path.name} (hints: {applied.get('source')}, pages: {applied.get('pages')})")
 
-        return FileResponse(
-            result_path,
+        headers = {"X-Table-Hints": applied.get("source", "none")}
+        if preview:
+            headers["X-Preview-Pages"] = str(preview)
+        if applied.get("template"):
+            headers["X-Table-Template"] = applied["template"]
+
+        return await file_download(
+            request,
+            output_path,
             filename=output_filename,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers=headers
         )
 
     except Exception as e:
@@ -196,6 +377,113 @@ async def convert_pdf(
         raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
 
 
+@router.post("/stream")
+async def stream_tables(
+    request: Request,
+    file: UploadFile = File(...),
+    xlsx: bool = Query(False, description="Also build the XLSX; the done record links to it"),
+    separate_sheets: bool = Query(True, description="Put each table in a separate sheet (with xlsx)"),
+    flavor: str = Query("auto", description="Table detection: 'auto' (chosen per page), 'lattice' (bordered), or 'stream' (borderless)"),
+    pages: Optional[str] = Query(None, pattern=r"^(all|\d*-?\d*(,\d*-?\d*)*)$", description="Pages to scan, e.g. 1-3,7 (default: all)"),
+    table_areas: Optional[List[str]] = Query(None, description="Table region x1,y1,x2,y2 in PDF points (top-left, bottom-right; origin bottom-left). Repeat for several tables"),
+    columns: Optional[List[str]] = Query(None, description="Column separators x1,x2,... for each table area (stream)"),
+    remember: bool = Query(False, description="Remember these hints for PDFs with the same template"),
+    use_template: bool = Query(True, description="Apply remembered hints when none are given"),
+    preview: Optional[int] = Query(None, ge=1, le=PDFToExcelConfig.MAX_PREVIEW_PAGES, description="Only scan the first N selected pages")
+):
+    """
+    Extract tables from a PDF as NDJSON, one record per line, sent as soon
+    as each page is processed.
+
+    Records, by "type":
+    - hints: pages, flavor, areas and template that are applied
+    - table: index, page, bbox (x1,y1,x2,y2 like table_areas), accuracy, flavor, shape, rows
+    - page: a page is finished, with its table count
+    - done: pages, tables and, with xlsx=true, the URL of the workbook
+    - error: detail (always the last record)
+
+    Disconnecting stops the extraction.
+    """
+    filename = file.filename or "document.pdf"
+    table_areas, columns = validate_request(file, flavor, table_areas, columns)
+
+    job_id = str(uuid.uuid4())
+    upload_dir, output_dir = workspace.create(job_id)
+    input_path = upload_dir / filename
+    output_path = output_dir / (filename.rsplit('.', 1)[0] + '.xlsx')
+
+    async with aiofiles.open(input_path, 'wb') as out_file:
+        await out_file.write(await file.read())
+
+    print(f"[PDF→Excel] Streaming tables: {filename} (job: {job_id}, flavor: {flavor})")
+
+    records = stream_pdf_tables(
+        input_path, output_path,
+        separate_sheets=separate_sheets,
+        flavor=flavor,
+        hints={
+            "pages": pages,
+            "table_areas": table_areas,
+            "columns": columns,
+            "remember": remember,
+            "use_template": use_template,
+            "max_pages": preview,
+        },
+        build_xlsx=xlsx
+    )
+
+    async def stream():
+        keep = False
+        try:
+            async for record in records:
+                if record["type"] == "done" and xlsx and output_path.exists():
+                    record["xlsx"] = f"{router.prefix}/results/{job_id}"
+                    keep = True
+                yield (json.dumps(record) + "\n").encode("utf-8")
+                if await request.is_disconnected():
+                    print(f"[PDF→Excel] Client left, stopping job {job_id}")
+                    break
+        finally:
+            await records.aclose()
+            if not keep:
+                await asyncio.to_thread(workspace.remove, job_id)
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Job-ID": job_id}
+    )
+
+
+@router.get("/results/{job_id}")
+async def download_result(request: Request, job_id: str):
+    """Workbook built by /stream?xlsx=true (kept for the usual retention period)"""
+    output_dir = workspace.output_dir(job_id)
+    results = sorted(output_dir.glob("*.xlsx")) if output_dir else []
+    if not results:
+        raise HTTPException(status_code=404, detail="Result not found")
+    return await file_download(
+        request,
+        results[0],
+        filename=results[0].name,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+
+@router.get("/templates")
+async def list_templates():
+    """Remembered extraction hints, by template id"""
+    return await asyncio.to_thread(templates.all)
+
+
+@router.delete("/templates/{template_id}")
+async def delete_template(template_id: str):
+    """Forget the hints remembered for a template"""
+    if not await asyncio.to_thread(templates.delete, template_id):
+        raise HTTPException(status_code=404, detail="Template not found")
+    return {"deleted": template_id}
+
+
 @router.get("/info")
 async def get_info():
     """Get information about this conversion service"""
@@ -209,6 +497,8 @@ async def get_info():
             "Multi-page PDF support",
             "Separate sheets per table or combined",
             "Auto-adjusts column widths",
+            "Page ranges, table areas and column separators, remembered per template",
+            "NDJSON streaming of tables page by page (/stream)",
             "Preserves cell structure"
         ],
         "accepted_formats": ["pdf"],
@@ -217,6 +507,12 @@ async def get_info():
         "timeout_seconds": PDFToExcelConfig.CONVERSION_TIMEOUT,
         "options": {
             "separate_sheets": "Put each table in its own sheet (default: true)",
-            "flavor": "Table detection mode: 'auto', 'lattice', or 'stream' (default: 'auto')"
+            "flavor": "Table detection mode: 'auto', 'lattice', or 'stream' (default: 'auto')",
+            "pages": "Pages to scan, e.g. '1-3,7' (default: all)",
+            "table_areas": "Table regions 'x1,y1,x2,y2' in PDF points, repeatable",
+            "columns": "Column separators 'x1,x2,...' per table area (stream)",
+            "remember": "Save the hints for PDFs with the same template (default: false)",
+            "use_template": "Apply remembered hints when none are given (default: true)",
+            "preview": "Only scan the first N selected pages"
         }
     }
@@ -10,16 +10,243 @@ This converter:
 - Preserves spacing and alignment
 - Converts EXACTLY as the PDF appears
 
+Conversion modes:
+- exact: pdf2docx layout analysis on every page
+- auto:  a cheap PyMuPDF probe picks a strategy per page. Single-column
+         text pages flow straight into python-docx, pages that are one
+         scanned image embed that image as-is, and only pages with tables,
+         columns or vector graphics go through pdf2docx
+- fast:  never runs pdf2docx; every page is text flow or an embedded image
+
 Author: ToolGlid
 """
 
 import io
+import re
 from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Union
 from pdf2docx import Converter
 import fitz  # PyMuPDF as fallback
 
 
-def convert_pdf_to_word(input_path: str, output_path: str = None) -> str:
+# A PDF given as a path, or in memory (bytes, or a memoryview e.g. over an
+# mmap); in-memory PDFs are handed to MuPDF without a copy
+PDFSource = Union[str, bytes, memoryview]
+# A DOCX destination: a path, or any writable binary stream
+DocxTarget = Union[str, BinaryIO]
+
+MODES = ("fast", "exact", "auto")
+DEFAULT_MODE = "auto"
+
+# Page strategies
+TEXT, IMAGE, LAYOUT = "text", "image", "layout"
+
+MAX_SIMPLE_DRAWINGS = 8  # a few rules or underlines; more suggests tables or diagrams
+FULL_PAGE_IMAGE = 0.8  # share of the page an image must cover to count as a scan
+DOCX_IMAGE_TYPES = {"jpeg", "jpg", "png", "gif", "bmp", "tiff", "tif"}
+IMAGE_RENDER_DPI = 200
+
+
+def _overlaps(a: float, b: float, c: float, d: float) -> bool:
+    return min(b, d) - max(a, c) > 0
+
+
+def probe_page(page: "fitz.Page") -> str:
+    """
+    Pick a conversion strategy for one page without layout analysis:
+    IMAGE for a page that is a single large image and no text, TEXT for
+    single-column text (with at most a few rules), LAYOUT otherwise.
+    """
+    blocks = [b for b in page.get_text("blocks") if b[6] == 1 or b[4].strip()]
+    images = page.get_image_info()
+    page_area = abs(page.rect) or 1.0
+
+    if not any(b[6] == 0 for b in blocks):
+        if len(images) == 1 and abs(fitz.Rect(images[0]["bbox"]) & page.rect) / page_area >= FULL_PAGE_IMAGE:
+            return IMAGE
+        if not images:
+            return TEXT  # blank page
+
+    if len(page.get_cdrawings()) > MAX_SIMPLE_DRAWINGS:
+        return LAYOUT
+
+    # Blocks side by side (columns, stream tables, text beside a figure)
+    for i, a in enumerate(blocks):
+        for b in blocks[i + 1:]:
+            if _overlaps(a[1], a[3], b[1], b[3]) and not _overlaps(a[0], a[2], b[0], b[2]):
+                return LAYOUT
+    return TEXT
+
+
+def plan_pages(doc: "fitz.Document", mode: str = DEFAULT_MODE, max_pages: Optional[int] = None) -> List[str]:
+    """Strategy for every page (or the first max_pages) under a mode"""
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
+    count = min(len(doc), max_pages or len(doc))
+    if mode == "exact":
+        return [LAYOUT] * count
+
+    plan = [probe_page(doc[i]) for i in range(count)]
+    if mode == "fast":
+        plan = [TEXT if strategy == LAYOUT else strategy for strategy in plan]
+    return plan
+
+
+def _new_section(docx, width: float, height: float, margins=(0.0, 0.0, 0.0, 0.0)):
+    """Start a page the way pdf2docx does, so both kinds of page mix in one document"""
+    from docx.enum.section import WD_SECTION
+    from docx.shared import Pt
+
+    section = docx.add_section(WD_SECTION.NEW_PAGE) if docx.paragraphs else docx.sections[0]
+    section.page_width, section.page_height = Pt(width), Pt(height)
+    left, top, right, bottom = (Pt(max(0.0, m)) for m in margins)
+    section.left_margin, section.top_margin = left, top
+    section.right_margin, section.bottom_margin = right, bottom
+    return section
+
+
+def _font_name(font: str) -> str:
+    """'ABCDEF+Calibri-Bold' -> 'Calibri'"""
+    return re.split(r"[-,]", font.split("+")[-1])[0]
+
+
+def add_text_page(docx, page: "fitz.Page"):
+    """
+    Text-flow path: one paragraph per text block, one run per span (font,
+    size, bold, italic, colour), images in reading order. Lines inside a
+    block flow together so the text rewraps in Word.
+    """
+    from docx.shared import Pt, RGBColor
+
+    data = page.get_text("dict", sort=True)
+    blocks = [b for b in data["blocks"] if b["type"] == 1 or any(s["text"].strip() for l in b["lines"] for s in l["spans"])]
+    width, height = data["width"], data["height"]
+
+    if blocks:
+        left = min(b["bbox"][0] for b in blocks)
+        right = width - max(b["bbox"][2] for b in blocks)
+        top = min(b["bbox"][1] for b in blocks)
+        bottom = height - max(b["bbox"][3] for b in blocks)
+        margins = (left, top * 0.5, right, bottom * 0.5)
+    else:
+        margins = (72.0, 72.0, 72.0, 72.0)
+    _new_section(docx, width, height, margins)
+
+    previous_bottom = margins[1]
+    for block in blocks:
+        x0, y0, x1, y1 = block["bbox"]
+        paragraph = docx.add_paragraph()
+        fmt = paragraph.paragraph_format
+        fmt.space_before = Pt(max(0.0, y0 - previous_bottom))
+        fmt.space_after = Pt(0)
+        fmt.left_indent = Pt(max(0.0, x0 - margins[0]))
+        previous_bottom = y1
+
+        if block["type"] == 1:
+            ext = block.get("ext", "png").lower()
+            image = block["image"] if ext in DOCX_IMAGE_TYPES else page.get_pixmap(
+                clip=block["bbox"], dpi=IMAGE_RENDER_DPI
+            ).tobytes("png")
+            paragraph.add_run().add_picture(io.BytesIO(image), width=Pt(x1 - x0))
+            continue
+
+        for n, line in enumerate(block["lines"]):
+            for span in line["spans"]:
+                text = span["text"]
+                if n and span is line["spans"][0]:
+                    text = " " + text.lstrip()
+                run = paragraph.add_run(text)
+                run.font.name = _font_name(span["font"])
+                run.font.size = Pt(round(span["size"] * 2) / 2)
+                run.font.bold = bool(span["flags"] & 16)
+                run.font.italic = bool(span["flags"] & 2)
+                if span["color"]:
+                    run.font.color.rgb = RGBColor.from_string(f"{span['color']:06X}")
+
+
+def add_image_page(docx, page: "fitz.Page") -> bool:
+    """
+    Image-only path: place the page's image at its position, reusing the
+    original encoded stream when Word can take it and it is upright.
+    Returns False if the page has no usable image.
+    """
+    from docx.shared import Pt
+
+    infos = page.get_image_info(xrefs=True)
+    if len(infos) != 1:
+        return False
+    info = infos[0]
+    bbox = fitz.Rect(info["bbox"]) & page.rect
+    if bbox.is_empty:
+        return False
+
+    image = None
+    a, b, c, d, _, _ = info["transform"]
+    if info.get("xref") and b == 0 and c == 0 and a > 0 and d > 0:
+        extracted = page.parent.extract_image(info["xref"])
+        if extracted and extracted["ext"].lower() in DOCX_IMAGE_TYPES and not extracted.get("smask"):
+            image = extracted["image"]
+    if image is None:
+        image = page.get_pixmap(clip=bbox, dpi=IMAGE_RENDER_DPI).tobytes("png")
+
+    width, height = page.rect.width, page.rect.height
+    _new_section(docx, width, height, (bbox.x0, bbox.y0, width - bbox.x1, 0.0))
+    paragraph = docx.add_paragraph()
+    paragraph.paragraph_format.space_before = Pt(0)
+    paragraph.paragraph_format.space_after = Pt(0)
+    # A hair under the box so the picture never spills onto an extra page
+    paragraph.add_run().add_picture(io.BytesIO(image), width=Pt(bbox.width), height=Pt(bbox.height * 0.98))
+    return True
+
+
+def open_converter(source: PDFSource) -> Converter:
+    """pdf2docx Converter over a path or an in-memory PDF"""
+    if isinstance(source, (bytes, memoryview)):
+        return Converter(stream=source)
+    return Converter(str(source))
+
+
+def convert_adaptive(source: PDFSource, output: DocxTarget, mode: str = DEFAULT_MODE,
+                     plan: Optional[List[str]] = None, max_pages: Optional[int] = None) -> Dict[str, int]:
+    """
+    Convert with a per-page strategy (see plan_pages). pdf2docx parses only
+    the LAYOUT pages; every page is then written in order into one
+    python-docx document. Returns the number of pages per strategy.
+    """
+    from docx import Document
+
+    cv = open_converter(source)
+    try:
+        doc = cv.fitz_doc
+        plan = plan or plan_pages(doc, mode, max_pages)
+
+        layout_pages = [i for i, strategy in enumerate(plan) if strategy == LAYOUT]
+        settings = cv.default_settings
+        if layout_pages:
+            cv.parse(pages=layout_pages, **settings)
+
+        docx = Document()
+        for i, strategy in enumerate(plan):
+            if strategy == IMAGE and add_image_page(docx, doc[i]):
+                continue
+            if strategy == LAYOUT and cv.pages[i].finalized:
+                try:
+                    cv.pages[i].make_docx(docx)
+                    continue
+                except Exception as e:
+                    if settings["raw_exceptions"]:
+                        raise
+                    print(f"[PDF→Word] Page {i + 1}: layout failed ({e}), using text flow")
+            add_text_page(docx, doc[i])
+
+        docx.save(output)
+    finally:
+        cv.close()
+
+    return {strategy: plan.count(strategy) for strategy in (TEXT, IMAGE, LAYOUT)}
+
+
+def convert_pdf_to_word(input_path: str, output_path: str = None, mode: str = DEFAULT_MODE) -> str:
     """
     Convert PDF to Word with exact fidelity using pdf2docx.
 
@@ -33,6 +260,7 @@ def convert_pdf_to_word(input_path: str, output_path: str = None) -> str:
     Args:
         input_path: Path to input PDF file
         output_path: Path to output DOCX file (optional)
+        mode: "exact", "auto" or "fast" (see module docstring)
 
     Returns:
         Path to created Word document
@@ -41,24 +269,34 @@ def convert_pdf_to_word(input_path: str, output_path: str = None) -> str:
         output_path = str(Path(input_path).with_suffix('.docx'))
 
     try:
-        # Use pdf2docx for high-fidelity conversion
-        cv = Converter(input_path)
-
-        # Convert with all formatting preserved
-        cv.convert(
-            output_path,
-            start=0,
-            end=None,  # Convert all pages
-        )
-        cv.close()
-
+        # pdf2docx for high-fidelity conversion, on the pages that need it
+        convert_pdf_to_word_stream(input_path, output_path, mode)
         return output_path
 
     except Exception as e:
         raise Exception(f"PDF to Word conversion failed: {str(e)}")
 
 
-def convert_pdf_bytes_to_word_bytes(pdf_bytes: bytes) -> bytes:
+def convert_pdf_to_word_stream(source: PDFSource, output: DocxTarget, mode: str = DEFAULT_MODE,
+                               max_pages: Optional[int] = None) -> Dict[str, int]:
+    """
+    Convert a PDF path or in-memory PDF straight into a path or writable
+    stream (BytesIO, a spooled temp file, a response body), with no
+    intermediate files. max_pages stops after the first pages (previews).
+    Returns pages per strategy (empty in exact mode).
+    """
+    if mode != "exact":
+        return convert_adaptive(source, output, mode, max_pages=max_pages)
+
+    cv = open_converter(source)
+    try:
+        cv.convert(output, start=0, end=max_pages)
+    finally:
+        cv.close()
+    return {}
+
+
+def convert_pdf_bytes_to_word_bytes(pdf_bytes: Union[bytes, memoryview], mode: str = DEFAULT_MODE) -> bytes:
     """
     Convert PDF bytes to Word document bytes with exact fidelity.
 
@@ -67,55 +305,24 @@ def convert_pdf_bytes_to_word_bytes(pdf_bytes: bytes) -> bytes:
     2. Extracts all formatting information
     3. Converts to Word preserving EVERYTHING exactly
 
+    The PDF is read from memory and the document built in memory; nothing
+    touches the disk.
+
     Args:
-        pdf_bytes: PDF file as bytes
+        pdf_bytes: PDF file as bytes (or a memoryview)
+        mode: "exact", "auto" or "fast" (see module docstring)
 
     Returns:
         Word document as bytes
     """
-    import tempfile
-    import os
-
-    # Create temporary files for conversion
-    temp_pdf = None
-    temp_docx = None
-
     try:
-        # Write PDF bytes to temp file
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
-            f.write(pdf_bytes)
-            temp_pdf = f.name
-
-        # Create temp output path
-        temp_docx = temp_pdf.replace('.pdf', '.docx')
-
-        # Convert using pdf2docx for exact fidelity
-        cv = Converter(temp_pdf)
-        cv.convert(temp_docx, start=0, end=None)
-        cv.close()
-
-        # Read the converted document
-        with open(temp_docx, 'rb') as f:
-            docx_bytes = f.read()
-
-        return docx_bytes
+        output = io.BytesIO()
+        convert_pdf_to_word_stream(pdf_bytes, output, mode)
+        return output.getvalue()
 
     except Exception as e:
         raise Exception(f"PDF to Word conversion failed: {str(e)}")
 
-    finally:
-        # Clean up temp files
-        if temp_pdf and os.path.exists(temp_pdf):
-            try:
-                os.remove(temp_pdf)
-            except:
-                pass
-        if temp_docx and os.path.exists(temp_docx):
-            try:
-                os.remove(temp_docx)
-            except:
-                pass
-
 
 class PDFToWordConverter:
     """
@@ -129,10 +336,17 @@ class PDFToWordConverter:
     - Everything exactly as it appears in the PDF
     """
 
-    def __init__(self, pdf_path: str):
-        """Initialize with PDF file path."""
+    def __init__(self, pdf_path: PDFSource, mode: str = DEFAULT_MODE, max_pages: Optional[int] = None):
+        """
+        Initialize with PDF file path (or in-memory PDF), conversion mode
+        (exact, auto or fast) and optionally how many leading pages to convert.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
         self.pdf_path = pdf_path
-        self.converter = None
+        self.mode = mode
+        self.max_pages = max_pages
+        self.strategies: Dict[str, int] = {}
 
     def convert(self, output_path: str = None) -> str:
         """
@@ -145,69 +359,53 @@ class PDFToWordConverter:
             Path to the created Word document.
         """
         if output_path is None:
+            if not isinstance(self.pdf_path, str):
+                raise ValueError("output_path is required for an in-memory PDF")
             output_path = str(Path(self.pdf_path).with_suffix('.docx'))
 
         try:
-            self.converter = Converter(self.pdf_path)
-            self.converter.convert(output_path, start=0, end=None)
-            self.converter.close()
+            self.strategies = convert_pdf_to_word_stream(self.pdf_path, output_path, self.mode, self.max_pages)
             return output_path
         except Exception as e:
-            if self.converter:
-                self.converter.close()
             raise Exception(f"Conversion failed: {str(e)}")
 
     def convert_to_bytes(self) -> bytes:
         """
-        Convert PDF to Word and return as bytes.
+        Convert PDF to Word and return as bytes (built in memory).
 
         Returns:
             Word document as bytes
         """
-        import tempfile
-        import os
+        output = io.BytesIO()
+        self.convert_to_stream(output)
+        return output.getvalue()
 
-        temp_docx = None
+    def convert_to_stream(self, output: BinaryIO) -> BinaryIO:
+        """
+        Convert PDF to Word, writing the document into a binary stream.
 
+        Returns:
+            The stream, positioned after the document
+        """
         try:
-            # Create temp output path
-            temp_docx = tempfile.mktemp(suffix='.docx')
-
-            # Convert
-            self.converter = Converter(self.pdf_path)
-            self.converter.convert(temp_docx, start=0, end=None)
-            self.converter.close()
-
-            # Read bytes
-            with open(temp_docx, 'rb') as f:
-                docx_bytes = f.read()
-
-            return docx_bytes
-
+            self.strategies = convert_pdf_to_word_stream(self.pdf_path, output, self.mode, self.max_pages)
+            return output
         except Exception as e:
-            if self.converter:
-                self.converter.close()
             raise Exception(f"Conversion failed: {str(e)}")
 
-        finally:
-            if temp_docx and os.path.exists(temp_docx):
-                try:
-                    os.remove(temp_docx)
-                except:
-                    pass
-
 
 # CLI interface
 if __name__ == "__main__":
     import sys
 
     if len(sys.argv) < 2:
-        print("Usage: python pdf_to_word.py <input.pdf> [output.docx]")
+        print("Usage: python pdf_to_word.py <input.pdf> [output.docx] [fast|exact|auto]")
         sys.exit(1)
 
     input_file = sys.argv[1]
     output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    mode = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_MODE
 
-    print(f"Converting {input_file} with exact fidelity...")
-    result = convert_pdf_to_word(input_file, output_file)
+    print(f"Converting {input_file} ({mode} mode)...")
+    result = convert_pdf_to_word(input_file, output_file, mode)
     print(f"Created: {result}")
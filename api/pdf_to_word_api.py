@@ -4,6 +4,7 @@ This API handles ONLY PDF to Word (DOCX) conversions
 """
 
 import os
+import json
 import uuid
 import asyncio
 import tempfile
@@ -11,10 +12,12 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, File, UploadFile, HTTPException, Request, Query
 import aiofiles
 
+from workspace import Workspace
+from downloads import file_download
+
 
 # ============== Configuration ==============
 class PDFToWordConfig:
@@ -22,6 +25,7 @@ class PDFToWordConfig:
     OUTPUT_DIR = Path(tempfile.gettempdir()) / "pdf_to_word_outputs"
     MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
     CONVERSION_TIMEOUT = 300  # 5 minutes for complex PDFs
+    MAX_PREVIEW_PAGES = 20
 
     @classmethod
     def ensure_dirs(cls):
@@ -32,37 +36,44 @@ class PDFToWordConfig:
 # Initialize directories
 PDFToWordConfig.ensure_dirs()
 
+# Job directories are bucketed by hour so retention can drop whole buckets
+workspace = Workspace(PDFToWordConfig.UPLOAD_DIR, PDFToWordConfig.OUTPUT_DIR)
+
 
 # ============== Router ==============
 router = APIRouter(prefix="/pdf-to-word", tags=["PDF to Word"])
 
 
 # ============== Converter ==============
-async def convert_pdf_to_word(input_path: Path, output_path: Path) -> Path:
+async def convert_pdf_to_word(input_path: Path, output_path: Path, mode: str = "auto",
+                              max_pages: Optional[int] = None) -> Path:
     """
     Convert PDF to Word document using our custom high-quality converter.
-    Uses PyMuPDF + python-docx for accurate conversion.
+    Uses PyMuPDF + python-docx for accurate conversion; in auto mode
+    pdf2docx only runs on pages with tables or complex layout.
+    max_pages converts only the first N pages (previews).
     """
 
     # Get the directory where this script is located
     api_dir = str(Path(__file__).parent.absolute())
 
     script = f'''
-import sys
+import sys, json
 sys.path.insert(0, "{api_dir}")
 
 try:
     from pdf_to_word import PDFToWordConverter
 
-    converter = PDFToWordConverter("{input_path}")
+    converter = PDFToWordConverter("{input_path}", mode="{mode}", max_pages={max_pages!r})
     converter.convert("{output_path}")
     print("SUCCESS")
+    print("METRICS " + json.dumps({{"strategies": converter.strategies}}))
 except ImportError as e:
     # Fallback to pdf2docx if custom converter not available
     print(f"FALLBACK: {{e}}")
     from pdf2docx import Converter
     cv = Converter("{input_path}")
-    cv.convert("{output_path}")
+    cv.convert("{output_path}", end={max_pages!r})
     cv.close()
     print("SUCCESS")
 except Exception as e:
@@ -96,6 +107,10 @@ except Exception as e:
         print(f"[PDF→Word] stderr: {stderr_str}")
 
     if "SUCCESS" in stdout_str and output_path.exists():
+        for line in stdout_str.splitlines():
+            if line.startswith("METRICS "):
+                metrics = json.loads(line[len("METRICS "):])
+                print(f"[PDF→Word] Page strategies: {metrics['strategies']}")
         return output_path
 
     error_msg = stderr_str if stderr_str else stdout_str
@@ -115,7 +130,12 @@ async def health_check():
 
 @router.post("/convert")
 async def convert_pdf(
+    request: Request,
     file: UploadFile = File(...),
+    mode: str = Query("auto", pattern="^(fast|exact|auto)$",
+                      description="exact: full layout analysis on every page; auto: only where needed; fast: never"),
+    preview: Optional[int] = Query(None, ge=1, le=PDFToWordConfig.MAX_PREVIEW_PAGES,
+                                   description="Convert only the first N pages"),
 ):
     """
     Convert PDF to Word document (DOCX).
@@ -123,6 +143,9 @@ async def convert_pdf(
     - Accepts: .pdf files
     - Returns: DOCX file directly
     - Preserves text formatting, images, tables, and layout
+    - mode=auto picks text flow, direct image embedding or full layout
+      analysis per page
+    - preview=N converts only the first N pages
     """
 
     # Validate file extension
@@ -148,10 +171,7 @@ async def convert_pdf(
 
     # Generate unique job ID
     job_id = str(uuid.uuid4())
-    upload_dir = PDFToWordConfig.UPLOAD_DIR / job_id
-    output_dir = PDFToWordConfig.OUTPUT_DIR / job_id
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    output_dir.mkdir(parents=True, exist_ok=True)
+    upload_dir, output_dir = workspace.create(job_id)
 
     # Save uploaded file
     input_path = upload_dir / filename
@@ -163,17 +183,19 @@ async def convert_pdf(
             content = await file.read()
             await out_file.write(content)
 
-        print(f"[PDF→Word] Converting: {filename} (job: {job_id})")
+        print(f"[PDF→Word] Converting: {filename} ({mode} mode, job: {job_id})")
 
         # Convert
-        result_path = await convert_pdf_to_word(input_path, output_path)
+        result_path = await convert_pdf_to_word(input_path, output_path, mode, max_pages=preview)
 
         print(f"[PDF→Word] Success: {result_path.name}")
 
-        return FileResponse(
+        return await file_download(
+            request,
             result_path,
             filename=output_filename,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            headers={"X-Preview-Pages": str(preview)} if preview else None
         )
 
     except Exception as e:
@@ -195,6 +217,7 @@ async def get_info():
             "Maintains paragraph structure",
             "Heading detection"
         ],
+        "modes": ["auto", "fast", "exact"],
         "accepted_formats": ["pdf"],
         "output_format": "docx",
         "max_file_size_mb": PDFToWordConfig.MAX_FILE_SIZE / (1024 * 1024),
@@ -0,0 +1,456 @@
+"""
+Spreadsheet Conversion
+Streaming CSV <-> XLSX/XLS conversion in bounded memory.
+
+CSV -> XLSX:
+- Encoding (BOM, UTF-8, cp1252) and delimiter are sniffed from the head of
+  the file unless given
+- Rows are read in chunks and written to a write-only workbook, so only one
+  chunk is ever in memory
+- Column types are inferred with vectorised pandas operations: integers,
+  decimals, booleans and ISO dates/datetimes become real cells instead of
+  text. Values like "007" or 16+ digit IDs stay text so nothing is
+  silently changed.
+- A column's type is settled by the first chunk in which it has values
+  (up to CHUNK_ROWS rows) and then kept, so a column never switches type
+  partway down the sheet. Later chunks may only widen it (int -> float,
+  date -> datetime); a later value that does not fit, e.g. "007" or "n/a"
+  in a numeric column, is written as a text cell on its own and the rest
+  of the column keeps its type.
+- Past Excel's 1,048,576-row limit the data rolls over into a new sheet,
+  repeating the header row
+
+XLSX/XLS -> CSV:
+- XLSX is read in openpyxl's read-only mode, row by row, so only the
+  shared-strings table is held in memory however large the sheet is
+- Legacy XLS is read with xlrd, loading one sheet at a time
+- One sheet (by index or name), or every sheet into a ZIP; large
+  workbooks export their sheets in parallel processes
+
+Author: ToolGlid
+"""
+
+import codecs
+import csv
+import io
+import itertools
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+from openpyxl import Workbook
+
+
+EXCEL_MAX_ROWS = 1_048_576
+CHUNK_ROWS = 20_000
+SNIFF_BYTES = 1024 * 1024
+DELIMITERS = ",;\t|"
+
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Column types, from narrowest; a settled column only ever widens (int -> float,
+# date -> datetime); values that do not fit it are written as text
+TEXT, INT, FLOAT, BOOL, DATE, DATETIME = "text", "int", "float", "bool", "date", "datetime"
+WIDENINGS = {(INT, FLOAT): FLOAT, (FLOAT, INT): FLOAT, (DATE, DATETIME): DATETIME, (DATETIME, DATE): DATETIME}
+
+LEADING_ZERO = r"^[+-]?0\d"
+ISO_DATE = r"^\d{4}-\d{2}-\d{2}"
+MAX_EXACT_DIGITS = 15  # Excel keeps 15 significant digits
+
+# All-sheets export: workbooks at least this big export sheets in parallel
+PARALLEL_MIN_BYTES = int(os.environ.get("SHEETS_PARALLEL_MIN_MB", "20")) * 1024 * 1024
+SHEET_WORKERS = int(os.environ.get("SHEET_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+# ============== Sniffing ==============
+def sniff_encoding(path: str) -> str:
+    """BOM if present, else UTF-8 if the head decodes, else cp1252 (or latin-1)"""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            # Incremental decode: a sequence cut at the sample boundary is fine
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+def sniff_dialect(path: str, encoding: str, delimiter: Optional[str] = None):
+    """csv dialect from the head of the file; an explicit delimiter wins"""
+    if delimiter:
+        class Explicit(csv.excel):
+            pass
+        Explicit.delimiter = delimiter
+        return Explicit
+
+    with open(path, "r", encoding=encoding, newline="") as f:
+        sample = f.read(SNIFF_BYTES // 4)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=DELIMITERS)
+    except csv.Error:
+        return csv.excel
+
+
+# ============== Type inference ==============
+def infer_column(values: pd.Series) -> Optional[str]:
+    """Narrowest type every non-empty value of a chunk column fits (None if all empty)"""
+    values = values[values.notna() & (values != "")].str.strip()
+    if values.empty:
+        return None
+
+    if values.str.lower().isin(("true", "false")).all():
+        return BOOL
+
+    if pd.to_numeric(values, errors="coerce").notna().all():
+        if values.str.contains(LEADING_ZERO).any():
+            return TEXT
+        if values.str.contains(r"[.eE]").any():
+            return FLOAT
+        digits = values.str.lstrip("+-").str.len()
+        return INT if (digits <= MAX_EXACT_DIGITS).all() else TEXT
+
+    if values.str.contains(ISO_DATE).all():
+        stamps = pd.to_datetime(values, format="ISO8601", errors="coerce")
+        if stamps.notna().all() and stamps.dt.tz is None:
+            return DATE if (values.str.len() == 10).all() else DATETIME
+
+    return TEXT
+
+
+def merge_types(current: Optional[str], chunk: Optional[str]) -> Optional[str]:
+    """Column type after another chunk: unchanged, widened, or text"""
+    if current is None or chunk is None or current == chunk:
+        return current or chunk
+    return WIDENINGS.get((current, chunk), TEXT)
+
+
+def fits(chunk: Optional[str], kind: Optional[str]) -> bool:
+    """True if values inferred as `chunk` can be written as `kind`"""
+    return chunk is None or merge_types(kind, chunk) == kind
+
+
+def fitting_values(values: pd.Series, kind: str) -> pd.Series:
+    """Per-value mask of a chunk column: True where the value can be written as `kind`"""
+    values = values.fillna("").str.strip()
+    if kind == BOOL:
+        return values.str.lower().isin(("true", "false"))
+    if kind in (INT, FLOAT):
+        decimal = values.str.contains(r"[.eE]")
+        exact = values.str.lstrip("+-").str.len() <= MAX_EXACT_DIGITS
+        numeric = pd.to_numeric(values, errors="coerce").notna() & ~values.str.contains(LEADING_ZERO)
+        return numeric & exact & ~decimal if kind == INT else numeric & (exact | decimal)
+    stamps = pd.to_datetime(values.where(values.str.contains(ISO_DATE)), format="ISO8601", errors="coerce", utc=True)
+    naive = ~values.str.contains(r"(?:Z|[+-]\d{2}:?\d{2})$") | (values.str.len() == 10)
+    return stamps.notna() & naive & ((values.str.len() == 10) if kind == DATE else True)
+
+
+def convert_fitting(values: pd.Series, kind: str) -> List:
+    """Cell values for a chunk column with some values that do not fit `kind`; those stay text"""
+    fit = fitting_values(values, kind)
+    converted = convert_column(values.where(fit), kind)
+    return [cell if ok or raw is pd.NA or raw == "" else raw for cell, ok, raw in zip(converted, fit, values)]
+
+
+def convert_column(values: pd.Series, kind: Optional[str]) -> List:
+    """Cell values for one chunk column whose values all fit `kind` (empty -> None)"""
+    empty = values.isna() | (values == "")
+
+    if kind in (None, TEXT):
+        converted = values
+    elif kind == BOOL:
+        converted = values.str.strip().str.lower() == "true"
+    elif kind == INT:
+        converted = pd.to_numeric(values.str.strip(), errors="coerce").astype("Int64")
+    elif kind == FLOAT:
+        converted = pd.to_numeric(values.str.strip(), errors="coerce")
+    else:
+        stamps = pd.to_datetime(values.str.strip(), format="ISO8601", errors="coerce")
+        converted = pd.Series(
+            stamps.dt.date if kind == DATE else stamps.dt.to_pydatetime(),
+            index=values.index,
+            dtype=object
+        )
+
+    return converted.astype(object).where(~empty, None).tolist()
+
+
+# ============== CSV -> XLSX ==============
+def _chunks(reader, size: int) -> Iterator[List[List[str]]]:
+    while True:
+        chunk = list(itertools.islice(reader, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def typed_first_row(row: List[str], types: Dict[int, Optional[str]], infer_types: bool = True) -> List:
+    """Convert first-row values that fit their column type; keep the rest as text"""
+    if not infer_types:
+        return list(row)
+    typed = []
+    for i, value in enumerate(row):
+        single = pd.Series([value], dtype="string")
+        kind = types.get(i)
+        typed.append(convert_column(single, kind)[0] if fits(infer_column(single), kind) else value)
+    return typed
+
+
+def is_header(row: List[str], types: Dict[int, Optional[str]]) -> bool:
+    """A first row is a header if some typed column has a value that does not fit"""
+    return any(
+        types.get(i) not in (None, TEXT) and not fits(infer_column(pd.Series([value], dtype="string")), types.get(i))
+        for i, value in enumerate(row)
+    )
+
+
+def csv_to_xlsx(
+    input_path: str,
+    output_path: str,
+    delimiter: Optional[str] = None,
+    encoding: Optional[str] = None,
+    infer_types: bool = True,
+    chunk_rows: int = CHUNK_ROWS,
+    max_rows: int = EXCEL_MAX_ROWS
+) -> Dict:
+    """
+    Stream a CSV into an XLSX. The first row is written as-is where it does
+    not fit the column types (i.e. a header) and repeated on every rollover
+    sheet. Returns stats: rows, sheets, encoding, delimiter.
+    """
+    encoding = encoding or sniff_encoding(input_path)
+    dialect = sniff_dialect(input_path, encoding, delimiter)
+
+    wb = Workbook(write_only=True)
+    sheets = [wb.create_sheet("Sheet1")]
+    sheet_rows = 0
+    total_rows = 0
+    header = None
+    types: Dict[int, Optional[str]] = {}
+
+    def append(row):
+        nonlocal sheet_rows
+        if sheet_rows >= max_rows:
+            sheets.append(wb.create_sheet(f"Sheet{len(sheets) + 1}"))
+            sheet_rows = 0
+            if header is not None:
+                sheets[-1].append(header)
+                sheet_rows += 1
+        sheets[-1].append(row)
+        sheet_rows += 1
+
+    with open(input_path, "r", encoding=encoding, newline="") as f:
+        reader = csv.reader(f, dialect)
+        first = next(reader, None)
+
+        for rows in _chunks(reader, chunk_rows):
+            frame = pd.DataFrame.from_records(rows)
+            width = max(frame.shape[1], len(first or []))
+            columns = []
+
+            for i in range(width):
+                if i < frame.shape[1]:
+                    values = frame[i].astype("string")
+                else:
+                    values = pd.Series([None] * len(frame), dtype="string")
+                if not infer_types:
+                    columns.append(convert_column(values, None))
+                    continue
+                chunk_kind = infer_column(values)
+                kind = types.get(i)
+                if kind is None:
+                    types[i] = chunk_kind
+                elif WIDENINGS.get((kind, chunk_kind)):
+                    types[i] = WIDENINGS[(kind, chunk_kind)]
+                if fits(chunk_kind, types[i]):
+                    columns.append(convert_column(values, types[i]))
+                else:
+                    columns.append(convert_fitting(values, types[i]))
+
+            if first is not None:
+                append(typed_first_row(first, types, infer_types))
+                if is_header(first, types):
+                    header = list(first)
+                first = None
+                total_rows += 1
+
+            for row in zip(*columns):
+                append(row)
+            total_rows += len(rows)
+
+        if first is not None:  # single-row file
+            append(first)
+            total_rows += 1
+
+    wb.save(output_path)
+    return {
+        "rows": total_rows,
+        "sheets": len(sheets),
+        "encoding": encoding,
+        "delimiter": dialect.delimiter,
+    }
+
+
+# ============== XLSX/XLS -> CSV ==============
+def is_xls(path: str) -> bool:
+    return Path(path).suffix.lower() == ".xls"
+
+
+def sheet_names(path: str) -> List[str]:
+    """Worksheet names in workbook order (chart sheets excluded)"""
+    if is_xls(path):
+        import xlrd
+        book = xlrd.open_workbook(path, on_demand=True)
+        try:
+            return book.sheet_names()
+        finally:
+            book.release_resources()
+
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return [ws.title for ws in wb.worksheets]
+    finally:
+        wb.close()
+
+
+def resolve_sheet(names: List[str], sheet: Union[int, str, None]) -> str:
+    """Sheet name from an index, a name, or a numeric string"""
+    if sheet is None or sheet == "":
+        sheet = 0
+    if isinstance(sheet, str) and sheet not in names and sheet.isdigit():
+        sheet = int(sheet)
+    if isinstance(sheet, int):
+        if not 0 <= sheet < len(names):
+            raise ValueError(f"Sheet index {sheet} out of range (workbook has {len(names)} sheets)")
+        return names[sheet]
+    if sheet not in names:
+        raise ValueError(f"No sheet named '{sheet}'")
+    return sheet
+
+
+def _xls_value(book, cell):
+    """Python value for an xlrd cell, matching what openpyxl yields for XLSX"""
+    import xlrd
+    if cell.ctype == xlrd.XL_CELL_EMPTY or cell.ctype == xlrd.XL_CELL_BLANK:
+        return None
+    if cell.ctype == xlrd.XL_CELL_NUMBER:
+        return int(cell.value) if cell.value.is_integer() else cell.value
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        return xlrd.xldate_as_datetime(cell.value, book.datemode)
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    if cell.ctype == xlrd.XL_CELL_ERROR:
+        return xlrd.error_text_from_code.get(cell.value)
+    return cell.value
+
+
+def iter_sheet_rows(path: str, name: str) -> Iterator[tuple]:
+    """Cell values of one sheet, row by row"""
+    if is_xls(path):
+        import xlrd
+        book = xlrd.open_workbook(path, on_demand=True)
+        try:
+            for row in book.sheet_by_name(name).get_rows():
+                yield tuple(_xls_value(book, cell) for cell in row)
+        finally:
+            book.release_resources()
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb[name].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def write_sheet_csv(path: str, name: str, out) -> int:
+    """Write one sheet as CSV to a text stream; returns the row count"""
+    writer = csv.writer(out)
+    rows = 0
+    for row in iter_sheet_rows(path, name):
+        writer.writerow(row)
+        rows += 1
+    return rows
+
+
+def sheet_to_csv(input_path: str, output_path: str, sheet: Union[int, str, None] = 0) -> Dict:
+    """Export one sheet (index or name) to a CSV file"""
+    name = resolve_sheet(sheet_names(input_path), sheet)
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        rows = write_sheet_csv(input_path, name, f)
+    return {"sheets": 1, "rows": rows}
+
+
+def csv_names(stem: str, names: List[str]) -> List[str]:
+    """Unique, filesystem-safe CSV entry names, one per sheet"""
+    taken, entries = set(), []
+    for name in names:
+        safe = re.sub(r"[^\w.-]+", "_", name).strip("_") or "sheet"
+        base = f"{stem}-{safe}"
+        entry, n = f"{base}.csv", 2
+        while entry.lower() in taken:
+            entry, n = f"{base}-{n}.csv", n + 1
+        taken.add(entry.lower())
+        entries.append(entry)
+    return entries
+
+
+def _sheet_task(input_path: str, name: str, output_path: str) -> int:
+    """Worker-process entry point: export one sheet to a CSV file"""
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        return write_sheet_csv(input_path, name, f)
+
+
+def all_sheets_to_zip(input_path: str, zip_path: str, workers: Optional[int] = None) -> Dict:
+    """
+    Export every sheet into a ZIP of CSVs. Small workbooks stream each sheet
+    straight into its ZIP entry; large ones export sheets in parallel
+    processes (each opens the workbook read-only on its own) and are
+    zipped as they finish.
+    """
+    names = sheet_names(input_path)
+    entries = csv_names(Path(input_path).stem, names)
+    workers = min(workers or SHEET_WORKERS, len(names))
+    parallel = workers > 1 and os.path.getsize(input_path) >= PARALLEL_MIN_BYTES
+    rows = 0
+
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        if not parallel:
+            for name, entry in zip(names, entries):
+                with zf.open(entry, "w", force_zip64=True) as raw:
+                    with io.TextIOWrapper(raw, encoding="utf-8", newline="") as out:
+                        rows += write_sheet_csv(input_path, name, out)
+        else:
+            with tempfile.TemporaryDirectory(dir=Path(zip_path).parent) as tmp:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [
+                        pool.submit(_sheet_task, input_path, name, os.path.join(tmp, entry))
+                        for name, entry in zip(names, entries)
+                    ]
+                    # Zip in workbook order; later sheets keep exporting meanwhile
+                    for future, entry in zip(futures, entries):
+                        rows += future.result()
+                        part = os.path.join(tmp, entry)
+                        zf.write(part, entry)
+                        os.remove(part)
+
+    return {"sheets": len(names), "rows": rows, "parallel": parallel}
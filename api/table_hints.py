@@ -0,0 +1,208 @@
+"""
+Table Hints
+Page ranges, table areas and column separators for PDF table extraction,
+remembered per document template.
+
+Camelot scans every page and the whole page area by default, and the auto
+flavor runs both detectors on all of it. A recurring report layout only
+needs a few regions on a few pages, so the hints for it can be given once
+(remember=true) and are reused for every PDF with the same template.
+
+- Table areas are "x1,y1,x2,y2" in PDF points: the top-left and bottom-right
+  corners, with the origin at the bottom-left of the page (Camelot's
+  convention).
+- Columns are "x1,x2,..." separators, one string per table area; they only
+  apply to the stream flavor.
+- The template is a fingerprint of the first page: its size and the header
+  text with numbers masked, so next month's report matches this month's.
+  Scanned pages have no text and never match a template.
+
+Author: ToolGlid
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from pdf_render import parse_page_range
+
+
+TEMPLATE_STORE = Path(os.environ.get(
+    "TABLE_TEMPLATES_FILE", str(Path(tempfile.gettempdir()) / "pdf_table_templates.json")
+))
+HEADER_BAND = 0.2  # Top share of the first page used for the fingerprint
+NUMBER = re.compile(r"\d+(?:[.,/:-]\d+)*")
+
+
+# ============== Parsing ==============
+def _numbers(spec: str, what: str) -> List[float]:
+    try:
+        return [float(v) for v in spec.split(",")]
+    except ValueError:
+        raise ValueError(f"Invalid {what} '{spec}': expected comma-separated numbers")
+
+
+def parse_table_areas(values: Optional[List[str]]) -> Optional[List[str]]:
+    """Validate table areas; each value may hold several areas separated by ';'"""
+    if not values:
+        return None
+    areas = []
+    for value in values:
+        for spec in filter(None, (s.strip() for s in value.split(";"))):
+            coords = _numbers(spec, "table area")
+            if len(coords) != 4:
+                raise ValueError(f"Invalid table area '{spec}': expected x1,y1,x2,y2")
+            x1, y1, x2, y2 = coords
+            if x2 <= x1 or y1 <= y2:
+                raise ValueError(f"Invalid table area '{spec}': expected top-left then bottom-right corner")
+            areas.append(",".join(f"{c:g}" for c in coords))
+    return areas or None
+
+
+def parse_columns(values: Optional[List[str]], table_areas: Optional[List[str]] = None) -> Optional[List[str]]:
+    """Validate column separators, one string per table area"""
+    if not values:
+        return None
+    columns = []
+    for value in values:
+        for spec in filter(None, (s.strip() for s in value.split(";"))):
+            separators = _numbers(spec, "columns")
+            if separators != sorted(separators):
+                raise ValueError(f"Invalid columns '{spec}': separators must be in ascending order")
+            columns.append(",".join(f"{c:g}" for c in separators))
+    if table_areas and len(columns) != len(table_areas):
+        raise ValueError(f"Got {len(columns)} column sets for {len(table_areas)} table areas")
+    return columns or None
+
+
+def camelot_pages(indices: List[int]) -> str:
+    """0-based page indices to Camelot's page string ("1,3,5-8")"""
+    parts = []
+    start = prev = None
+    for i in indices + [None]:
+        if start is not None and (i is None or i != prev + 1):
+            parts.append(str(start + 1) if start == prev else f"{start + 1}-{prev + 1}")
+            start = None
+        if i is not None:
+            if start is None:
+                start = i
+            prev = i
+    return ",".join(parts)
+
+
+# ============== Template fingerprint ==============
+def template_hash(doc: "fitz.Document") -> Optional[str]:
+    """Fingerprint of the first page's size and header text, or None without text"""
+    if doc.page_count == 0:
+        return None
+    page = doc[0]
+    rect = page.rect
+    band = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * HEADER_BAND)
+    words = [NUMBER.sub("#", w[4]) for w in page.get_text("words", clip=band, sort=True)]
+    if not words:
+        return None
+    key = f"{rect.width:.0f}x{rect.height:.0f}|{' '.join(words)}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+# ============== Template store ==============
+class TemplateStore:
+    """Hints per template in one JSON file, replaced atomically on every write"""
+
+    def __init__(self, path: Path = TEMPLATE_STORE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def all(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, template: str) -> Optional[Dict]:
+        return self.all().get(template)
+
+    def put(self, template: str, hints: Dict):
+        with self._lock:
+            templates = self.all()
+            templates[template] = hints
+            self._write(templates)
+
+    def delete(self, template: str) -> bool:
+        with self._lock:
+            templates = self.all()
+            if templates.pop(template, None) is None:
+                return False
+            self._write(templates)
+            return True
+
+    def _write(self, templates: Dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(templates, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+# ============== Resolution ==============
+def extraction_hints(
+    pdf_path: str,
+    pages: Optional[str] = None,
+    table_areas: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None,
+    flavor: str = "auto",
+    remember: bool = False,
+    use_template: bool = True,
+    max_pages: Optional[int] = None,
+    store: Optional[TemplateStore] = None
+) -> Dict:
+    """
+    Resolve the hints for one PDF. Hints given with the request win; without
+    any, the remembered hints for the PDF's template are used. remember=True
+    saves the request's hints under the template. max_pages keeps only the
+    first N selected pages (previews).
+
+    Returns {template, source, pages, flavor, table_areas, columns}, where
+    pages is ready for camelot.read_pdf.
+    """
+    store = store or TemplateStore()
+    with fitz.open(pdf_path) as doc:
+        count = doc.page_count
+        template = template_hash(doc) if (remember or use_template) else None
+
+    given = {
+        "pages": pages,
+        "flavor": flavor if flavor != "auto" else None,
+        "table_areas": table_areas,
+        "columns": columns,
+    }
+    hints, source = given, "request"
+    if not any(given.values()):
+        source = "none"
+        if use_template and template:
+            stored = store.get(template)
+            if stored:
+                hints, source = stored, "template"
+    elif remember and template:
+        store.put(template, {k: v for k, v in given.items() if v})
+
+    selected = parse_page_range(hints.get("pages"), count)
+    if max_pages:
+        selected = selected[:max_pages]
+
+    return {
+        "template": template,
+        "source": source,
+        "pages": camelot_pages(selected),
+        "flavor": hints.get("flavor") or flavor,
+        "table_areas": hints.get("table_areas"),
+        "columns": hints.get("columns"),
+    }
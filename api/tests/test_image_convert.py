@@ -0,0 +1,46 @@
+"""
+Tests: image_convert banded conversion
+
+Usage:
+    python -m pytest api/tests
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from image_convert import can_read_bands, convert_image  # noqa: E402
+
+
+def gradient_16bit(width: int = 1200, height: int = 1000) -> Image.Image:
+    """Horizontal 16-bit gradient over the full 0-65535 range"""
+    row = np.linspace(0, 65535, width).astype("<u2")
+    return Image.fromarray(np.tile(row, (height, 1)))
+
+
+@pytest.mark.parametrize("mode", ["I;16", "I;16B"])
+def test_banded_png_keeps_16bit_grayscale(tmp_path, mode):
+    source = tmp_path / "gray16.tif"
+    img = gradient_16bit()
+    if mode == "I;16B":
+        img = Image.frombytes("I;16B", img.size, img.tobytes("raw", "I;16B"))
+    img.save(source)
+
+    with Image.open(source) as probe:
+        assert probe.mode == mode
+        assert can_read_bands(probe)
+
+    banded = tmp_path / "banded.png"
+    full = tmp_path / "full.png"
+    convert_image(str(source), str(banded), memory_pixels=100_000)
+    convert_image(str(source), str(full))
+
+    with Image.open(banded) as out, Image.open(full) as expected:
+        assert out.mode == expected.mode
+        assert np.array_equal(np.asarray(out), np.asarray(expected))
+        assert np.asarray(out).max() == 65535
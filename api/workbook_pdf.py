@@ -0,0 +1,241 @@
+"""
+Workbook PDF
+Sheet-parallel Excel to PDF for large workbooks.
+
+One soffice process lays out a whole workbook on a single core. Here the
+workbook is split into one file per visible sheet, the sheets are converted
+concurrently by several LibreOffice instances, and the PDFs are merged back
+in sheet order with one bookmark per sheet.
+
+- Each instance has its own user profile (-env:UserInstallation); two
+  soffice processes sharing a profile hand work to each other instead of
+  running side by side. Profiles are reused, so only the first conversion
+  on each pays LibreOffice's first-start cost.
+- Each part is a fresh openpyxl load of the workbook with the other sheets
+  removed, so it keeps the sheet's page setup and print areas. Formula
+  cells carry the value Excel last calculated, so references to other
+  sheets still print correctly once the sheet stands alone.
+- Fidelity trade-off: an openpyxl load/save drops content it cannot model
+  (charts, images, pivot tables, form controls, embedded objects), and
+  formulas without a cached value would print blank. Workbooks with any of
+  these are converted in a single LibreOffice pass instead, as are XLS
+  files and workbooks with a single visible sheet.
+- Splitting runs on a shared worker pool, one part per task, so parts are
+  converted as soon as each is written. Each task parses the whole
+  workbook; the parallelism pays for that on the large workbooks this is
+  meant for.
+
+Author: ToolGlid
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Tuple
+from xml.etree import ElementTree
+
+
+PDF_WORKERS = int(os.environ.get("EXCEL_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PROFILE_ROOT = Path(tempfile.gettempdir()) / "libreoffice_profiles"
+SPLIT_MIN_SHEETS = 2
+
+
+# ============== Split and merge ==============
+# Package parts an openpyxl load/save would drop or damage
+UNSUPPORTED_PARTS = {
+    "xl/charts/": "charts",
+    "xl/chartsheets/": "chart sheets",
+    "xl/drawings/": "drawings",
+    "xl/media/": "images",
+    "xl/pivotTables/": "pivot tables",
+    "xl/embeddings/": "embedded objects",
+    "xl/ctrlProps/": "form controls",
+}
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def _has_uncached_formula(archive: zipfile.ZipFile, name: str) -> bool:
+    """Whether a worksheet part has a formula cell without a calculated value"""
+    with archive.open(name) as f:
+        for _, elem in ElementTree.iterparse(f):
+            if elem.tag == SHEET_NS + "c":
+                formula = elem.find(SHEET_NS + "f")
+                value = elem.find(SHEET_NS + "v")
+                if formula is not None and (value is None or value.text is None):
+                    return True
+                elem.clear()
+    return False
+
+
+def single_pass_reason(input_path: str) -> Optional[str]:
+    """Why a workbook must be converted whole, or None if it can be split"""
+    with zipfile.ZipFile(input_path) as archive:
+        names = archive.namelist()
+        for prefix, what in UNSUPPORTED_PARTS.items():
+            if any(name.startswith(prefix) for name in names):
+                return f"contains {what}"
+        for name in names:
+            if name.startswith("xl/worksheets/") and name.endswith(".xml"):
+                if _has_uncached_formula(archive, name):
+                    return "has formulas without calculated values"
+    return None
+
+
+def split_candidates(input_path: str) -> List[str]:
+    """Titles of the visible, non-empty worksheets, in workbook order"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(input_path, read_only=True)
+    try:
+        return [
+            ws.title for ws in wb.worksheets
+            if ws.sheet_state == "visible" and any(v is not None for row in ws.iter_rows(values_only=True) for v in row)
+        ]
+    finally:
+        wb.close()
+
+
+def split_sheet(input_path: str, title: str, part_path: str) -> str:
+    """Save one worksheet as its own XLSX, formulas replaced by their cached values"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(input_path, data_only=True)
+    for ws in list(wb.worksheets):
+        if ws.title != title:
+            wb.remove(ws)
+    wb.active = 0
+    wb[title].sheet_state = "visible"
+    wb.save(part_path)
+    return part_path
+
+
+def part_name(index: int, title: str) -> str:
+    safe = re.sub(r"[^\w.-]+", "_", title).strip("_") or "sheet"
+    return f"{index:03d}-{safe}.xlsx"
+
+
+def merge_sheet_pdfs(parts: List[Tuple[str, str]], output_path: str) -> int:
+    """Concatenate per-sheet PDFs in order, one outline entry per sheet; returns the page count"""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for title, pdf_path in parts:
+        writer.append(pdf_path, outline_item=title, import_outline=False)
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    return len(writer.pages)
+
+
+# ============== LibreOffice ==============
+# PDF export filter per LibreOffice application, for export options such as a page range
+PDF_EXPORT_FILTERS = {
+    ".xlsx": "calc_pdf_Export", ".xls": "calc_pdf_Export", ".ods": "calc_pdf_Export", ".csv": "calc_pdf_Export",
+    ".pptx": "impress_pdf_Export", ".ppt": "impress_pdf_Export", ".odp": "impress_pdf_Export",
+}
+
+
+def pdf_export_target(input_path: Path, page_range: Optional[str] = None) -> str:
+    """--convert-to value for PDF, limited to a page range (e.g. "1-3") if given"""
+    if not page_range:
+        return "pdf"
+    export_filter = PDF_EXPORT_FILTERS.get(input_path.suffix.lower(), "writer_pdf_Export")
+    return "pdf:" + export_filter + ":" + json.dumps({"PageRange": {"type": "string", "value": page_range}})
+
+
+_profiles: Optional[asyncio.Queue] = None
+
+
+@asynccontextmanager
+async def libreoffice_profile():
+    """Borrow one of PDF_WORKERS LibreOffice profile directories"""
+    global _profiles
+    if _profiles is None:
+        _profiles = asyncio.Queue()
+        for slot in range(PDF_WORKERS):
+            _profiles.put_nowait(PROFILE_ROOT / f"instance-{slot}")
+
+    profile = await _profiles.get()
+    try:
+        profile.mkdir(parents=True, exist_ok=True)
+        yield profile
+    finally:
+        _profiles.put_nowait(profile)
+
+
+def profile_arg(profile: Path) -> str:
+    return f"-env:UserInstallation={profile.absolute().as_uri()}"
+
+
+# ============== Sheet-parallel conversion ==============
+ConvertFn = Callable[[Path, Path, Path], Awaitable[Path]]
+
+
+# openpyxl work runs off the event loop in a shared pool, created on first use
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: the API process runs threads, which do not survive fork safely
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the split workers (called on application shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _in_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(get_pool(), fn, *args)
+
+
+async def sheets_to_pdf(input_path: Path, output_dir: Path, convert: ConvertFn) -> Optional[Path]:
+    """
+    Convert a workbook sheet by sheet across LibreOffice instances and merge
+    the result into output_dir/{stem}.pdf. convert(sheet_file, out_dir,
+    profile) runs one soffice conversion. Returns None when the workbook is
+    not worth splitting or cannot be split faithfully, so the caller
+    converts it whole.
+    """
+    if input_path.suffix.lower() != ".xlsx":
+        return None
+    reason = await _in_pool(single_pass_reason, str(input_path))
+    if reason:
+        print(f"[Excel→PDF] Converting in one pass: workbook {reason}")
+        return None
+    titles = await _in_pool(split_candidates, str(input_path))
+    if len(titles) < SPLIT_MIN_SHEETS:
+        return None
+
+    parts_dir = output_dir / "sheets"
+    parts_dir.mkdir(parents=True, exist_ok=True)
+
+    async def convert_part(index: int, title: str) -> str:
+        part = await _in_pool(split_sheet, str(input_path), title, str(parts_dir / part_name(index, title)))
+        part_dir = Path(part).with_suffix("")
+        part_dir.mkdir(exist_ok=True)
+        async with libreoffice_profile() as profile:
+            return str(await convert(Path(part), part_dir, profile))
+
+    print(f"[Excel→PDF] {len(titles)} sheets across {min(PDF_WORKERS, len(titles))} LibreOffice instances")
+    try:
+        pdfs = await asyncio.gather(*(convert_part(i, title) for i, title in enumerate(titles)))
+
+        output_path = output_dir / f"{input_path.stem}.pdf"
+        await asyncio.to_thread(merge_sheet_pdfs, list(zip(titles, pdfs)), str(output_path))
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    return output_path
@@ -0,0 +1,135 @@
+"""
+Time-bucketed job workspaces
+
+Upload and output roots are laid out as <root>/<bucket>/<job_id>, where the
+bucket is the UTC hour the job was created in. Retention then drops whole
+buckets with a single rmtree instead of stat-ing every job directory, and an
+in-memory index maps job_id -> bucket so a job's directories are found with
+one lookup.
+"""
+
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+class Workspace:
+    """A pair of upload/output roots sharing one time-bucketed layout"""
+
+    BUCKET_FORMAT = "%Y%m%d%H"
+
+    def __init__(self, upload_root: Path, output_root: Path, bucket_seconds: int = 3600):
+        self.upload_root = upload_root
+        self.output_root = output_root
+        self.bucket_seconds = bucket_seconds
+        self._index: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    # -------- Layout --------
+    def _bucket_name(self, timestamp: float) -> str:
+        start = timestamp - (timestamp % self.bucket_seconds)
+        return datetime.fromtimestamp(start, tz=timezone.utc).strftime(self.BUCKET_FORMAT)
+
+    def _bucket_start(self, name: str) -> Optional[float]:
+        try:
+            parsed = datetime.strptime(name, self.BUCKET_FORMAT)
+        except ValueError:
+            return None
+        return parsed.replace(tzinfo=timezone.utc).timestamp()
+
+    def create(self, job_id: str) -> Tuple[Path, Path]:
+        """Create and index the upload/output directories for a new job"""
+        bucket = self._bucket_name(time.time())
+        with self._lock:
+            self._index[job_id] = bucket
+
+        upload_dir = self.upload_root / bucket / job_id
+        output_dir = self.output_root / bucket / job_id
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return upload_dir, output_dir
+
+    def bucket_of(self, job_id: str) -> Optional[str]:
+        return self._index.get(job_id)
+
+    def upload_dir(self, job_id: str) -> Optional[Path]:
+        bucket = self.bucket_of(job_id)
+        return self.upload_root / bucket / job_id if bucket else None
+
+    def output_dir(self, job_id: str) -> Optional[Path]:
+        bucket = self.bucket_of(job_id)
+        return self.output_root / bucket / job_id if bucket else None
+
+    # -------- Retention (blocking - run in a worker thread) --------
+    def touch(self, job_id: str) -> bool:
+        """
+        Move a job into the current bucket so its retention starts over
+        (e.g. a stored document that was uploaded again). Returns True if
+        its directories moved.
+        """
+        bucket = self._bucket_name(time.time())
+        with self._lock:
+            old = self._index.get(job_id)
+            if old is None or old == bucket:
+                return False
+            self._index[job_id] = bucket
+
+        for root in (self.upload_root, self.output_root):
+            source = root / old / job_id
+            if source.exists():
+                (root / bucket).mkdir(parents=True, exist_ok=True)
+                source.replace(root / bucket / job_id)
+        return True
+
+    def remove(self, job_id: str):
+        """Remove one job's directories and forget it"""
+        with self._lock:
+            bucket = self._index.pop(job_id, None)
+        if not bucket:
+            return
+        for root in (self.upload_root, self.output_root):
+            shutil.rmtree(root / bucket / job_id, ignore_errors=True)
+
+    def expire(self, cutoff: float) -> int:
+        """
+        Drop every bucket that ended more than one bucket before cutoff
+        (epoch seconds). Buckets go by creation time but job records expire
+        from completion, so the extra bucket keeps a job that started just
+        before the hour and finished after it. Entries that are not buckets
+        (e.g. pre-bucket job directories) fall back to an mtime check.
+        Returns the number of entries removed.
+        """
+        removed = 0
+        expired_buckets = set()
+
+        for root in (self.upload_root, self.output_root):
+            if not root.exists():
+                continue
+
+            for item in root.iterdir():
+                try:
+                    start = self._bucket_start(item.name)
+                    if start is not None:
+                        if start + 2 * self.bucket_seconds >= cutoff:
+                            continue
+                        expired_buckets.add(item.name)
+                    elif item.stat().st_mtime >= cutoff:
+                        continue
+
+                    if item.is_dir():
+                        shutil.rmtree(item, ignore_errors=True)
+                    else:
+                        item.unlink()
+                    removed += 1
+                except Exception:
+                    pass
+
+        if expired_buckets:
+            with self._lock:
+                for job_id in [j for j, b in self._index.items() if b in expired_buckets]:
+                    del self._index[job_id]
+
+        return removed
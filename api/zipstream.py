@@ -0,0 +1,90 @@
+"""
+Streaming ZIP writer
+
+Builds a ZIP archive incrementally and hands back the bytes produced by each
+call, so responses can start before the archive is complete and nothing is
+staged on disk. Entries use data descriptors (the archive is written as an
+unseekable stream), which every mainstream unzip tool supports.
+"""
+
+import time
+import zipfile
+from typing import Optional
+
+
+class _Sink:
+    """Write-only, tell-able buffer that zipfile treats as an unseekable stream"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """
+    Incremental ZIP builder.
+
+    Every method returns the archive bytes produced so far; concatenating all
+    returned chunks yields a valid ZIP file.
+
+    Example:
+        stream = ZipStream()
+        yield stream.open_entry("page-1.png")
+        yield stream.write(png_bytes)
+        yield stream.close_entry()
+        yield stream.close()
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_STORED):
+        self.compression = compression
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=compression, allowZip64=True)
+        self._entry = None
+
+    def open_entry(self, arcname: str, size: Optional[int] = None, compression: Optional[int] = None) -> bytes:
+        """Start a new entry; size (if known) avoids ZIP64 headers for small files"""
+        zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+        zinfo.compress_type = self.compression if compression is None else compression
+        force_zip64 = size is None or size * 1.05 > zipfile.ZIP64_LIMIT
+        if size is not None:
+            zinfo.file_size = size
+        self._entry = self._zip.open(zinfo, "w", force_zip64=force_zip64)
+        return self._sink.drain()
+
+    def write(self, data: bytes) -> bytes:
+        self._entry.write(data)
+        return self._sink.drain()
+
+    def close_entry(self) -> bytes:
+        self._entry.close()
+        self._entry = None
+        return self._sink.drain()
+
+    def write_entry(self, arcname: str, data: bytes, compression: Optional[int] = None) -> bytes:
+        """Add a complete in-memory entry in one call"""
+        return (
+            self.open_entry(arcname, size=len(data), compression=compression)
+            + self.write(data)
+            + self.close_entry()
+        )
+
+    def close(self) -> bytes:
+        """Write the central directory"""
+        self._zip.close()
+        return self._sink.drain()